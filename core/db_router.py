@@ -0,0 +1,154 @@
+"""
+Ruteo de lecturas a réplicas con consistencia "lee tus escrituras".
+
+Las lecturas van al primario salvo dentro de una request que eligió réplica (ReplicaRoutingMixin
+o las vistas async): la réplica se elige una vez por request, así todas sus consultas ven el mismo
+estado. Las escrituras y migraciones van siempre a default. Un usuario que escribe queda fijado
+("pinned") al primario durante REPLICA_PIN_SECONDS, para que sus lecturas no lleguen a una réplica
+que todavía no aplicó su cambio. La marca se guarda en el caché default de Django: con varios
+procesos debe ser un caché compartido (Redis, Memcached).
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+
+PIN_KEY = "db:pin:user:{}"
+
+_replica = ContextVar("db_replica", default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def current_replica():
+    """Alias de la réplica elegida para la request actual (None: se lee del primario)."""
+    return _replica.get()
+
+
+def read_target():
+    """"replica" o "primary": parte de las claves del caché de respuestas."""
+    return "replica" if _replica.get() else "primary"
+
+
+def pin_user(user_id):
+    """Fija al usuario al primario durante REPLICA_PIN_SECONDS (después de escribir)."""
+    seconds = getattr(settings, "REPLICA_PIN_SECONDS", 5)
+    if get_replicas() and seconds > 0:
+        cache.set(PIN_KEY.format(user_id), True, timeout=seconds)
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(PIN_KEY.format(user_id), False)
+
+
+async def ais_pinned(user_id):
+    return user_id is not None and await cache.aget(PIN_KEY.format(user_id), False)
+
+
+def choose_replica(pinned=False):
+    """Elige réplica para la request (None si no hay réplicas o el usuario está fijado al primario)."""
+    replicas = get_replicas()
+    if not replicas or pinned:
+        return None
+    return random.choice(replicas)
+
+
+def use_replica(alias):
+    """Dirige las lecturas del contexto actual a `alias` (None: primario). Retorna el token para reset_replica."""
+    return _replica.set(alias)
+
+
+def reset_replica(token):
+    _replica.reset(token)
+
+
+@contextmanager
+def routing_scope():
+    """Restaura al salir la elección de réplica hecha dentro del bloque."""
+    token = _replica.set(_replica.get())
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def iterate_with_routing(iterable):
+    """
+    Consume `iterable` leyendo de la misma base que la request que lo creó, aunque se recorra
+    después de terminar la vista (StreamingHttpResponse).
+    """
+    alias = _replica.get()  # Se lee ahora, no al empezar a recorrer
+
+    def iterate():
+        iterator = iter(iterable)
+        while True:
+            token = _replica.set(alias)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _replica.reset(token)
+            yield item
+    return iterate()
+
+
+def aiterate_with_routing(iterable, batch_size=100):
+    """
+    Versión async de iterate_with_routing para StreamingHttpResponse bajo ASGI: Django consume un
+    iterador sync entero (sync_to_async(list)) antes de enviarlo; este lo recorre en el hilo de
+    sync_to_async de a `batch_size` elementos y envía cada bloque apenas está listo.
+    """
+    iterator = iterate_with_routing(iterable)
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+
+    async def iterate():
+        while batch := await next_batch():
+            yield "".join(batch)
+    return iterate()
+
+
+class PrimaryReplicaRouter:
+    """Lecturas a la réplica elegida para la request (si hay); escrituras y migraciones a default."""
+
+    def db_for_read(self, model, **hints):
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Primario y réplicas tienen los mismos datos
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaRoutingMixin:
+    """
+    Mixin para ViewSets: las acciones de `replica_actions` con métodos de solo lectura leen de una
+    réplica, salvo que el usuario esté fijado al primario. Toda escritura exitosa fija al usuario.
+    """
+    replica_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.action in self.replica_actions:
+            self._replica_token = use_replica(choose_replica(is_pinned(request.user.pk)))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            reset_replica(token)
+            self._replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400 and request.user.is_authenticated:
+            pin_user(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,245 @@
+"""
+Broker de eventos para las conexiones Server-Sent Events (ver tasks.async_views.event_stream).
+
+El código que escribe publica listas de eventos (dicts serializables en JSON) con
+get_broker().publish(); cada conexión abierta tiene una Subscription con su propia cola en el event
+loop que la atiende. EVENTS["BROKER"] elige la implementación:
+- InProcessBroker: reparte los eventos dentro del proceso. Sirve con un solo proceso (runserver,
+  uvicorn con un worker), donde las escrituras y los streams comparten memoria.
+- PostgresBroker: publica con NOTIFY y cada proceso escucha con LISTEN, así los eventos llegan a los
+  streams de todos los procesos y servidores.
+
+Contrapresión: la cola de cada conexión está acotada en eventos (MAX_QUEUE_EVENTS) y en bytes
+(MAX_QUEUE_BYTES). Un cliente que no lee a tiempo desborda su cola: se descarta lo pendiente y la
+conexión termina con un evento "reset" para que el cliente se ponga al día con el feed de cambios.
+"""
+import asyncio
+import logging
+import threading
+from collections import deque
+
+import orjson
+import psycopg
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger("core.events")
+
+# OPTIONS de DATABASES que interpreta Django y no psycopg
+DJANGO_OPTIONS = ("pool", "server_side_binding", "isolation_level", "assume_role")
+
+
+def get_config():
+    config = {
+        "BROKER": "core.events.InProcessBroker",
+        "CHANNEL": "tasks_events",
+        "MAX_QUEUE_EVENTS": 1000,
+        "MAX_QUEUE_BYTES": 256 * 1024,
+        "MAX_SUBSCRIBERS": 1000,
+        "HEARTBEAT_SECONDS": 15,
+    }
+    config.update(getattr(settings, "EVENTS", {}))
+    return config
+
+
+class Overflow(Exception):
+    """La cola de la conexión se desbordó: el cliente debe resincronizar."""
+
+
+class Subscription:
+    """
+    Cola acotada de una conexión. Se crea y se consume en el event loop de la conexión; los
+    brokers entregan desde cualquier hilo con deliver().
+    """
+
+    def __init__(self, broker, accepts=None, max_events=None, max_bytes=None):
+        config = get_config()
+        self.broker = broker
+        self.accepts = accepts or (lambda event: True)
+        self.max_events = max_events or config["MAX_QUEUE_EVENTS"]
+        self.max_bytes = max_bytes or config["MAX_QUEUE_BYTES"]
+        self.loop = asyncio.get_running_loop()
+        self.messages = deque()
+        self.size = 0
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def deliver(self, events):
+        """Encola los eventos aceptados (seguro desde otros hilos)."""
+        accepted = [(event, message) for event, message in events if self.accepts(event)]
+        if accepted:
+            try:
+                self.loop.call_soon_threadsafe(self.enqueue, accepted)
+            except RuntimeError:  # El event loop de la conexión ya se cerró
+                self.close()
+
+    def enqueue(self, accepted):
+        if self.overflowed:
+            return
+        for _, message in accepted:
+            if len(self.messages) >= self.max_events or self.size + len(message) > self.max_bytes:
+                # Cliente lento: se libera la memoria y se avisa que debe resincronizar
+                self.overflowed = True
+                self.messages.clear()
+                self.size = 0
+                break
+            self.messages.append(message)
+            self.size += len(message)
+        self.ready.set()
+
+    async def get(self, timeout=None):
+        """Mensajes pendientes (espera hasta `timeout` segundos; [] si no llegó nada). Overflow si se desbordó."""
+        if not self.messages and not self.overflowed:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self.ready.clear()
+        if self.overflowed:
+            raise Overflow()
+        messages = list(self.messages)
+        self.messages.clear()
+        self.size = 0
+        return messages
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+def encode(event):
+    """Mensaje SSE del evento: el tipo como nombre del evento y el resto como datos JSON."""
+    data = {key: value for key, value in event.items() if key != "type"}
+    return b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class Broker:
+    """Base de los brokers: registro de suscripciones y reparto local de eventos."""
+
+    def __init__(self, **options):
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, accepts=None, **limits):
+        """Nueva suscripción en el event loop actual. Retorna None si se alcanzó MAX_SUBSCRIBERS."""
+        with self.lock:
+            if len(self.subscriptions) >= get_config()["MAX_SUBSCRIBERS"]:
+                return None
+            subscription = Subscription(self, accepts, **limits)
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def dispatch(self, events):
+        """Entrega los eventos a las suscripciones de este proceso (cada mensaje se codifica una vez)."""
+        encoded = [(event, encode(event)) for event in events]
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.deliver(encoded)
+
+    def publish(self, events):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Eventos dentro del proceso: publish() los entrega directamente."""
+
+    def publish(self, events):
+        if events:
+            self.dispatch(events)
+
+
+class PostgresBroker(Broker):
+    """
+    Eventos entre procesos con NOTIFY/LISTEN de PostgreSQL. publish() envía los eventos en lotes
+    (el payload de NOTIFY tiene un máximo de 8000 bytes) por la conexión de Django; cada proceso
+    con suscripciones abre una conexión async dedicada que escucha el canal y reparte localmente.
+    El listener corre en el event loop del servidor ASGI (uno por proceso): con WSGI no se abren
+    streams (ver tasks.async_views.event_stream).
+    """
+    max_payload = 7900
+
+    def __init__(self, alias="default", **options):
+        super().__init__(**options)
+        self.alias = alias
+        self.channel = get_config()["CHANNEL"]
+        self.listener = None
+        self.listening = None  # asyncio.Event: la conexión del listener ya ejecutó LISTEN
+
+    def publish(self, events):
+        batches, batch, size = [], [], 2
+        for event in events:
+            length = len(orjson.dumps(event)) + 1
+            if batch and size + length > self.max_payload:
+                batches.append(batch)
+                batch, size = [], 2
+            batch.append(event)
+            size += length
+        if batch:
+            batches.append(batch)
+        if not batches:
+            return
+        with connections[self.alias].cursor() as cursor:
+            for batch in batches:
+                cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, orjson.dumps(batch).decode()])
+
+    def subscribe(self, accepts=None, **limits):
+        subscription = super().subscribe(accepts, **limits)
+        if subscription is not None and (self.listener is None or self.listener.done()):
+            self.listening = asyncio.Event()
+            self.listener = subscription.loop.create_task(self.listen())
+        return subscription
+
+    def connection_kwargs(self):
+        """Parámetros de psycopg para la conexión LISTEN, tomados de DATABASES[alias]."""
+        db = settings.DATABASES[self.alias]
+        options = {key: value for key, value in db.get("OPTIONS", {}).items() if key not in DJANGO_OPTIONS}
+        return {
+            "dbname": db["NAME"], "user": db.get("USER"), "password": db.get("PASSWORD"),
+            "host": db.get("HOST"), "port": db.get("PORT") or None, "autocommit": True, **options,
+        }
+
+    async def listen(self):
+        """Escucha el canal mientras haya suscripciones; reintenta si se corta la conexión."""
+        delay = 1
+        while self.subscriptions:
+            try:
+                async with await psycopg.AsyncConnection.connect(**self.connection_kwargs()) as connection:
+                    await connection.execute(f'LISTEN "{self.channel}"')
+                    self.listening.set()
+                    delay = 1
+                    while self.subscriptions:
+                        async for notify in connection.notifies(timeout=get_config()["HEARTBEAT_SECONDS"]):
+                            self.dispatch(orjson.loads(notify.payload))
+                return
+            except psycopg.Error:
+                logger.warning("events_listen_failed channel=%s retry_in=%ss", self.channel, delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Broker configurado en EVENTS["BROKER"] (uno por proceso)."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(get_config()["BROKER"])()
+        return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting == "EVENTS":
+        _broker = None
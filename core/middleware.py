@@ -0,0 +1,241 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger("core.requests")
+sql_logger = logging.getLogger("core.sql")
+
+_current = ContextVar("request_metrics", default=None)
+
+
+def get_config():
+    config = {"SAMPLE_RATE": 1.0, "SLOW_REQUEST_MS": 500, "SLOW_QUERY_MS": 100, "HEADER": True}
+    config.update(getattr(settings, "REQUEST_TIMING", {}))
+    return config
+
+
+class RequestMetrics:
+    """
+    Tiempos acumulados (en segundos) de una request. Las consultas SQL y las mediciones internas
+    (measure) solo se registran si la request está muestreada (`sampled`).
+    """
+
+    def __init__(self, config, sampled=True):
+        self.config = config
+        self.sampled = sampled
+        self.view = None
+        self.queries = 0
+        self.timings = {"db": 0.0}
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_finished = None
+        self._active = set()
+
+    def execute(self, execute, sql, params, many, context):
+        """execute_wrapper de Django: cuenta y cronometra cada consulta, y registra las lentas."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.timings["db"] += duration
+            if duration * 1000 >= self.config["SLOW_QUERY_MS"]:
+                sql_logger.warning(
+                    "slow_query view=%s duration_ms=%.1f sql=%s", self.view, duration * 1000, sql,
+                    extra={"view": self.view, "duration_ms": round(duration * 1000, 1), "sql": sql},
+                )
+
+    @contextmanager
+    def measure(self, name):
+        # Las llamadas anidadas (p. ej. comentarios dentro de una tarea) se miden una sola vez
+        if name in self._active:
+            yield
+            return
+        self._active.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active.discard(name)
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def summary(self):
+        """Duraciones en ms: total, vista (auth + ORM + serialización), render y cada medición."""
+        finished = time.perf_counter()
+        durations = {name: value * 1000 for name, value in self.timings.items()}
+        if self.view_started is not None:
+            view_finished = self.view_finished or finished
+            durations["view"] = (view_finished - self.view_started) * 1000
+            if self.view_finished is not None:
+                durations["render"] = (finished - self.view_finished) * 1000
+        durations["total"] = (finished - self.started) * 1000
+        return durations
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    execute_wrapper instalado una vez por conexión: mide la consulta si la request actual está
+    muestreada. Se busca por contextvar, así también cubre las consultas que el ORM async ejecuta
+    en otro hilo (sync_to_async copia el contexto).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.execute(execute, sql, params, many, context)
+
+
+def install_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper)
+
+
+@contextmanager
+def measure(name):
+    """Suma la duración del bloque a `name` en la request actual (no hace nada si no se muestrea)."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.measure(name):
+        yield
+
+
+class TimedRepresentationMixin:
+    """Mixin para serializers: acumula el tiempo de to_representation como "serialize"."""
+
+    def to_representation(self, instance):
+        with measure("serialize"):
+            return super().to_representation(instance)
+
+
+def view_label(request, view_func):
+    """Nombre legible de la vista; en ViewSets de DRF incluye la acción ("TaskViewSet.list")."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__qualname__", repr(view_func))
+    actions = getattr(view_func, "actions", None) or {}
+    action = actions.get(request.method.lower())
+    return f"{cls.__name__}.{action}" if action else cls.__name__
+
+
+class RequestTimingMiddleware:
+    """
+    Mide el tiempo de todas las requests y registra como warning las lentas, con la vista (y acción
+    del ViewSet) que las originó. Una fracción (REQUEST_TIMING["SAMPLE_RATE"]) se instrumenta además
+    en detalle: cantidad y tiempo de consultas SQL (y las lentas), autenticación, serialización,
+    vista y render, publicados en el header Server-Timing y en una línea de log por request.
+    Funciona en WSGI y en ASGI sin pasar las vistas async a un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django adapta los hooks al modo de la cadena: en async deben ser corutinas
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.start(request)
+        if not metrics.sampled:
+            response = self.get_response(request)
+        else:
+            # Conexiones abiertas antes de importar este módulo (connection_created ya se envió)
+            for connection in connections.all(initialized_only=True):
+                install_query_wrapper(connection)
+            token = _current.set(metrics)
+            try:
+                response = self.get_response(request)
+            finally:
+                _current.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        if not metrics.sampled:
+            response = await self.get_response(request)
+        else:
+            token = _current.set(metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                _current.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    def start(self, request):
+        """
+        Métricas de la request. El muestreo solo decide la instrumentación de SQL y mediciones: el
+        total se mide siempre, así ninguna request lenta queda sin registrar.
+        """
+        config = get_config()
+        sampled = config["SAMPLE_RATE"] > 0 and random.random() < config["SAMPLE_RATE"]
+        request.metrics = RequestMetrics(config, sampled)
+        return request.metrics
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.view = view_label(request, view_func)
+            metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Se llama justo antes de renderizar (Response de DRF): separa el tiempo de vista del render
+        metrics = getattr(request, "metrics", None)
+        if metrics is not None:
+            metrics.view_finished = time.perf_counter()
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return RequestTimingMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return RequestTimingMiddleware.process_template_response(self, request, response)
+
+    def report(self, request, response, metrics):
+        durations = metrics.summary()
+        slow = durations["total"] >= metrics.config["SLOW_REQUEST_MS"]
+        if not metrics.sampled:
+            # Sin muestreo no hay consultas medidas ni header: solo se registran las lentas
+            durations.pop("db")
+            if not slow:
+                return
+        elif metrics.config["HEADER"]:
+            entries = [f'db;dur={durations.pop("db"):.1f};desc="{metrics.queries} queries"']
+            entries += [f"{name};dur={value:.1f}" for name, value in durations.items()]
+            response["Server-Timing"] = ", ".join(entries)
+        else:
+            durations.pop("db")
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "view": metrics.view,
+            "status": response.status_code,
+            "sampled": metrics.sampled,
+        }
+        if metrics.sampled:
+            fields.update(queries=metrics.queries, db_ms=round(metrics.timings["db"] * 1000, 1))
+        fields.update({f"{name}_ms": round(value, 1) for name, value in durations.items()})
+        message = " ".join(f"{key}={value}" for key, value in fields.items())
+        if slow:
+            logger.warning("slow_request %s", message, extra=fields)
+        else:
+            logger.info("request %s", message, extra=fields)
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # Búsqueda de texto completo y trigramas
 
     "rest_framework",
     "django_filters",
@@ -57,6 +58,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',  # Primero: mide la request completa
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,7 +90,7 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # DRF (JWT, filtros, paginación)
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "tasks.authentication.CachedJWTAuthentication",  # JWT sin leer auth_user en cada request
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
@@ -101,6 +103,18 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # JSON con orjson (mismos bytes que JSONRenderer) y MessagePack por Accept: application/msgpack
+    "DEFAULT_RENDERER_CLASSES": (
+        "tasks.renderers.ORJSONRenderer",
+        "tasks.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "tasks.parsers.ORJSONParser",
+        "tasks.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # SimpleJWT (tokens cortos, refresco)
@@ -109,19 +123,84 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Usuarios resueltos por CachedJWTAuthentication: máximo por proceso y segundos de vigencia
+JWT_USER_CACHE = {
+    "MAX_SIZE": int(os.getenv("JWT_USER_CACHE_SIZE", "1024")),
+    "TTL": int(os.getenv("JWT_USER_CACHE_TTL", "60")),
+}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Memoria local por defecto; en producción conviene un backend compartido (p. ej. Redis)
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "taskflow"),
+    }
+}
+
+# Caché de respuestas de TaskViewSet (list/retrieve); TIMEOUT=0 lo desactiva
+TASKS_RESPONSE_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": int(os.getenv("TASKS_CACHE_TIMEOUT", "60")),
+}
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
+def database_env(alias, name, default):
+    """Opción de conexión por alias (DB_REPLICA1_POOL_MAX_SIZE) con valor común (DB_POOL_MAX_SIZE)."""
+    return os.getenv(f"DB_{alias.upper()}_{name}", os.getenv(f"DB_{name}", default))
+
+
+def database(alias, host):
+    """Conexión PostgreSQL; con POOL_MAX_SIZE > 0 usa el pool de psycopg, si no CONN_MAX_AGE."""
+    config = {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": os.getenv("POSTGRES_DB", "taskflow"),
         "USER": os.getenv("POSTGRES_USER", "postgres"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
-        "HOST": os.getenv("POSTGRES_HOST", "db"),
+        "HOST": host,
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_HEALTH_CHECKS": True,
     }
-}
+    pool_max_size = int(database_env(alias, "POOL_MAX_SIZE", "0"))
+    if pool_max_size:
+        config["OPTIONS"] = {"pool": {
+            "min_size": int(database_env(alias, "POOL_MIN_SIZE", "1")),
+            "max_size": pool_max_size,
+            "timeout": float(database_env(alias, "POOL_TIMEOUT", "10")),
+        }}
+    else:
+        config["CONN_MAX_AGE"] = int(database_env(alias, "CONN_MAX_AGE", "0"))
+    return config
+
+
+DATABASES = {"default": database("default", os.getenv("POSTGRES_HOST", "db"))}
+
+# Réplicas de lectura (misma base, usuario y puerto): POSTGRES_REPLICA_HOSTS=host1,host2
+# Los tests las reemplazan por la base de default (TEST MIRROR)
+for number, host in enumerate(filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1):
+    DATABASES[f"replica{number}"] = {**database(f"replica{number}", host.strip()), "TEST": {"MIRROR": "default"}}
+
+# Lecturas de TaskViewSet a las réplicas (ver core.db_router); escrituras y migraciones a default.
+# Un usuario que escribe lee del primario durante REPLICA_PIN_SECONDS (lee sus propias escrituras)
+DATABASE_ROUTERS = ["core.db_router.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+
+# El runner de pruebas agrega un alias replica (mirror de default) para probar el ruteo
+TEST_RUNNER = "core.test_runner.TestRunner"
+
+# Feed de cambios (/api/tasks/changes/): las marcas de borrado se conservan SYNC_TOMBSTONE_DAYS días
+# (compact_tombstones); un cursor más viejo que eso debe volver a sincronizar desde cero
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+
+# Archivo (archive_tasks): las tareas completadas sin actividad (cambios ni comentarios, ver
+# Task.last_activity_at) desde hace ARCHIVE_AFTER_DAYS días pasan a ArchivedTask; /api/tasks/ las
+# sigue leyendo con ?archived=true
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -154,6 +233,60 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Eventos en tiempo real (/api/async/events/, ver core/events.py). Con más de un proceso se usa
+# core.events.PostgresBroker (NOTIFY/LISTEN); las colas por conexión están acotadas
+EVENTS = {
+    "BROKER": os.getenv("EVENTS_BROKER", "core.events.InProcessBroker"),
+    "CHANNEL": "tasks_events",
+    "MAX_QUEUE_EVENTS": int(os.getenv("EVENTS_MAX_QUEUE_EVENTS", "1000")),
+    "MAX_QUEUE_BYTES": int(os.getenv("EVENTS_MAX_QUEUE_BYTES", str(256 * 1024))),
+    "MAX_SUBSCRIBERS": int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000")),
+    "HEARTBEAT_SECONDS": int(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15")),
+}
+
+# Cola de trabajos en segundo plano (tasks/jobs.py, workers con run_workers): exportaciones y
+# operaciones masivas con ?async=true. RESULT_DIR debe ser compartido entre la web y los workers
+JOBS = {
+    "POLL_INTERVAL": float(os.getenv("JOBS_POLL_INTERVAL", "1")),
+    "TIMEOUT": int(os.getenv("JOBS_TIMEOUT", "600")),
+    "MAX_ATTEMPTS": int(os.getenv("JOBS_MAX_ATTEMPTS", "3")),
+    "RETRY_BACKOFF": int(os.getenv("JOBS_RETRY_BACKOFF", "10")),
+    "MAX_BACKOFF": 3600,
+    "RESULT_DIR": os.getenv("JOBS_RESULT_DIR", str(BASE_DIR / "job_results")),
+    "KEEP_DAYS": int(os.getenv("JOBS_KEEP_DAYS", "7")),
+}
+
+# Instrumentación por request (core.middleware.RequestTimingMiddleware): header Server-Timing y logs.
+# SAMPLE_RATE es la fracción de requests instrumentadas en detalle (0 la desactiva); las lentas se
+# registran siempre. Umbrales en milisegundos
+REQUEST_TIMING = {
+    "SAMPLE_RATE": float(os.getenv("REQUEST_TIMING_SAMPLE_RATE", "0.1")),
+    "SLOW_REQUEST_MS": float(os.getenv("SLOW_REQUEST_MS", "1000")),
+    "SLOW_QUERY_MS": float(os.getenv("SLOW_QUERY_MS", "100")),
+    "HEADER": True,
+}
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# core.requests: una línea por request muestreada (INFO) y todas las requests lentas (WARNING)
+# core.sql: consultas lentas con su SQL y la vista que las ejecutó (WARNING)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "{asctime} {levelname} {name} {message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+    },
+    "loggers": {
+        "core.requests": {"handlers": ["console"], "level": os.getenv("REQUEST_LOG_LEVEL", "WARNING")},
+        "core.sql": {"handlers": ["console"], "level": "WARNING"},
+        "tasks.jobs": {"handlers": ["console"], "level": os.getenv("JOBS_LOG_LEVEL", "WARNING")},
+    },
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
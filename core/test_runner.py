@@ -0,0 +1,15 @@
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runner de las pruebas: agrega el alias replica como mirror de la base de pruebas (con su propia
+    conexión) para probar el ruteo a réplicas sin configurarlas. Las pruebas lo activan con
+    override_settings(DATABASE_REPLICAS=["replica"]).
+    """
+
+    def setup_databases(self, **kwargs):
+        if "replica" not in connections.settings:
+            connections.settings["replica"] = {**connections.settings["default"], "TEST": {"MIRROR": "default"}}
+        return super().setup_databases(**kwargs)
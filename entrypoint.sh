@@ -14,41 +14,26 @@ elif [ -f .env.example ]; then
   set -o allexport; source .env.example; set +o allexport 2>/dev/null || true
 fi
 
-# Esperar a que la base de datos esté disponible
-echo "Waiting for PostgreSQL at $POSTGRES_HOST:$POSTGRES_PORT..."
-until pg_isready -h "$POSTGRES_HOST" -p "$POSTGRES_PORT" -U "$POSTGRES_USER" > /dev/null 2>&1; do
-  sleep 1
-done
-echo "PostgreSQL is ready!"
-
-# Ejecutar migraciones
-echo "Applying database migrations..."
-python manage.py migrate --noinput
-
-# Crear superusuario automáticamente si no existe
-echo "Checking superuser existence..."
-python - <<'PY'
-import os, django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-django.setup()
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
-u = os.getenv('DJANGO_SUPERUSER_USERNAME', 'admin')
-e = os.getenv('DJANGO_SUPERUSER_EMAIL', 'admin@example.com')
-p = os.getenv('DJANGO_SUPERUSER_PASSWORD', 'admin123')
-
-if not User.objects.filter(username=u).exists():
-    User.objects.create_superuser(username=u, email=e, password=p)
-    print(f"Superuser created: {u}")
-else:
-    print(f"Superuser already exists: {u}")
-PY
+# Contenedor de workers (docker-compose: command ["worker"]): la web ya aplicó las migraciones
+if [ "${1:-}" = "worker" ]; then
+  echo "Waiting for PostgreSQL at $POSTGRES_HOST:$POSTGRES_PORT..."
+  until pg_isready -h "$POSTGRES_HOST" -p "$POSTGRES_PORT" -U "$POSTGRES_USER" > /dev/null 2>&1; do
+    sleep 1
+  done
+  echo "Starting job workers..."
+  exec python manage.py run_workers --processes "${JOBS_PROCESSES:-1}" --threads "${JOBS_THREADS:-4}"
+fi
 
-# Recolectar archivos estáticos
-echo "Collecting static files..."
-python manage.py collectstatic --noinput
+# Preparación en un solo proceso de Django: espera la base, aplica las migraciones pendientes, crea el
+# superusuario y recolecta los estáticos; saltea lo que ya está al día (ver el comando bootstrap)
+echo "Bootstrapping (database, migrations, superuser, static files)..."
+python manage.py bootstrap --wait "${BOOTSTRAP_WAIT_SECONDS:-60}"
 
-# Lanzar servidor Django
+# Lanzar servidor: ASGI (uvicorn) para las vistas async, o el servidor de desarrollo de Django
+if [ "${ASGI_SERVER:-false}" = "true" ]; then
+  echo "Starting ASGI server (uvicorn)..."
+  exec uvicorn core.asgi:application --host 0.0.0.0 --port 8000 --workers "${WEB_WORKERS:-1}"
+fi
 echo "Starting Django development server..."
-exec python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Sin repetir los checks del sistema: bootstrap ya los corrió
+exec python manage.py runserver 0.0.0.0:8000 --skip-checks
\ No newline at end of file
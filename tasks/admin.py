@@ -1,26 +1,88 @@
+from functools import cached_property
+
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
+from unfold.contrib.filters.admin import TextFilter
+
 from .models import Task, Comment
+from .filters import search_tasks
+from .pagination import EstimatedCountPaginator, estimate_count
 # Register your models here.
 
+COMMENTS_SHOWN = 20  # Comentarios editables en la página de una tarea (los más recientes)
+
+
+class AdminPaginator(EstimatedCountPaginator):
+    """
+    Paginator del listado: con tablas grandes el total es el estimado del planificador (sin COUNT(*));
+    por debajo de `exact_below` filas estimadas se cuenta exacto, que es barato.
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        return self.object_list.count() if estimate < self.exact_below else estimate
+
+
+class OwnerFilter(TextFilter):
+    """Filtro por nombre de usuario del dueño: no lista a todos los usuarios como opciones."""
+    title = "owner"
+    parameter_name = "owner"
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(owner__username=self.value().strip())
+        return queryset
+
+
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """Formset del inline limitado a los COMMENTS_SHOWN comentarios más recientes de la tarea."""
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            queryset = super().get_queryset().order_by("-created_at", "-id")  # comment_task_created_idx
+            self._queryset = queryset[:COMMENTS_SHOWN]
+        return self._queryset
+
+
 class CommentInline(admin.TabularInline):
     """Permite gestionar comentarios directamente desde la página de edición de tarea."""
     model = Comment
     fk_name = "task" #reforzar vinculo
+    formset = LatestCommentsFormSet
     extra = 1  # Muestra un campo vacío adicional
-    verbose_name_plural = "comments"
+    verbose_name_plural = f"comments (últimos {COMMENTS_SHOWN})"
     fields = ("content", "author","created_at")
     readonly_fields = ("author","created_at",)  # Estos campos se asignan automáticamente
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("author")
+
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     """Configuración del panel de administración para el modelo Task con filtros, búsqueda y control de permisos."""
     list_display = ("title", "owner", "status", "priority", "created_at")
     search_fields = ("title", "description")
-    list_filter = ("status", "priority", "owner")
+    list_filter = ("status", "priority", OwnerFilter)
+    list_filter_submit = True  # El filtro de dueño es un campo de texto (unfold.contrib.filters)
+    list_select_related = ("owner",)
+    show_full_result_count = False  # Evita el COUNT(*) de toda la tabla en cada búsqueda o filtro
+    paginator = AdminPaginator
     readonly_fields = ("created_at", "updated_at", "owner")
     inlines = [CommentInline]
 
+    def get_queryset(self, request):
+        """No carga el documento de búsqueda (tsvector), que no se muestra en el admin."""
+        return super().get_queryset(request).defer("search_vector")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Búsqueda de texto completo (índice GIN) en lugar de ILIKE sobre search_fields."""
+        if not search_term:
+            return queryset, False
+        return search_tasks(queryset, search_term), False
+
     def save_model(self, request, obj, form, change):
         """Asigna automáticamente el usuario actual como propietario al crear una nueva tarea."""
         # Asigna automáticamente el usuario creador
@@ -36,6 +98,8 @@ class TaskAdmin(admin.ModelAdmin):
                 instance.author = request.user
                 instance.task = form.instance
                 instance.save()
+        for obj in formset.deleted_objects:  # Comentarios marcados para eliminar en el inline
+            obj.delete()
         formset.save_m2m()
 
     def has_change_permission(self, request, obj=None):
@@ -59,6 +123,6 @@ class TaskAdmin(admin.ModelAdmin):
         Los demás usuarios verán todos los campos como solo lectura.
         """
         if obj and obj.owner != request.user and not request.user.is_superuser:
-            base_fields = [f.name for f in self.model._meta.fields]
+            base_fields = [f.name for f in self.model._meta.fields if not f.generated and f.name != "sync_version"]
             return base_fields
         return self.readonly_fields
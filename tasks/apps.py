@@ -5,3 +5,7 @@ class TasksConfig(AppConfig):
     """Configuración de la aplicación Tasks que gestiona tareas y comentarios."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        """Registra los signals que mantienen los datos denormalizados (contadores, etc.) y los tipos de trabajo."""
+        from . import background, signals  # noqa: F401
@@ -0,0 +1,73 @@
+"""
+Archivo de tareas completadas: archive_batch() mueve un lote de tareas DONE sin actividad (cambios ni
+comentarios) desde hace ARCHIVE_AFTER_DAYS días, con sus comentarios, de Task/Comment a ArchivedTask/ArchivedComment.
+
+Cada lote es una transacción (INSERT ... SELECT y DELETE por tabla), así el comando archive_tasks
+se puede interrumpir y volver a correr: continúa con las tareas que todavía cumplen la condición.
+Las filas del lote se bloquean con FOR UPDATE SKIP LOCKED: una tarea que se está editando queda para
+el próximo lote, y si se reabre antes deja de cumplir la condición.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import ArchivedComment, ArchivedTask, Comment, Task
+from .signals import tasks_bulk_changed
+
+
+TASK_COLUMNS = [
+    "id", "title", "description", "priority", "status", "owner_id", "created_at", "updated_at",
+    "comment_count", "last_activity_at",
+]
+COMMENT_COLUMNS = ["id", "task_id", "author_id", "content", "created_at"]
+
+
+def archive_cutoff(days=None, now=None):
+    """Fecha límite: se archivan las tareas completadas con last_activity_at anterior."""
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def candidates(cutoff):
+    """Tareas completadas sin cambios ni comentarios desde `cutoff` (recorre task_status_idx)."""
+    return Task.objects.filter(status=Task.Status.DONE, last_activity_at__lt=cutoff)
+
+
+def copy_rows(cursor, source, target, columns, key, ids, extra=None):
+    """INSERT ... SELECT de las filas de `source` con `key` en `ids`; `extra` agrega columnas constantes."""
+    extra = extra or {}
+    names = ", ".join([*columns, *extra])
+    values = ", ".join([*columns, *(["%s"] * len(extra))])
+    cursor.execute(
+        f"INSERT INTO {target._meta.db_table} ({names}) "
+        f"SELECT {values} FROM {source._meta.db_table} WHERE {key} = ANY(%s)",
+        [*extra.values(), ids],
+    )
+    return cursor.rowcount
+
+
+@transaction.atomic
+def archive_batch(cutoff, batch_size=1000):
+    """
+    Archiva hasta `batch_size` tareas (en orden de id) y sus comentarios en una transacción.
+    Retorna (tareas, comentarios) archivados; (0, 0) cuando no queda nada por archivar.
+    """
+    ids = list(
+        candidates(cutoff).order_by("id").select_for_update(skip_locked=True).values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0, 0
+    with connections[router.db_for_write(Task)].cursor() as cursor:
+        copy_rows(cursor, Task, ArchivedTask, TASK_COLUMNS, "id", ids, extra={"archived_at": timezone.now()})
+        comments = copy_rows(cursor, Comment, ArchivedComment, COMMENT_COLUMNS, "task_id", ids)
+    # Como en los borrados masivos: sin cargar filas ni signals por fila. Los triggers dejan las
+    # marcas de borrado: en el feed de cambios la tarea sale de /api/tasks/ como eliminada
+    Comment.objects.filter(task_id__in=ids)._raw_delete(Comment.objects.db)
+    Task.objects.filter(pk__in=ids)._raw_delete(Task.objects.db)
+    # Las tareas completadas no cuentan como activas y siguen en TaskStat: sin deltas
+    tasks_bulk_changed.send(sender=Task, action="archive", task_ids=ids, owner_ids=[], stats=Counter())
+    return len(ids), comments
@@ -0,0 +1,197 @@
+"""
+Versiones async de los endpoints de lectura de TaskViewSet (listado, detalle y comentarios) para
+servir con ASGI: usan el ORM async (acount, aget, iteración async) y no ocupan un hilo mientras
+esperan a la base de datos. Reutilizan el queryset, los filtros, la paginación y los serializers
+del ViewSet, así que las respuestas son las mismas. Las escrituras siguen en /api/tasks/.
+También sirve el stream de eventos (Server-Sent Events) de cambios en tareas y comentarios.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from core.db_router import ais_pinned, choose_replica, routing_scope, use_replica
+from core.events import Overflow, get_broker, get_config as get_events_config
+from core.middleware import measure
+
+from .authentication import CachedJWTAuthentication
+from .models import Task
+from .pagination import CommentPagination
+from .renderers import ORJSONRenderer
+from .serializers import CommentSerializer, TaskDetailSerializer, TaskListSerializer
+from .views import TaskViewSet
+
+
+authentication = CachedJWTAuthentication()
+renderer = ORJSONRenderer()
+
+
+def render(data, status=200, headers=None):
+    """JSON igual al de DRF (mismo renderer que TaskViewSet)."""
+    return HttpResponse(renderer.render(data), status=status, content_type="application/json", headers=headers)
+
+
+def render_error(exc):
+    """Mismo formato y códigos que el exception_handler de DRF."""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers = {"WWW-Authenticate": authentication.authenticate_header(None)}
+    return render(data, status=exc.status_code, headers=headers)
+
+
+async def authenticate(request):
+    """Autentica con JWT (usuario cacheado, ver CachedJWTAuthentication); NotAuthenticated sin token."""
+    with measure("auth"):
+        result = await authentication.aauthenticate(request)
+    if result is None:
+        raise exceptions.NotAuthenticated()
+    request.user, request.auth = result
+    return result
+
+
+async def get_view(request, action, **kwargs):
+    """
+    Autentica (JWT, permisos de solo lectura: IsAuthenticated), elige réplica para las lecturas
+    (como ReplicaRoutingMixin) y arma la instancia del ViewSet que provee get_queryset y la
+    configuración de filtros.
+    """
+    result = await authenticate(request)
+    drf_request = Request(request)
+    drf_request.user, drf_request.auth = result
+    use_replica(choose_replica(await ais_pinned(request.user.pk)))  # api_view restaura al terminar
+    return TaskViewSet(request=drf_request, action=action, format_kwarg=None, args=(), kwargs=kwargs)
+
+
+async def get_task(view, pk):
+    try:
+        return await view.get_queryset().aget(pk=pk)
+    except (ObjectDoesNotExist, ValueError, TypeError):  # Task o ArchivedTask (?archived=true)
+        raise exceptions.NotFound(f"No {Task._meta.object_name} matches the given query.")
+
+
+def filter_queryset(view):
+    return view.filter_queryset(view.get_queryset())
+
+
+def api_view(func):
+    """
+    Convierte las APIException de DRF en respuestas JSON, como hace APIView.handle_exception, y
+    limita a la request la elección de réplica.
+    """
+    @wraps(func)
+    async def wrapper(request, *args, **kwargs):
+        with routing_scope():
+            try:
+                return await func(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return render_error(exc)
+    return require_GET(wrapper)
+
+
+@api_view
+async def task_list(request):
+    """GET /api/async/tasks/: mismos filtros (?status, ?priority, ?search, ?ordering), campos y paginación."""
+    view = await get_view(request, "list")
+    if view.request.query_params.get("search"):
+        # La búsqueda puede consultar la base al armar el queryset (fallback de trigramas)
+        queryset = await sync_to_async(filter_queryset)(view)
+    else:
+        queryset = filter_queryset(view)
+    page = await view.paginator.apaginate_queryset(queryset, view.request, view=view)
+    data = TaskListSerializer(page, many=True, fields=view.get_serializer_fields()).data
+    return render(view.paginator.get_paginated_response(data).data)
+
+
+@api_view
+async def task_detail(request, pk):
+    """GET /api/async/tasks/<id>/: la tarea con sus últimos comentarios y comment_count."""
+    view = await get_view(request, "retrieve", pk=pk)
+    task = await get_task(view, pk)
+    return render(TaskDetailSerializer(task, fields=view.get_serializer_fields()).data)
+
+
+@api_view
+async def task_comments(request, pk):
+    """GET /api/async/tasks/<id>/comments/: comentarios paginados por cursor."""
+    view = await get_view(request, "comments", pk=pk)
+    task = await get_task(view, pk)
+    comments = task.comments.select_related("author")
+    if view.request.query_params.get("ordering") == "-created_at":
+        comments = comments.order_by("-created_at", "-id")
+    paginator = CommentPagination()
+    page = await paginator.apaginate_queryset(comments, view.request, view=view)
+    data = CommentSerializer(page, many=True).data
+    return render(paginator.get_paginated_response(data).data)
+
+
+class TooManySubscribers(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Demasiadas conexiones de eventos abiertas; reintente más tarde."
+    default_code = "too_many_subscribers"
+
+
+class ASGIRequired(exceptions.APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "El stream de eventos requiere un servidor ASGI (ASGI_SERVER=true)."
+    default_code = "asgi_required"
+
+
+def parse_task_ids(value):
+    """?tasks=1,2,3: ids de las tareas a seguir (None: todas)."""
+    if not value:
+        return None
+    try:
+        return {int(pk) for pk in value.split(",") if pk.strip()}
+    except ValueError:
+        raise exceptions.ValidationError({"tasks": "Lista de ids separados por comas."})
+
+
+async def stream_events(subscription, heartbeat):
+    """
+    Mensajes SSE de la suscripción. Sin eventos envía un comentario cada `heartbeat` segundos (mantiene
+    viva la conexión en proxies y detecta clientes desconectados). Si el cliente no lee a tiempo y su
+    cola se desborda, termina con un evento "reset": debe ponerse al día con /api/tasks/changes/.
+    """
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                messages = await subscription.get(timeout=heartbeat)
+            except Overflow:
+                yield b'event: reset\ndata: {"reason":"overflow"}\n\n'
+                return
+            yield b"".join(messages) if messages else b": ping\n\n"
+    finally:
+        subscription.close()
+
+
+@api_view
+async def event_stream(request):
+    """
+    GET /api/async/events/: Server-Sent Events con las altas, modificaciones y bajas de tareas y
+    comentarios (event: task|comment, data: {"op", "id", "task"}). ?tasks=1,2 limita a esas tareas.
+    Los eventos solo avisan qué cambió: los datos se leen del feed de cambios o de los endpoints.
+
+    Solo con ASGI: con WSGI (runserver, gunicorn sync) el stream infinito ocupa un hilo para siempre y
+    cada request corre en un event loop propio que termina con ella (ahí quedaría el LISTEN de
+    PostgresBroker), así que se responde 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        raise ASGIRequired()
+    await authenticate(request)
+    task_ids = parse_task_ids(request.GET.get("tasks"))
+    accepts = None if task_ids is None else (lambda event: event["task"] in task_ids)
+    subscription = get_broker().subscribe(accepts)
+    if subscription is None:
+        raise TooManySubscribers()
+    return StreamingHttpResponse(
+        stream_events(subscription, get_events_config()["HEARTBEAT_SECONDS"]),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # Sin buffer en nginx
+    )
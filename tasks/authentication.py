@@ -0,0 +1,135 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def get_config():
+    config = {"MAX_SIZE": 1024, "TTL": 60}
+    config.update(getattr(settings, "JWT_USER_CACHE", {}))
+    return config
+
+
+class UserCache:
+    """
+    LRU acotado (MAX_SIZE) con expiración (TTL en segundos) de usuarios resueltos por id.
+    Vive en memoria del proceso: los signals de User invalidan la entrada local y el TTL acota
+    cuánto puede tardar otro proceso en ver un cambio hecho fuera de él.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # str(user_id) -> (user, expira)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = str(user_id)  # El claim del token es texto; los signals usan el pk
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        config = get_config()
+        if config["MAX_SIZE"] <= 0 or config["TTL"] <= 0:
+            return
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + config["TTL"])
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > config["MAX_SIZE"]:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(user_id):
+    """Descarta el usuario cacheado ya y otra vez al hacer commit (evita recachear la fila vieja)."""
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que reutiliza los usuarios ya resueltos (ver UserCache) en vez de leer la
+    fila de auth_user en cada request. En cada acierto se repiten los controles de simplejwt
+    (usuario activo y, si está habilitado, revocación por cambio de contraseña).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        else:
+            self.check_user(validated_token, user)
+        # Copia: la vista puede modificar request.user sin afectar a otras requests
+        return copy.copy(user)
+
+    async def aauthenticate(self, request):
+        """Versión async de authenticate() para vistas async (HttpRequest de Django)."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)  # Solo firma y claims: sin base de datos
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            self.check_user(validated_token, user)
+            user_cache.set(user_id, user)
+        else:
+            self.check_user(validated_token, user)
+        return copy.copy(user)
+
+    @staticmethod
+    def check_user(validated_token, user):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
@@ -0,0 +1,74 @@
+"""
+Tipos de trabajo de la cola (tasks.jobs) para las operaciones pesadas: exportaciones y operaciones
+masivas pedidas con ?async=true, y el recálculo de contadores. Ejecutan el mismo código que
+TaskViewSet, con una request armada a partir de lo que guardó el trabajo al encolarse.
+"""
+import json
+
+from django.http import HttpRequest, QueryDict
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from .jobs import Fail, register, result_path
+from .models import ActiveTaskCounter, Task, TaskStat
+
+
+def build_view(job, action, method="GET"):
+    """TaskViewSet con el usuario, los query params y el cuerpo de la request que encoló el trabajo."""
+    # Importada al ejecutar: este módulo se carga en TasksConfig.ready() y las vistas (DRF, filtros,
+    # renderers) encarecían el arranque de cada proceso, también migrate (ver profile_startup)
+    from .views import TaskViewSet
+
+    if job.user is None:
+        raise Fail("El trabajo no tiene usuario.")
+    http_request = HttpRequest()
+    http_request.method = method
+    http_request.GET = QueryDict(mutable=True)
+    for key, values in job.payload.get("query", {}).items():
+        http_request.GET.setlist(key, values)
+    request = Request(http_request)
+    request.user = job.user
+    if "data" in job.payload:
+        request._full_data = job.payload["data"]  # Cuerpo ya parseado al encolar
+    return TaskViewSet(request=request, action=action, format_kwarg=None, args=(), kwargs={})
+
+
+@register("tasks.export")
+def export_tasks(job):
+    """Genera el archivo de /api/tasks/export/ en RESULT_DIR; se descarga de /api/jobs/<id>/download/."""
+    export_format = job.payload.get("format", "ndjson")
+    view = build_view(job, "export")
+    name = f"job-{job.pk}.{export_format}"
+    path = result_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Un archivo parcial por intento: una descarga nunca ve un archivo a medias y dos intentos no
+    # escriben el mismo (si uno quedó colgado más allá de su plazo, gana el último rename)
+    partial = path.with_name(f"{name}.{job.attempts}.part")
+    try:
+        with partial.open("w", encoding="utf-8", newline="") as output:
+            for chunk in view.export_content(export_format):
+                output.write(chunk)
+        partial.replace(path)
+    finally:
+        partial.unlink(missing_ok=True)  # Después del rename ya no existe
+    return {"file": name, "format": export_format, "bytes": path.stat().st_size}
+
+
+# Sin reintentos: si el worker muere después del commit, repetir un alta masiva duplicaría las tareas
+@register("tasks.bulk", max_attempts=1)
+def bulk_tasks(job):
+    """Operación masiva de /api/tasks/bulk/; el resultado es la misma respuesta que la versión síncrona."""
+    view = build_view(job, "bulk", method=job.payload["method"])
+    try:
+        return view.run_bulk(view.request)
+    except ValidationError as exc:
+        raise Fail(json.dumps(exc.detail, ensure_ascii=False))
+
+
+@register("tasks.rebuild_counters")
+def rebuild_counters(job):
+    """Recalcula ActiveTaskCounter, TaskStat y la actividad de las tareas (rebuild_counters --enqueue)."""
+    return {
+        "counters": ActiveTaskCounter.rebuild(), "stats_rows": TaskStat.rebuild(),
+        "activity_fixed": Task.rebuild_activity(),
+    }
@@ -0,0 +1,178 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from core.db_router import read_target
+
+
+# Claves de versión: cada escritura incrementa la versión afectada y las entradas viejas
+# quedan inalcanzables (expiran solas por TIMEOUT), así no hace falta borrar por patrón.
+# Los listados tienen una sola versión: todas las tareas son visibles para todos (get_visibility) y
+# una escritura puede mover una tarea entre filtros, páginas y órdenes, así que invalida todos.
+LIST_VERSION_KEY = "tasks:version:list"  # Cualquier tarea o comentario (comment_count) creado, modificado o eliminado
+TASK_VERSION_KEY = "tasks:version:task:{}"  # Una tarea concreta (detalle, incluye sus comentarios)
+HITS_KEY = "tasks:cache:hits"
+MISSES_KEY = "tasks:cache:misses"
+
+
+def get_config():
+    # COUNTS_FLUSH_SECONDS: cada cuánto cada proceso suma al caché sus aciertos y fallos
+    config = {"ALIAS": "default", "TIMEOUT": 60, "COUNTS_FLUSH_SECONDS": 10}
+    config.update(getattr(settings, "TASKS_RESPONSE_CACHE", {}))
+    return config
+
+
+def get_cache():
+    return caches[get_config()["ALIAS"]]
+
+
+def get_version(key):
+    """Versión actual de una clave (1 si nunca se invalidó)."""
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(*keys):
+    """
+    Invalida todas las entradas que dependen de `keys`. Se incrementa ya (lecturas en la misma
+    transacción) y otra vez al hacer commit, para que una lectura concurrente que se cuele antes
+    del commit no deje guardada la versión vieja de los datos.
+    """
+    def bump():
+        cache = get_cache()
+        for key in keys:
+            incr(cache, key, initial=1)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_tasks(task_ids=()):
+    """Invalida los listados y el detalle de las tareas indicadas (usado por signals y escrituras masivas)."""
+    bump_version(LIST_VERSION_KEY, *(TASK_VERSION_KEY.format(task_id) for task_id in task_ids))
+
+
+def get_visibility(request):
+    """
+    Alcance de los datos visibles para el usuario. Hoy todas las tareas son visibles para cualquier
+    usuario autenticado (ver TaskViewSet.get_queryset), así que todos comparten las entradas.
+    """
+    return "all"
+
+
+def params_digest(request):
+    """Resumen estable de los query params (filtros, búsqueda, orden, página o cursor)."""
+    params = sorted(
+        (key, value) for key, values in request.query_params.lists() for value in values
+    )
+    return hashlib.sha256(urlencode(params).encode()).hexdigest()
+
+
+# Las claves separan lecturas del primario y de réplicas: una réplica atrasada puede guardar datos
+# viejos con la versión nueva, y un usuario fijado al primario no debe recibirlos.
+
+
+def list_cache_key(request):
+    version = get_version(LIST_VERSION_KEY)
+    return f"tasks:list:{get_visibility(request)}:{read_target()}:{version}:{params_digest(request)}"
+
+
+def detail_cache_key(request, pk):
+    version = get_version(TASK_VERSION_KEY.format(pk))
+    return f"tasks:detail:{get_visibility(request)}:{read_target()}:{pk}:{version}:{params_digest(request)}"
+
+
+def cached_response(key, build):
+    """
+    Retorna la respuesta guardada en `key` o la construye con `build()` y la guarda si es 200.
+    Se guardan los datos (no el render), así la negociación de contenido sigue funcionando.
+    Agrega el header X-Cache: HIT/MISS.
+    """
+    config = get_config()
+    cache = get_cache()
+    if not config["TIMEOUT"]:
+        return build()
+
+    data = cache.get(key)
+    if data is not None:
+        count(HITS_KEY)
+        response = Response(data)
+        response["X-Cache"] = "HIT"
+        return response
+
+    count(MISSES_KEY)
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=config["TIMEOUT"])
+    response["X-Cache"] = "MISS"
+    return response
+
+
+def incr(cache, key, delta=1, initial=0):
+    """
+    cache.incr que crea la clave con `initial` si no existe (o fue desalojada). Nunca falla por la
+    clave: con DummyCache, que no guarda nada, no hace nada.
+    """
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        pass
+    if cache.add(key, initial + delta, timeout=None):
+        return initial + delta
+    try:
+        return cache.incr(key, delta)  # Otro proceso la creó entre medio
+    except ValueError:
+        return None
+
+
+# Aciertos y fallos del proceso todavía no sumados al caché: contarlos en cada request serían
+# escrituras extra en el caché (consultas con DatabaseCache)
+_counts = Counter()
+_counts_lock = threading.Lock()
+_counts_flushed_at = time.monotonic()
+
+
+def count(key):
+    """Suma uno al contador en memoria; cada COUNTS_FLUSH_SECONDS lo vuelca al caché."""
+    with _counts_lock:
+        _counts[key] += 1
+        due = time.monotonic() - _counts_flushed_at >= get_config()["COUNTS_FLUSH_SECONDS"]
+    if due:
+        flush_counts()
+
+
+def flush_counts():
+    """Suma al caché los aciertos y fallos del proceso pendientes."""
+    global _counts_flushed_at
+    with _counts_lock:
+        pending = dict(_counts)
+        _counts.clear()
+        _counts_flushed_at = time.monotonic()
+    cache = get_cache()
+    for key, delta in pending.items():
+        incr(cache, key, delta)
+
+
+def cache_stats():
+    """Contadores de aciertos y fallos del caché de respuestas (los de otros procesos, hasta su último volcado)."""
+    flush_counts()
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
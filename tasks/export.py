@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Comment
+
+
+TASK_FIELDS = [
+    "id", "title", "description", "priority", "status", "owner__username", "created_at", "updated_at",
+]
+COMMENT_FIELDS = ["task_id", "id", "author__username", "content", "created_at"]
+EXPORT_CHUNK_SIZE = 2000  # Filas por lectura del cursor del servidor (y por consulta de comentarios)
+
+_datetime_field = serializers.DateTimeField()  # Mismo formato de fechas que la API
+
+
+def _task_row(values):
+    task_id, title, description, priority, status, owner, created_at, updated_at = values
+    return {
+        "id": task_id,
+        "title": title,
+        "description": description,
+        "priority": priority,
+        "status": status,
+        "owner": owner,
+        "created_at": _datetime_field.to_representation(created_at),
+        "updated_at": _datetime_field.to_representation(updated_at),
+    }
+
+
+def _comments_by_task(task_ids, comment_model=Comment):
+    """Comentarios de un bloque de tareas en una sola consulta, agrupados por tarea."""
+    grouped = {task_id: [] for task_id in task_ids}
+    rows = (
+        comment_model.objects.filter(task_id__in=task_ids)
+        .order_by("task_id", "created_at", "id")
+        .values_list(*COMMENT_FIELDS)
+    )
+    for task_id, comment_id, author, content, created_at in rows:
+        grouped[task_id].append({
+            "id": comment_id,
+            "author": author,
+            "content": content,
+            "created_at": _datetime_field.to_representation(created_at),
+        })
+    return grouped
+
+
+def iter_task_rows(queryset, include_comments=False, chunk_size=None):
+    """
+    Recorre las tareas del queryset como diccionarios, leyendo con un cursor del lado del servidor
+    (QuerySet.iterator) de `chunk_size` filas. Con include_comments se hace una consulta de
+    comentarios por bloque. La memoria usada depende del tamaño de bloque, no del total.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    rows = queryset.order_by(*ordering, "pk").values_list(*TASK_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [_task_row(values) for values in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        if include_comments:
+            comments = _comments_by_task([row["id"] for row in chunk], queryset.model.comments.field.model)
+            for row in chunk:
+                row["comments"] = comments[row["id"]]
+        yield from chunk
+
+
+def stream_ndjson(rows):
+    """Una línea JSON por tarea."""
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+def stream_csv(rows, include_comments=False):
+    """Encabezado y una línea CSV por tarea; los comentarios van como JSON en la columna "comments"."""
+    fieldnames = ["id", "title", "description", "priority", "status", "owner", "created_at", "updated_at"]
+    if include_comments:
+        fieldnames.append("comments")
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writeheader()
+    yield flush()
+    for row in rows:
+        if include_comments:
+            row["comments"] = json.dumps(row["comments"], ensure_ascii=False)
+        writer.writerow(row)
+        yield flush()
@@ -0,0 +1,101 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import Exists, F, FloatField, OuterRef, Q
+from django.db.models.functions import Cast
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import SEARCH_CONFIG
+
+
+WORD_RE = re.compile(r"[^\W_]+")  # Palabras sin los operadores de tsquery (&, |, !, :, paréntesis)
+
+_trigram_available = {}  # alias de base de datos -> bool
+
+
+def trigram_available(using="default"):
+    """Indica si la extensión pg_trgm está instalada (la migración 0003 la crea si puede)."""
+    if using not in _trigram_available:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available[using] = cursor.fetchone() is not None
+    return _trigram_available[using]
+
+
+def build_search_query(terms):
+    """Convierte el texto del usuario en un tsquery por prefijo: "reun equipo" -> "reun:* & equipo:*"."""
+    words = WORD_RE.findall(terms)
+    if not words:
+        return None
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_tasks(queryset, terms, include_comments=False):
+    """
+    Filtra tareas por texto completo sobre Task.search_vector (índice GIN) y las ordena por relevancia
+    (anotación `search_rank`). Con include_comments también coinciden las tareas con algún comentario
+    que contenga los términos. Si no hay coincidencias y pg_trgm está disponible, recurre a similitud
+    de trigramas sobre el título para tolerar errores de tipeo.
+    """
+    query = build_search_query(terms)
+    if query is None:
+        return queryset
+
+    condition = Q(search_vector=query)
+    if include_comments:
+        # Comment o ArchivedComment según el queryset; usa su índice de expresión (comment_search_idx)
+        matching_comments = queryset.model.comments.field.model.objects.annotate(
+            document=SearchVector("content", config=SEARCH_CONFIG)
+        ).filter(task=OuterRef("pk"), document=query)
+        condition |= Exists(matching_comments)
+
+    # ts_rank y word_similarity devuelven real (float4): se convierten a double precision para que
+    # el valor leído en Python sea exacto y sirva como posición del cursor en la paginación keyset
+    results = queryset.filter(condition).annotate(
+        search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    ).order_by("-search_rank")
+    if results.exists() or not trigram_available(queryset.db):
+        return results
+
+    # Fallback tolerante a errores de tipeo: operador %> servido por task_title_trgm_idx
+    return queryset.filter(title__trigram_word_similar=terms).annotate(
+        search_rank=Cast(TrigramWordSimilarity(terms, "title"), FloatField())
+    ).order_by("-search_rank")
+
+
+class TaskSearchFilter(SearchFilter):
+    """
+    SearchFilter de DRF (?search=) respaldado por el índice de texto completo en PostgreSQL.
+    ?search_comments=true incluye el contenido de los comentarios. Sin ?ordering= los resultados
+    se ordenan por relevancia. En otros motores se usa el ILIKE de SearchFilter sobre search_fields.
+    """
+    comments_param = "search_comments"
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+        terms = " ".join(self.get_search_terms(request))
+        include_comments = request.query_params.get(self.comments_param, "").lower() in ("1", "true")
+        return search_tasks(queryset, terms, include_comments=include_comments)
+
+
+class TaskOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter de DRF que traduce los campos públicos a las columnas indexadas que los ordenan
+    bien: ?ordering=priority usa priority_rank (low < medium < high) en vez del texto.
+    """
+    field_columns = {"priority": "priority_rank"}
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [self.to_column(field) for field in ordering]
+
+    def to_column(self, field):
+        descending = field.startswith("-")
+        column = self.field_columns.get(field.lstrip("-"), field.lstrip("-"))
+        return f"-{column}" if descending else column
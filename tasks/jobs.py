@@ -0,0 +1,226 @@
+"""
+Cola de trabajos en segundo plano guardada en PostgreSQL (modelo Job), sin otra infraestructura.
+
+- enqueue() crea el trabajo en la transacción actual: si la transacción se revierte no se ejecuta.
+- Los workers (comando run_workers) toman el pendiente más antiguo con SELECT ... FOR UPDATE
+  SKIP LOCKED: varios workers en paralelo nunca toman el mismo y no se bloquean entre sí.
+- Al tomarlo se fija un plazo (run_after = ahora + timeout del tipo) que un hilo de latido renueva
+  mientras se ejecuta: un trabajo largo no vence con su worker vivo. Si el worker muere, vencido el
+  plazo otro worker lo retoma, así la entrega es "al menos una vez": los tipos deben tolerar
+  repetirse o registrarse con max_attempts=1.
+- Un error reintenta con espera exponencial hasta max_attempts; Fail termina sin reintentos.
+
+Los tipos de trabajo se registran con @register("nombre") (ver tasks/background.py).
+"""
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger("tasks.jobs")
+
+
+def get_config():
+    config = {
+        "POLL_INTERVAL": 1,  # Segundos entre consultas cuando la cola está vacía
+        "TIMEOUT": 600,  # Plazo por defecto de un trabajo en ejecución (segundos)
+        "MAX_ATTEMPTS": 3,
+        "RETRY_BACKOFF": 10,  # Espera antes del primer reintento; se duplica en cada uno
+        "MAX_BACKOFF": 3600,
+        "RESULT_DIR": str(settings.BASE_DIR / "job_results"),  # Archivos generados (exportaciones)
+        "KEEP_DAYS": 7,  # Días que se conservan los trabajos terminados y sus archivos
+    }
+    config.update(getattr(settings, "JOBS", {}))
+    return config
+
+
+class Fail(Exception):
+    """Error definitivo del trabajo (datos inválidos, etc.): se marca fallido sin reintentar."""
+
+
+REGISTRY = {}  # Nombre -> {"func", "max_attempts", "timeout"}
+
+
+def register(name, max_attempts=None, timeout=None):
+    """
+    Registra `func(job)` como tipo de trabajo; lo que retorna (JSON) queda en Job.result.
+    max_attempts y timeout (segundos) reemplazan los valores de JOBS para este tipo.
+    """
+    def decorator(func):
+        REGISTRY[name] = {"func": func, "max_attempts": max_attempts, "timeout": timeout}
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, user=None, delay=0):
+    """Encola un trabajo del tipo `kind` (debe estar registrado)."""
+    if kind not in REGISTRY:
+        raise ValueError(f"Tipo de trabajo no registrado: {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        user=user,
+        max_attempts=REGISTRY[kind]["max_attempts"] or get_config()["MAX_ATTEMPTS"],
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def timeout_for(kind):
+    return REGISTRY.get(kind, {}).get("timeout") or get_config()["TIMEOUT"]
+
+
+def backoff(attempts):
+    """Espera antes del siguiente intento: exponencial, con tope y 0-25% de variación al azar."""
+    config = get_config()
+    delay = min(config["RETRY_BACKOFF"] * 2 ** (attempts - 1), config["MAX_BACKOFF"])
+    return delay * random.uniform(1, 1.25)
+
+
+def claim(worker=None):
+    """
+    Toma el trabajo pendiente más antiguo (o uno cuyo plazo venció) y lo marca en ejecución.
+    Retorna None si no hay ninguno disponible.
+    """
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            job = (
+                Job.objects.filter(status__in=Job.PENDING, run_after__lte=now)
+                .order_by("run_after", "id")
+                .select_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+            if job.status == Job.Status.RUNNING and job.attempts >= job.max_attempts:
+                # El worker del último intento murió sin terminarlo
+                job.status, job.finished_at = Job.Status.FAILED, now
+                job.error = "Se agotó el plazo del último intento sin que el worker lo terminara."
+                job.save(update_fields=["status", "finished_at", "error"])
+                continue
+            job.status = Job.Status.RUNNING
+            job.attempts += 1
+            job.worker = worker or worker_name()
+            job.started_at = now
+            job.run_after = now + timedelta(seconds=timeout_for(job.kind))
+            job.save(update_fields=["status", "attempts", "worker", "started_at", "run_after"])
+            return job
+
+
+def finish(job, **changes):
+    """Guarda el resultado si el trabajo sigue siendo de este intento (no lo retomó otro worker)."""
+    updated = Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, attempts=job.attempts).update(**changes)
+    if not updated:
+        logger.warning("job_lost job=%s kind=%s attempt=%s", job.pk, job.kind, job.attempts)
+
+
+def keep_leased(job, stop):
+    """
+    Latido de un trabajo en ejecución: cada tercio del plazo lo extiende (run_after) mientras el
+    intento siga siendo de este worker, hasta que se active `stop`.
+    """
+    timeout = timeout_for(job.kind)
+    try:
+        while not stop.wait(timeout / 3):
+            try:
+                renewed = Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, attempts=job.attempts).update(
+                    run_after=timezone.now() + timedelta(seconds=timeout)
+                )
+            except DatabaseError:
+                logger.warning("job_heartbeat_failed job=%s", job.pk, exc_info=True)
+                connection.close()  # Se reabre en el próximo latido; el plazo actual sigue corriendo
+                continue
+            if not renewed:
+                return  # Terminó o lo retomó otro worker
+    finally:
+        connection.close()  # La conexión de este hilo
+
+
+def execute(job):
+    """Ejecuta un trabajo ya tomado, con su latido, y registra el resultado, el reintento o el fallo."""
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=keep_leased, args=(job, stop), name=f"jobs-heartbeat-{job.pk}", daemon=True)
+    heartbeat.start()
+    try:
+        run(job)
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def run(job):
+    """Llama a la función del tipo y guarda el resultado, el reintento o el fallo del intento."""
+    job_type = REGISTRY.get(job.kind)
+    try:
+        if job_type is None:
+            raise Fail(f"Tipo de trabajo no registrado: {job.kind}")
+        result = job_type["func"](job)
+    except Fail as exc:
+        logger.warning("job_failed job=%s kind=%s error=%s", job.pk, job.kind, exc)
+        finish(job, status=Job.Status.FAILED, error=str(exc), finished_at=timezone.now())
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"  # El traceback completo queda en el log
+        if job.attempts < job.max_attempts:
+            delay = backoff(job.attempts)
+            logger.warning("job_retry job=%s kind=%s attempt=%s retry_in=%.0fs", job.pk, job.kind, job.attempts, delay, exc_info=True)
+            finish(job, status=Job.Status.QUEUED, error=error, run_after=timezone.now() + timedelta(seconds=delay))
+        else:
+            logger.error("job_failed job=%s kind=%s attempt=%s", job.pk, job.kind, job.attempts, exc_info=True)
+            finish(job, status=Job.Status.FAILED, error=error, finished_at=timezone.now())
+    else:
+        logger.info("job_succeeded job=%s kind=%s", job.pk, job.kind)
+        finish(job, status=Job.Status.SUCCEEDED, result=result, error="", finished_at=timezone.now())
+
+
+def work(stop, burst=False):
+    """
+    Bucle de un worker: toma y ejecuta trabajos hasta que se active `stop` (threading.Event). Con
+    `burst` termina en cuanto la cola queda vacía. Retorna cuántos trabajos ejecutó.
+    """
+    name, done = worker_name(), 0
+    while not stop.is_set():
+        try:
+            job = claim(name)
+            if job is not None:
+                execute(job)
+                done += 1
+                continue
+        except DatabaseError:
+            # Base caída o conexión cortada: un trabajo a medio guardar se retoma al vencer su plazo
+            logger.warning("jobs_database_error worker=%s", name, exc_info=True)
+            connection.close()  # Se reabre en la próxima consulta
+        else:
+            if burst:
+                break
+        stop.wait(get_config()["POLL_INTERVAL"])
+    return done
+
+
+def result_path(name):
+    """Ruta de un archivo generado por un trabajo (en RESULT_DIR)."""
+    return Path(get_config()["RESULT_DIR"]) / name
+
+
+def prune_jobs(now=None):
+    """Elimina los trabajos terminados hace más de KEEP_DAYS días y sus archivos. Retorna cuántos."""
+    cutoff = (now or timezone.now()) - timedelta(days=get_config()["KEEP_DAYS"])
+    old = Job.objects.filter(finished_at__lt=cutoff)
+    for result in old.exclude(result=None).values_list("result", flat=True):
+        if isinstance(result, dict) and result.get("file"):
+            result_path(result["file"]).unlink(missing_ok=True)
+    deleted, _ = old.delete()
+    return deleted
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+
+from tasks.archive import archive_batch, archive_cutoff, candidates
+from tasks.models import Comment, Task
+
+
+class Command(BaseCommand):
+    """
+    Comando para mover las tareas completadas antiguas (y sus comentarios) a las tablas de archivo.
+    Trabaja en lotes de una transacción cada uno: se puede detener en cualquier momento y volver a
+    correr, continúa donde quedó. Las tareas archivadas se leen con ?archived=true.
+    """
+    help = "Archiva las tareas completadas sin actividad desde hace ARCHIVE_AFTER_DAYS días (en lotes reanudables)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Antigüedad mínima en días (por defecto ARCHIVE_AFTER_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tareas por lote/transacción (por defecto 1000)")
+        parser.add_argument("--max-batches", type=int, help="Detenerse después de N lotes (el resto queda para la próxima corrida)")
+        parser.add_argument("--pause", type=float, default=0, help="Segundos de espera entre lotes (limita la carga)")
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa cuántas tareas se archivarían")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or (options["days"] is not None and options["days"] < 0):
+            raise CommandError("--batch-size debe ser al menos 1 y --days no puede ser negativo.")
+        cutoff = archive_cutoff(options["days"])
+        if options["dry_run"]:
+            pending = candidates(cutoff).count()
+            self.stdout.write(f"{pending} tareas completadas antes de {cutoff:%Y-%m-%d %H:%M} se archivarían.")
+            return
+
+        batches = archived = archived_comments = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            started = time.perf_counter()
+            tasks, comments = archive_batch(cutoff, options["batch_size"])
+            if not tasks:
+                break
+            batches += 1
+            archived += tasks
+            archived_comments += comments
+            self.stdout.write(
+                f"Lote {batches}: {tasks} tareas y {comments} comentarios "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        if archived:
+            # Estadísticas del planificador (y conteos estimados de la paginación) al día
+            with connections[router.db_for_write(Task)].cursor() as cursor:
+                cursor.execute(f"ANALYZE {Task._meta.db_table}, {Comment._meta.db_table}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{archived} tareas y {archived_comments} comentarios archivados en {batches} lotes."
+        ))
@@ -0,0 +1,296 @@
+import asyncio
+import io
+import json
+import math
+import re
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import django
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from tasks.filters import WORD_RE
+from tasks.models import Task
+
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench1234"
+BENCH_ADMIN_USERNAME = "bench_admin"
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, percent):
+    """Percentil por rango más cercano sobre valores ya ordenados."""
+    if not values:
+        return None
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(timings, queries, statuses, elapsed):
+    """Resumen de un escenario: latencias en ms, rendimiento (req/s) y consultas SQL por request."""
+    timings = sorted(timings)
+    return {
+        "requests": len(timings),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+        "max_ms": round(timings[-1] * 1000, 3),
+        "throughput_rps": round(len(timings) / elapsed, 2) if elapsed else None,
+        "queries_mean": round(sum(queries) / len(queries), 2),
+        "queries_max": max(queries),
+        "statuses": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """
+    Comando para medir la latencia de la API: crea una base de pruebas, la llena con load_tasks y
+    recorre las URLs reales con el cliente de pruebas de Django (sin red ni servidor). Reporta
+    percentiles, rendimiento y consultas SQL por escenario, y puede guardarlos en JSON para comparar.
+    """
+    help = "Mide la latencia de los endpoints de la API sobre un conjunto de datos generado"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Usuarios a generar (por defecto 20)")
+        parser.add_argument("--tasks", type=int, default=2000, help="Tareas a generar (por defecto 2000)")
+        parser.add_argument("--comments", type=int, default=5000, help="Comentarios a generar (por defecto 5000)")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla del conjunto de datos")
+        parser.add_argument("--iterations", type=int, default=200, help="Requests medidas por escenario")
+        parser.add_argument("--warmup", type=int, default=10, help="Requests de calentamiento por escenario")
+        parser.add_argument(
+            "--scenario", action="append", dest="scenarios",
+            help="Ejecuta solo este escenario (se puede repetir)",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=1,
+            help="Requests simultáneas en los escenarios async (los sync se miden de a una)",
+        )
+        parser.add_argument("--with-cache", action="store_true", help="Mantiene activo el caché de respuestas")
+        parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+        parser.add_argument("--compare", help="JSON de una ejecución anterior para mostrar diferencias")
+        parser.add_argument("--keepdb", action="store_true", help="Conserva la base de pruebas entre ejecuciones")
+        parser.add_argument(
+            "--no-test-db", action="store_true",
+            help="Usa la base configurada en vez de crear una de pruebas (se le agregan datos)",
+        )
+
+    def handle(self, *args, **options):
+        old_name = None
+        if not options["no_test_db"]:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        try:
+            # Sin caché de respuestas se mide el camino completo hasta la base de datos
+            cache_settings = {} if options["with_cache"] else {"TASKS_RESPONSE_CACHE": {"TIMEOUT": 0}}
+            with override_settings(**cache_settings):
+                report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        self.print_report(report, options["compare"])
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def run(self, options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Generando datos..."))
+        call_command(
+            "load_tasks", users=options["users"], tasks=options["tasks"], comments=options["comments"],
+            seed=options["seed"], stdout=io.StringIO(),
+        )
+        User = get_user_model()
+        if not User.objects.filter(username=BENCH_USERNAME).exists():
+            User.objects.create_user(username=BENCH_USERNAME, password=BENCH_PASSWORD)
+        if not User.objects.filter(username=BENCH_ADMIN_USERNAME).exists():
+            User.objects.create_superuser(username=BENCH_ADMIN_USERNAME, password=BENCH_PASSWORD)
+
+        client = Client()
+        tokens = client.post("/api/token/", {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}).json()
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {tokens['access']}"}
+        scenarios = self.get_scenarios(tokens, auth)
+        selected = options["scenarios"] or list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(unknown))} (opciones: {', '.join(scenarios)})")
+
+        results = {}
+        for name in selected:
+            self.stdout.write(f"  {name}...")
+            if asyncio.iscoroutinefunction(scenarios[name]):
+                results[name] = asyncio.run(self.ameasure(
+                    scenarios[name], options["iterations"], options["warmup"], options["concurrency"]
+                ))
+            else:
+                results[name] = self.measure(client, scenarios[name], options["iterations"], options["warmup"])
+
+        return {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "dataset": {key: options[key] for key in ("users", "tasks", "comments", "seed")},
+                "iterations": options["iterations"],
+                "async_concurrency": options["concurrency"],
+                "response_cache": options["with_cache"],
+            },
+            "results": results,
+        }
+
+    def get_scenarios(self, tokens, auth):
+        """
+        Escenario -> función que ejecuta una request y retorna la respuesta. Si la función tiene
+        `cleanup(response)`, se llama fuera de la medición para deshacer lo que la request creó.
+        """
+        task = Task.objects.order_by("-comment_count", "pk").first()
+        word = next(iter(WORD_RE.findall(task.title if task else "")), "tarea")
+
+        def get(path, **params):
+            url = f"{path}?{urlencode(params)}" if params else path
+            return lambda client: client.get(url, **auth)
+
+        def aget(path, **params):
+            url = f"{path}?{urlencode(params)}" if params else path
+            headers = {"Authorization": auth["HTTP_AUTHORIZATION"]}
+
+            async def request(client):
+                return await client.get(url, headers=headers)
+            return request
+
+        admin_client = Client()
+        admin_client.force_login(get_user_model().objects.get(username=BENCH_ADMIN_USERNAME))
+
+        def admin_get(path, **params):
+            url = f"{path}?{urlencode(params)}" if params else path
+            return lambda client: admin_client.get(url)
+
+        def create(client):
+            return client.post(
+                "/api/tasks/", {"title": "Benchmark", "priority": "low"}, content_type="application/json", **auth
+            )
+
+        def delete_created(response):
+            if response.status_code == 201:
+                Task.objects.filter(pk=response.json()["id"]).delete()  # Mantiene al usuario bajo el límite
+
+        create.cleanup = delete_created
+
+        def token_obtain(client):
+            return client.post("/api/token/", {"username": BENCH_USERNAME, "password": BENCH_PASSWORD})
+
+        def token_refresh(client):
+            return client.post("/api/token/refresh/", {"refresh": tokens["refresh"]})
+
+        scenarios = {
+            "list": get("/api/tasks/"),
+            "list_filtered": get("/api/tasks/", status="pending", priority="high"),
+            "list_ordered": get("/api/tasks/", ordering="-priority"),
+            "list_search": get("/api/tasks/", search=word),
+            "list_cursor": get("/api/tasks/", paginate="cursor"),
+            "async_list": aget("/api/async/tasks/"),
+            "async_list_filtered": aget("/api/async/tasks/", status="pending", priority="high"),
+            "async_list_cursor": aget("/api/async/tasks/", paginate="cursor"),
+            "create": create,
+            "token_obtain": token_obtain,
+            "token_refresh": token_refresh,
+            "admin_changelist": admin_get("/admin/tasks/task/"),
+            "admin_changelist_filtered": admin_get("/admin/tasks/task/", status="pending", priority="high"),
+            "admin_changelist_search": admin_get("/admin/tasks/task/", q=word),
+        }
+        if task is not None:
+            scenarios["detail"] = get(f"/api/tasks/{task.pk}/")
+            scenarios["comments"] = get(f"/api/tasks/{task.pk}/comments/")
+            scenarios["async_detail"] = aget(f"/api/async/tasks/{task.pk}/")
+            scenarios["async_comments"] = aget(f"/api/async/tasks/{task.pk}/comments/")
+            scenarios["admin_change"] = admin_get(f"/admin/tasks/task/{task.pk}/change/")
+        return scenarios
+
+    def measure(self, client, request, iterations, warmup):
+        cleanup = getattr(request, "cleanup", lambda response: None)
+        for _ in range(warmup):
+            cleanup(request(client))
+        timings, queries, statuses = [], [], []
+        elapsed = 0.0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                begin = time.perf_counter()
+                response = request(client)
+                timings.append(time.perf_counter() - begin)
+            elapsed += timings[-1]
+            queries.append(len(captured.captured_queries))
+            statuses.append(response.status_code)
+            cleanup(response)
+        return summarize(timings, queries, statuses, elapsed)
+
+    async def ameasure(self, request, iterations, warmup, concurrency):
+        """
+        Escenarios async (ASGI): `concurrency` requests simultáneas en el mismo event loop. Las consultas
+        se leen del header Server-Timing, porque el ORM async las ejecuta en otro hilo y conexión.
+        """
+        client = AsyncClient()
+        timings, queries, statuses = [], [], []
+
+        async def one():
+            begin = time.perf_counter()
+            response = await request(client)
+            timings.append(time.perf_counter() - begin)
+            match = SERVER_TIMING_QUERIES.search(response.get("Server-Timing", ""))
+            queries.append(int(match.group(1)) if match else 0)
+            statuses.append(response.status_code)
+
+        timing = {"SAMPLE_RATE": 1, "SLOW_REQUEST_MS": float("inf"), "SLOW_QUERY_MS": float("inf")}
+        try:
+            with override_settings(REQUEST_TIMING=timing):
+                for _ in range(warmup):
+                    await request(client)
+                started = time.perf_counter()
+                for start in range(0, iterations, concurrency):
+                    await asyncio.gather(*(one() for _ in range(min(concurrency, iterations - start))))
+                elapsed = time.perf_counter() - started
+        finally:
+            # Las conexiones del hilo del ORM async deben cerrarse antes de borrar la base de pruebas
+            await sync_to_async(connections.close_all)()
+        return summarize(timings, queries, statuses, elapsed)
+
+    def print_report(self, report, compare_path=None):
+        baseline = {}
+        if compare_path:
+            with open(compare_path) as compare:
+                baseline = json.load(compare)["results"]
+
+        header = f"{'escenario':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'SQL':>7}"
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+        for name, result in report["results"].items():
+            line = (
+                f"{name:<22}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['throughput_rps'] or 0:>10.1f}{result['queries_mean']:>7.1f}"
+            )
+            if name in baseline:
+                delta = (result["p50_ms"] - baseline[name]["p50_ms"]) / baseline[name]["p50_ms"] * 100
+                line += f"  p50 {delta:+.1f}%"
+            if set(result["statuses"]) - {"200", "201"}:
+                line += f"  códigos {result['statuses']}"
+            self.stdout.write(line)
@@ -0,0 +1,123 @@
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from faker import Faker
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.renderers import MessagePackRenderer, ORJSONRenderer
+from tasks.serializers import TaskDetailSerializer, TaskListSerializer
+
+from .bench_api import percentile
+
+
+RENDERERS = {
+    "drf_json": JSONRenderer,
+    "orjson": ORJSONRenderer,
+    "msgpack": MessagePackRenderer,
+}
+
+
+def build_tasks(count, seed):
+    """Tareas en memoria (sin base de datos) con textos de Faker, como las de load_tasks."""
+    fake = Faker("es_ES")
+    fake.seed_instance(seed)
+    User = get_user_model()
+    owners = [User(id=i + 1, username=fake.user_name()) for i in range(10)]
+    now = timezone.now()
+    tasks = []
+    for i in range(count):
+        created_at = now - timedelta(seconds=fake.random_int(0, 365 * 86400), microseconds=fake.random_int(0, 999999))
+        task = Task(
+            id=i + 1,
+            title=fake.sentence(nb_words=4),
+            description=fake.paragraph(nb_sentences=3),
+            priority=fake.random_element(Task.Priority.values),
+            status=fake.random_element(Task.Status.values),
+            owner=owners[i % len(owners)],
+            created_at=created_at,
+            updated_at=created_at + timedelta(hours=1),
+            last_activity_at=created_at + timedelta(hours=1),
+        )
+        task.latest_comments = []
+        tasks.append(task)
+    return tasks
+
+
+class Command(BaseCommand):
+    """
+    Comando para comparar los renderers de la API sobre una página de tareas serializada: tiempo por
+    render (percentiles), tamaño de la respuesta y si el JSON de orjson es idéntico al de DRF.
+    No usa la base de datos: mide solo el render.
+    """
+    help = "Compara el tiempo de render de JSONRenderer, ORJSONRenderer y MessagePackRenderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=100, help="Tareas por página (por defecto 100)")
+        parser.add_argument("--iterations", type=int, default=2000, help="Renders medidos por renderer")
+        parser.add_argument(
+            "--serializer", choices=["list", "detail"], default="list",
+            help="TaskListSerializer (por defecto) o TaskDetailSerializer",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos")
+        parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+
+    def handle(self, *args, **options):
+        if options["items"] < 1 or options["iterations"] < 1:
+            raise CommandError("--items y --iterations deben ser al menos 1.")
+        serializer_class = TaskListSerializer if options["serializer"] == "list" else TaskDetailSerializer
+        data = {
+            "count": options["items"],
+            "next": None,
+            "previous": None,
+            "results": serializer_class(build_tasks(options["items"], options["seed"]), many=True).data,
+        }
+
+        results = {}
+        outputs = {}
+        for name, renderer_class in RENDERERS.items():
+            renderer = renderer_class()
+            outputs[name] = renderer.render(data, renderer.media_type, {})
+            for _ in range(min(options["iterations"], 50)):  # Calentamiento
+                renderer.render(data, renderer.media_type, {})
+            timings = []
+            for _ in range(options["iterations"]):
+                started = time.perf_counter()
+                renderer.render(data, renderer.media_type, {})
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            results[name] = {
+                "p50_us": round(percentile(timings, 50) * 1e6, 1),
+                "p95_us": round(percentile(timings, 95) * 1e6, 1),
+                "mean_us": round(sum(timings) / len(timings) * 1e6, 1),
+                "bytes": len(outputs[name]),
+            }
+        baseline = results["drf_json"]["mean_us"]
+        for result in results.values():
+            result["speedup"] = round(baseline / result["mean_us"], 2)
+        identical = outputs["orjson"] == outputs["drf_json"]
+
+        header = f"{'renderer':<12}{'p50 µs':>10}{'p95 µs':>10}{'media µs':>10}{'bytes':>10}{'x DRF':>8}"
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12}{result['p50_us']:>10.1f}{result['p95_us']:>10.1f}{result['mean_us']:>10.1f}"
+                f"{result['bytes']:>10}{result['speedup']:>8.2f}"
+            )
+        if identical:
+            self.stdout.write(self.style.SUCCESS("orjson produce los mismos bytes que JSONRenderer."))
+        else:
+            self.stdout.write(self.style.ERROR("orjson y JSONRenderer producen bytes distintos."))
+
+        if options["output"]:
+            report = {
+                "items": options["items"], "serializer": options["serializer"],
+                "iterations": options["iterations"], "identical_json": identical, "results": results,
+            }
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import pkgutil
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+
+STATIC_HASH_FILE = ".collectstatic-hash"  # En STATIC_ROOT: si se borra la carpeta, se vuelve a recolectar
+DATABASE_CACHE = "django.core.cache.backends.db.DatabaseCache"  # Caché compartido por web y workers en Compose
+
+
+def pending_migrations(connection):
+    """
+    Migraciones en disco que no figuran en django_migrations. Solo lista los archivos: no importa
+    los módulos ni arma el grafo como migrate, que es lo caro cuando no hay nada que aplicar.
+    """
+    recorder = MigrationRecorder(connection)
+    applied = set(recorder.applied_migrations()) if recorder.has_table() else set()
+    on_disk = set()
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError:
+            continue
+        on_disk.update(
+            (app_config.label, info.name)
+            for info in pkgutil.iter_modules(getattr(module, "__path__", []))
+            if not info.ispkg and info.name[0] not in "_~"  # Mismo criterio que MigrationLoader
+        )
+    return sorted(on_disk - applied)
+
+
+def static_digest():
+    """Resumen de los estáticos de origen (ruta, tamaño y fecha de cada archivo) y del destino."""
+    ignore_patterns = apps.get_app_config("staticfiles").ignore_patterns
+    entries = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(ignore_patterns):
+            stat = os.stat(storage.path(path))
+            entries.append(f"{path}|{stat.st_size}|{stat.st_mtime_ns}")
+    digest = hashlib.sha256(f"{settings.STATIC_ROOT}|{settings.STORAGES['staticfiles']}".encode())
+    for entry in sorted(entries):
+        digest.update(entry.encode() + b"\0")
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    """
+    Preparación del contenedor en un solo proceso (entrypoint.sh): espera la base, aplica las
+    migraciones pendientes, crea el superusuario y las tablas de DatabaseCache y recolecta los estáticos. Cada paso como comando
+    aparte pagaba de nuevo el arranque de Django; además se saltea lo que ya está al día (migraciones
+    registradas en django_migrations, estáticos con el mismo resumen que la última recolección).
+    """
+    help = "Espera la base, migra, crea el superusuario y el caché en la base y recolecta estáticos, salteando lo que está al día"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wait", type=float, default=60, help="Segundos máximos de espera a la base (por defecto 60)")
+        parser.add_argument("--force", action="store_true", help="Migrar y recolectar estáticos aunque estén al día")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Base a preparar (por defecto default)")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        started = time.perf_counter()
+        for name, step in [
+            ("Base de datos", lambda: self.wait_for_database(connection, options["wait"])),
+            ("Migraciones", lambda: self.migrate(connection, options["force"])),
+            ("Superusuario", lambda: self.create_superuser(options["database"])),
+            ("Caché", lambda: self.create_cache_tables(options["database"])),
+            ("Estáticos", lambda: self.collect_static(options["force"])),
+        ]:
+            step_started = time.perf_counter()
+            result = step()
+            self.stdout.write(f"{name}: {result} ({(time.perf_counter() - step_started) * 1000:.0f} ms)")
+        self.stdout.write(self.style.SUCCESS(f"Preparación completa en {(time.perf_counter() - started) * 1000:.0f} ms."))
+
+    def wait_for_database(self, connection, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                connection.ensure_connection()
+                return "lista"
+            except OperationalError as exc:
+                if time.monotonic() >= deadline:
+                    raise CommandError(f"La base no respondió en {timeout:.0f} s: {exc}")
+                time.sleep(1)
+
+    def migrate(self, connection, force):
+        pending = pending_migrations(connection)
+        if not pending and not force:
+            return "al día"
+        call_command("migrate", database=connection.alias, interactive=False, verbosity=0)
+        return f"{len(pending)} aplicadas"
+
+    def create_superuser(self, database):
+        User = get_user_model()
+        username = os.getenv("DJANGO_SUPERUSER_USERNAME", "admin")
+        if User.objects.using(database).filter(username=username).exists():
+            return f"{username} ya existe"
+        User.objects.db_manager(database).create_superuser(
+            username=username,
+            email=os.getenv("DJANGO_SUPERUSER_EMAIL", "admin@example.com"),
+            password=os.getenv("DJANGO_SUPERUSER_PASSWORD", "admin123"),
+        )
+        return f"{username} creado"
+
+    def create_cache_tables(self, database):
+        tables = [cache["LOCATION"] for cache in settings.CACHES.values() if cache["BACKEND"] == DATABASE_CACHE]
+        if not tables:
+            return "sin DatabaseCache"
+        call_command("createcachetable", database=database, verbosity=0)  # Solo crea las que faltan
+        return f"tablas {', '.join(tables)} listas"
+
+    def collect_static(self, force):
+        if not settings.STATIC_ROOT:
+            return "sin STATIC_ROOT"
+        digest = static_digest()
+        stored = os.path.join(settings.STATIC_ROOT, STATIC_HASH_FILE)
+        try:
+            with open(stored, encoding="ascii") as file:
+                unchanged = file.read().strip() == digest
+        except OSError:
+            unchanged = False
+        if unchanged and not force:
+            return "sin cambios"
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(stored, "w", encoding="ascii") as file:  # Solo después de una recolección completa
+            file.write(digest)
+        return "recolectados"
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from tasks.models import Tombstone
+
+
+class Command(BaseCommand):
+    """
+    Comando para compactar las marcas de borrado del feed de cambios: elimina las de más de
+    SYNC_TOMBSTONE_DAYS días. Los clientes con un cursor más viejo reciben 410 y sincronizan desde cero.
+    """
+    help = "Elimina las marcas de borrado (Tombstone) más antiguas que SYNC_TOMBSTONE_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = Tombstone.compact()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} marcas de borrado eliminadas."))
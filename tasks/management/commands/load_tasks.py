@@ -1,60 +1,296 @@
-from django.core.management.base import BaseCommand
+import random
+import time
+from array import array
+from bisect import bisect_right
+from datetime import timedelta
+from itertools import accumulate
+from multiprocessing import Pool
+
 from django.contrib.auth import get_user_model
-from tasks.models import Task, Comment
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
 from faker import Faker
-import random
+
+from tasks import cache
+from tasks.models import ActiveTaskCounter, Task, TaskStat, Comment
+
+
+def parse_ratio(value, choices):
+    """Convierte "pending=60,done=40" en pesos por opción (las omitidas valen 0)."""
+    weights = dict.fromkeys(choices, 0.0)
+    try:
+        for part in value.split(","):
+            key, weight = part.split("=")
+            if key.strip() not in weights:
+                raise ValueError(key)
+            weights[key.strip()] = float(weight)
+    except ValueError as exc:
+        raise CommandError(f"Proporción inválida '{value}' (opciones: {', '.join(choices)}): {exc}")
+    if not any(weights.values()):
+        raise CommandError(f"La proporción '{value}' no tiene pesos positivos.")
+    return list(weights), list(weights.values())
+
+
+def owner_weights(users, skew):
+    """
+    Pesos acumulados tipo Zipf para elegir propietarios: el usuario i recibe 1 / (i + 1) ** skew.
+    skew=0 reparte uniformemente; skew>=1 concentra las tareas en unos pocos usuarios "pesados".
+    """
+    return list(accumulate(1 / (i + 1) ** skew for i in range(users)))
+
+
+def _weighted(rng, cumulative):
+    return bisect_right(cumulative, rng.random() * cumulative[-1])
+
+
+# --- Generación en procesos de trabajo (sin acceso a la base de datos) ---
+
+_worker = {}
+
+
+def _init_worker(config):
+    """Prepara Faker y los pesos una sola vez por proceso."""
+    _worker.update(config)
+    _worker["fake"] = Faker(config["locale"])
+    _worker["owners"] = owner_weights(config["users"], config["skew"])
+    _worker["statuses"] = list(accumulate(config["status_weights"]))
+    _worker["priorities"] = list(accumulate(config["priority_weights"]))
+
+
+def _chunk_random(kind, index):
+    """Generadores deterministas por bloque: el resultado no depende del número de procesos."""
+    seed = f"{_worker['seed']}:{kind}:{index}" if _worker["seed"] is not None else None
+    rng = random.Random(seed)
+    fake = _worker["fake"]
+    fake.seed_instance(seed)
+    return rng, fake
+
+
+def _random_moment(rng):
+    """Instante aleatorio dentro de la ventana de días configurada (segundos desde `now`)."""
+    return rng.random() * _worker["days"] * 86400
+
+
+def generate_task_chunk(args):
+    """Genera `size` filas de tareas: (título, descripción, prioridad, estado, índice de owner, creada, actualizada)."""
+    index, size = args
+    rng, fake = _chunk_random("tasks", index)
+    now = _worker["now"]
+    rows = []
+    for _ in range(size):
+        age = _random_moment(rng)
+        created_at = now - timedelta(seconds=age)
+        updated_at = created_at + timedelta(seconds=rng.random() * age)
+        rows.append((
+            fake.sentence(nb_words=4),  # Título de 4 palabras
+            fake.paragraph(nb_sentences=3),  # Descripción de 3 oraciones
+            _worker["priority_choices"][_weighted(rng, _worker["priorities"])],
+            _worker["status_choices"][_weighted(rng, _worker["statuses"])],
+            _weighted(rng, _worker["owners"]),
+            created_at,
+            updated_at,
+        ))
+    return rows
+
+
+def generate_comment_chunk(args):
+    """Genera `size` comentarios: (índice de tarea, índice de autor, contenido, creado)."""
+    index, size = args
+    rng, fake = _chunk_random("comments", index)
+    now = _worker["now"]
+    return [
+        (
+            rng.randrange(_worker["tasks"]),
+            rng.randrange(_worker["users"]),
+            fake.sentence(nb_words=10),
+            now - timedelta(seconds=_random_moment(rng)),
+        )
+        for _ in range(size)
+    ]
+
 
 class Command(BaseCommand):
-    """Comando para generar datos de prueba: 5 usuarios, 20 tareas y comentarios aleatorios usando Faker."""
+    """
+    Comando para generar datos de prueba con Faker, desde unas pocas filas hasta volúmenes de producción:
+    cantidades configurables, sesgo de propietarios y proporciones de estado/prioridad, generación en
+    paralelo con semilla determinista e inserción por lotes (COPY en PostgreSQL).
+    """
     help = "Carga datos de prueba (usuarios, tareas y comentarios) usando Faker"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5, help="Usuarios a crear (por defecto 5)")
+        parser.add_argument("--tasks", type=int, default=20, help="Tareas a crear (por defecto 20)")
+        parser.add_argument("--comments", type=int, default=30, help="Comentarios a crear (por defecto 30)")
+        parser.add_argument(
+            "--skew", type=float, default=0.0,
+            help="Sesgo Zipf de propietarios: 0 uniforme, 1 o más concentra tareas en pocos usuarios",
+        )
+        parser.add_argument(
+            "--status-ratio", default="pending=1,in_progress=1,done=1",
+            help='Proporción de estados, p. ej. "pending=20,in_progress=10,done=70"',
+        )
+        parser.add_argument(
+            "--priority-ratio", default="low=1,medium=1,high=1",
+            help='Proporción de prioridades, p. ej. "low=50,medium=35,high=15"',
+        )
+        parser.add_argument("--days", type=int, default=365, help="Antigüedad máxima de las fechas generadas")
+        parser.add_argument("--seed", type=int, default=None, help="Semilla para datos reproducibles")
+        parser.add_argument("--workers", type=int, default=1, help="Procesos que generan datos con Faker")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Filas por lote de generación/inserción")
+        parser.add_argument(
+            "--no-copy", action="store_true",
+            help="Usar bulk_create aun en PostgreSQL (por defecto se usa COPY)",
+        )
+        parser.add_argument("--locale", default="es_ES", help="Idioma de Faker (por defecto es_ES)")
+
     def handle(self, *args, **options):
         """Genera usuarios, tareas y comentarios con datos aleatorios en español."""
-        fake = Faker("es_ES")  # Generador de datos falsos en español
-        User = get_user_model()
+        if options["users"] < 1 or options["tasks"] < 0 or options["comments"] < 0:
+            raise CommandError("--users debe ser al menos 1 y --tasks/--comments no pueden ser negativos.")
+        if options["comments"] and not options["tasks"]:
+            raise CommandError("No se pueden generar comentarios sin tareas.")
+        self.batch_size = max(options["batch_size"], 1)
+        self.use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        status_choices, status_weights = parse_ratio(options["status_ratio"], Task.Status.values)
+        priority_choices, priority_weights = parse_ratio(options["priority_ratio"], Task.Priority.values)
 
         self.stdout.write(self.style.MIGRATE_HEADING("Generando datos de prueba..."))
+        started = time.monotonic()
 
         # --- Crear usuarios ---
-        users = []
-        for _ in range(5):
-            username = fake.user_name()
-            user, created = User.objects.get_or_create(
-                username=username,
-                defaults={"email": fake.email()}
+        user_ids = self.create_users(options["users"], options["seed"], options["locale"])
+        self.stdout.write(self.style.SUCCESS(f"{len(user_ids)} usuarios creados."))
+
+        config = {
+            "seed": options["seed"],
+            "locale": options["locale"],
+            "users": len(user_ids),
+            "tasks": options["tasks"],
+            "skew": options["skew"],
+            "days": options["days"],
+            "now": timezone.now(),
+            "status_choices": status_choices,
+            "status_weights": status_weights,
+            "priority_choices": priority_choices,
+            "priority_weights": priority_weights,
+        }
+        pool = Pool(options["workers"], _init_worker, (config,)) if options["workers"] > 1 else None
+        if pool is None:
+            _init_worker(config)
+        try:
+            # --- Crear tareas ---
+            task_ids = self.insert_tasks(pool, options["tasks"], user_ids)
+            self.stdout.write(self.style.SUCCESS(f" {len(task_ids)} tareas creadas."))
+
+            # --- Crear comentarios ---
+            total_comments = self.insert_comments(pool, options["comments"], task_ids, user_ids)
+            self.stdout.write(self.style.SUCCESS(f"  {total_comments} comentarios generados."))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        # Las inserciones masivas no envían signals: se recalculan los datos derivados
+        ActiveTaskCounter.rebuild(set(user_ids))
+        TaskStat.rebuild_owners(set(user_ids))
+        if task_ids:
+            Task.rebuild_activity((min(task_ids), max(task_ids)))
+        cache.invalidate_tasks()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Carga de datos completada correctamente en {elapsed:.1f} s."))
+
+    def create_users(self, count, seed, locale):
+        """Crea los usuarios con bulk_create y la misma contraseña, hasheada una sola vez."""
+        fake = Faker(locale)
+        fake.seed_instance(seed)
+        User = get_user_model()
+        password = make_password("demo123")  # Contraseña por defecto para usuarios de prueba
+        # El sufijo evita colisiones de Faker; las cargas repetidas reutilizan los usuarios existentes
+        usernames = [f"{fake.user_name()}{i}" for i in range(count)]
+        for start in range(0, count, self.batch_size):
+            batch = usernames[start:start + self.batch_size]
+            User.objects.bulk_create(
+                [User(username=username, email=f"{username}@example.com", password=password) for username in batch],
+                ignore_conflicts=True,
             )
-            user.set_password("demo123")  # Contraseña por defecto para usuarios de prueba
-            user.save()
-            users.append(user)
-        self.stdout.write(self.style.SUCCESS(f"{len(users)} usuarios creados."))
-
-        # --- Crear tareas ---
-        priorities = [Task.Priority.LOW, Task.Priority.MEDIUM, Task.Priority.HIGH]
-        statuses = [Task.Status.PENDING, Task.Status.IN_PROGRESS, Task.Status.DONE]
-
-        tasks = []
-        for _ in range(20):
-            owner = random.choice(users)  # Asignar propietario aleatorio
-            task = Task.objects.create(
-                title=fake.sentence(nb_words=4),  # Título de 4 palabras
-                description=fake.paragraph(nb_sentences=3),  # Descripción de 3 oraciones
-                priority=random.choice(priorities),
-                status=random.choice(statuses),
-                owner=owner,
+        ids = dict(User.objects.filter(username__in=usernames).values_list("username", "pk"))
+        return [ids[username] for username in usernames]
+
+    def chunks(self, total):
+        return [(index, min(self.batch_size, total - start)) for index, start in enumerate(range(0, total, self.batch_size))]
+
+    def generate(self, pool, function, total):
+        """Bloques generados en orden (en paralelo si hay pool), sin tenerlos todos en memoria."""
+        chunks = self.chunks(total)
+        return pool.imap(function, chunks) if pool is not None else map(function, chunks)
+
+    def insert_tasks(self, pool, total, user_ids):
+        """Inserta las tareas por lotes y retorna sus ids en orden de generación."""
+        task_ids = array("q")
+        columns = ["title", "description", "priority", "status", "owner_id", "created_at", "updated_at", "last_activity_at"]
+        for rows in self.generate(pool, generate_task_chunk, total):
+            # last_activity_at = updated_at: sin comentarios ya está al día; rebuild_activity solo toca
+            # las tareas que reciben comentarios
+            rows = [(*row[:4], user_ids[row[4]], *row[5:], row[6]) for row in rows]
+            with transaction.atomic():
+                if self.use_copy:
+                    with connection.cursor() as cursor:
+                        # Se reservan los ids en la secuencia antes del COPY y se envían explícitos: otras
+                        # inserciones concurrentes no pueden intercalarse ni confundirse con las nuevas filas
+                        cursor.execute(
+                            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                            [Task._meta.db_table, len(rows)],
+                        )
+                        ids = [row[0] for row in cursor.fetchall()]
+                        self.copy(cursor, Task._meta.db_table, ["id", *columns], [(pk, *row) for pk, row in zip(ids, rows)])
+                        task_ids.extend(ids)
+                else:
+                    # bulk_create usa INSERT ... RETURNING id: cada objeto recibe el id de su propia fila
+                    tasks = Task.objects.bulk_create(Task(**dict(zip(columns, row))) for row in rows)
+                    ids = [task.pk for task in tasks]
+                    self.restore_dates(Task, columns[5:], [(pk, *row[5:]) for pk, row in zip(ids, rows)])
+                    task_ids.extend(ids)
+        return task_ids
+
+    def insert_comments(self, pool, total, task_ids, user_ids):
+        """Inserta los comentarios por lotes sobre las tareas recién creadas."""
+        columns = ["task_id", "author_id", "content", "created_at"]
+        inserted = 0
+        for rows in self.generate(pool, generate_comment_chunk, total):
+            rows = [(task_ids[row[0]], user_ids[row[1]], row[2], row[3]) for row in rows]
+            with transaction.atomic():
+                if self.use_copy:
+                    with connection.cursor() as cursor:
+                        self.copy(cursor, Comment._meta.db_table, columns, rows)
+                else:
+                    comments = Comment.objects.bulk_create(Comment(**dict(zip(columns, row))) for row in rows)
+                    self.restore_dates(Comment, columns[3:], [(comment.pk, row[3]) for comment, row in zip(comments, rows)])
+            inserted += len(rows)
+        return inserted
+
+    @staticmethod
+    def restore_dates(model, columns, rows):
+        """
+        Vuelve a escribir las fechas generadas que bulk_create pisa con auto_now/auto_now_add (sin eso
+        todas las filas quedarían con la hora de la carga): un UPDATE ... FROM (VALUES ...) por lote.
+        `rows` son tuplas (id, *valores de columns).
+        """
+        table = model._meta.db_table
+        row = "(%s, " + ", ".join(["%s::timestamptz"] * len(columns)) + ")"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS target SET {', '.join(f'{column} = dates.{column}' for column in columns)} "
+                f"FROM (VALUES {', '.join([row] * len(rows))}) AS dates (id, {', '.join(columns)}) "
+                "WHERE target.id = dates.id",
+                [value for values in rows for value in values],
             )
-            tasks.append(task)
-        self.stdout.write(self.style.SUCCESS(f" {len(tasks)} tareas creadas."))
-
-        # --- Crear comentarios ---
-        total_comments = 0
-        for task in random.sample(tasks, k=15):  # Solo 15 de las 20 tareas tendrán comentarios
-            for _ in range(random.randint(1, 3)):  # Entre 1 y 3 comentarios por tarea
-                Comment.objects.create(
-                    task=task,
-                    author=random.choice(users),
-                    content=fake.sentence(nb_words=10)
-                )
-                total_comments += 1
-
-        self.stdout.write(self.style.SUCCESS(f"  {total_comments} comentarios generados."))
-        self.stdout.write(self.style.SUCCESS("Carga de datos completada correctamente."))
+
+    @staticmethod
+    def copy(cursor, table, columns, rows):
+        """COPY ... FROM STDIN de psycopg 3: la forma más rápida de insertar en PostgreSQL."""
+        statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        with cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row(row)
@@ -0,0 +1,145 @@
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Se ejecuta en un intérprete nuevo (el de este comando ya tiene Django cargado): mide cada fase del
+# arranque hasta responder la primera request, como un proceso del servidor recién levantado
+PROBE = """
+import json, sys, time
+
+started = last = time.perf_counter()
+phases = {}
+
+def mark(name):
+    global last
+    now = time.perf_counter()
+    phases[name] = (now - last) * 1000
+    last = now
+
+from django.conf import settings
+settings.INSTALLED_APPS  # Importa DJANGO_SETTINGS_MODULE
+mark("settings")
+
+# Tiempo de cada app de INSTALLED_APPS: importar su paquete (AppConfig.create), sus modelos y ready()
+from django.apps.config import AppConfig
+per_app = {}
+
+def timing(entry, step, func):
+    def wrapper(*args, **kwargs):
+        step_started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            per_app.setdefault(entry, {})[step] = (time.perf_counter() - step_started) * 1000
+    return wrapper
+
+create = AppConfig.create.__func__
+
+def timed_create(cls, entry):
+    app_config = timing(entry, "import", create)(cls, entry)
+    app_config.import_models = timing(entry, "models", app_config.import_models)
+    app_config.ready = timing(entry, "ready", app_config.ready)
+    return app_config
+
+AppConfig.create = classmethod(timed_create)
+import django
+django.setup()
+mark("apps")
+from django.core.handlers.wsgi import WSGIHandler
+handler = WSGIHandler()
+mark("middleware")
+from django.urls import get_resolver
+get_resolver().url_patterns
+mark("urls")
+from django.test import Client
+status = Client(raise_request_exception=False).get(sys.argv[1]).status_code
+mark("first_request")
+phases["total"] = (time.perf_counter() - started) * 1000
+print(json.dumps({"phases": phases, "apps": per_app, "status": status}))
+"""
+
+
+def parse_importtime(stderr):
+    """Filas de -X importtime como (módulo, self µs, acumulado µs)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    """
+    Perfil del arranque en frío: tiempo de cada fase (settings, INSTALLED_APPS, middleware, URLconf
+    y primera request), de cada app (paquete, modelos y ready()) y de importación por paquete
+    (python -X importtime), con las apps de INSTALLED_APPS marcadas. Sirve para medir y recortar lo que tarda un proceso nuevo en atender.
+    """
+    help = "Mide el arranque en frío de Django y el tiempo de importación por paquete"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/", help="URL de la primera request (por defecto /api/)")
+        parser.add_argument("--top", type=int, default=15, help="Paquetes y módulos más lentos a mostrar")
+        parser.add_argument("--output", help="Guardar el resultado en JSON en este archivo")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")}
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, options["path"]],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if process.returncode:
+            raise CommandError(f"El arranque falló:\n{process.stderr[-2000:]}")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        rows = parse_importtime(process.stderr)
+
+        # El tiempo propio (self) de cada módulo se suma sin contar dos veces los anidados
+        packages = Counter()
+        for name, self_us, _ in rows:
+            packages[name.split(".")[0]] += self_us
+        app_packages = {app.split(".")[0] for app in settings.INSTALLED_APPS}
+        slowest = sorted(rows, key=lambda row: row[2], reverse=True)
+        report = {
+            "phases_ms": {name: round(value, 1) for name, value in result["phases"].items()},
+            "first_request_status": result["status"],
+            "apps_ms": {
+                entry: {step: round(value, 1) for step, value in steps.items()} for entry, steps in result["apps"].items()
+            },
+            "imports_ms": round(sum(packages.values()) / 1000, 1),
+            "packages_ms": {name: round(us / 1000, 1) for name, us in packages.most_common()},
+            "slowest_modules_ms": [
+                {"module": name, "cumulative": round(cumulative / 1000, 1), "self": round(self_us / 1000, 1)}
+                for name, self_us, cumulative in slowest[:options["top"]]
+            ],
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Fases del arranque (ms)"))
+        for name, value in report["phases_ms"].items():
+            self.stdout.write(f"  {name:<14} {value:>8.1f}")
+        self.stdout.write(f"  (primera request a {options['path']}: {result['status']})")
+        self.stdout.write(self.style.MIGRATE_HEADING("INSTALLED_APPS (ms): paquete, modelos, ready()"))
+        apps_total = lambda item: sum(item[1].values())
+        for entry, steps in sorted(report["apps_ms"].items(), key=apps_total, reverse=True):
+            self.stdout.write(
+                f"  {entry:<34} {steps.get('import', 0):>7.1f} {steps.get('models', 0):>7.1f} "
+                f"{steps.get('ready', 0):>7.1f}"
+            )
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Importaciones por paquete ({report['imports_ms']:.1f} ms en total, * = INSTALLED_APPS)"))
+        for name, us in packages.most_common(options["top"]):
+            marker = "*" if name in app_packages else " "
+            self.stdout.write(f" {marker}{name:<32} {us / 1000:>8.1f}")
+        self.stdout.write(self.style.MIGRATE_HEADING("Módulos con mayor tiempo acumulado (ms)"))
+        for row in report["slowest_modules_ms"]:
+            self.stdout.write(f"  {row['module']:<48} {row['cumulative']:>8.1f}")
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Resultado guardado en {options['output']}")
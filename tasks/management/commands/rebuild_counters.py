@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from tasks import jobs
+from tasks.models import ActiveTaskCounter, Task, TaskStat
+
+
+class Command(BaseCommand):
+    """Comando para recalcular los datos denormalizados de tareas a partir de las tablas reales."""
+    help = (
+        "Recalcula los contadores de tareas activas por usuario, el resumen de estadísticas (TaskStat) "
+        "y comment_count/last_activity_at de las tareas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--enqueue", action="store_true", help="Encolar el recálculo para los workers (run_workers)")
+
+    def handle(self, *args, **options):
+        """Recalcula ActiveTaskCounter y TaskStat para todos los usuarios con tareas, y la actividad de cada tarea."""
+        if options["enqueue"]:
+            job = jobs.enqueue("tasks.rebuild_counters")
+            self.stdout.write(self.style.SUCCESS(f"Recálculo encolado (trabajo {job.pk})."))
+            return
+        total = ActiveTaskCounter.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{total} contadores de tareas activas recalculados."))
+        rows = TaskStat.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{rows} filas de estadísticas recalculadas."))
+        fixed = Task.rebuild_activity()
+        self.stdout.write(self.style.SUCCESS(f"{fixed} tareas con comment_count o last_activity_at corregidos."))
@@ -0,0 +1,135 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core import checks
+from django.core.management.base import BaseCommand, CommandError, SystemCheckError
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from core.events import InProcessBroker, get_config as get_events_config
+from tasks import jobs
+
+
+# Cachés que viven en la memoria de cada proceso: lo que invalida un worker no llega a los servidores web
+LOCAL_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def local_backend_errors():
+    """
+    Caché y broker de eventos que no se comparten entre procesos. Los trabajos escriben tareas:
+    con ellos el caché de respuestas de los servidores web queda viejo y los streams de eventos no
+    se enteran de los cambios.
+    """
+    errors = []
+    for alias, cache in settings.CACHES.items():
+        if cache["BACKEND"] in LOCAL_CACHES:
+            errors.append(checks.Error(
+                f"El caché '{alias}' ({cache['BACKEND']}) es local al proceso: las invalidaciones de "
+                "los workers no llegan a los servidores web.",
+                hint="CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache (manage.py bootstrap crea "
+                     "la tabla), Redis o Memcached.",
+                id="tasks.E001",
+            ))
+    broker = get_events_config()["BROKER"]
+    if issubclass(import_string(broker), InProcessBroker):
+        errors.append(checks.Error(
+            f"El broker de eventos ({broker}) es local al proceso: los cambios de los workers no llegan "
+            "a /api/async/events/.",
+            hint="EVENTS_BROKER=core.events.PostgresBroker",
+            id="tasks.E002",
+        ))
+    return errors
+
+
+def run_process(threads, burst=False):
+    """
+    Un proceso worker: `threads` hilos tomando trabajos hasta recibir SIGTERM o SIGINT (terminan el
+    trabajo en curso) o, con `burst`, hasta que la cola quede vacía. Retorna cuántos ejecutó.
+    """
+    stop = threading.Event()
+    previous = {signum: signal.signal(signum, lambda *args: stop.set()) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        if threads == 1:
+            return jobs.work(stop, burst)
+        done = []
+
+        def target():
+            try:
+                done.append(jobs.work(stop, burst))
+            finally:
+                connections.close_all()  # Cada hilo tiene sus propias conexiones
+
+        workers = [threading.Thread(target=target, name=f"jobs-worker-{i}") for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(0.5)  # Con timeout: el hilo principal sigue atendiendo las señales
+        return sum(done)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+class Command(BaseCommand):
+    """
+    Comando para ejecutar los trabajos en segundo plano (tasks/jobs.py): `--processes` procesos con
+    `--threads` hilos cada uno toman trabajos de la tabla Job con SELECT ... FOR UPDATE SKIP LOCKED.
+    Los hilos convienen para trabajos que esperan a la base (exportaciones); los procesos, para usar
+    más de un núcleo. SIGTERM o Ctrl+C detienen los workers cuando terminan el trabajo en curso.
+    """
+    help = "Ejecuta los workers de la cola de trabajos en segundo plano"
+
+    def check(self, *args, **kwargs):
+        """Las verificaciones del sistema y además las de caché y broker compartidos (--skip-checks las omite)."""
+        super().check(*args, **kwargs)
+        errors = local_backend_errors()
+        if errors:
+            raise SystemCheckError(
+                "Los workers corren en otros procesos: caché y eventos deben ser compartidos.\n"
+                + "\n".join(f"({error.id}) {error.msg}\n\tHINT: {error.hint}" for error in errors)
+            )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Procesos worker (por defecto 1)")
+        parser.add_argument("--threads", type=int, default=1, help="Hilos por proceso (por defecto 1)")
+        parser.add_argument("--burst", action="store_true", help="Terminar cuando la cola quede vacía")
+
+    def handle(self, *args, **options):
+        processes, threads = options["processes"], options["threads"]
+        if processes < 1 or threads < 1:
+            raise CommandError("--processes y --threads deben ser al menos 1.")
+        pruned = jobs.prune_jobs()
+        if pruned:
+            self.stdout.write(f"{pruned} trabajos terminados antiguos eliminados.")
+        self.stdout.write(f"Workers: {processes} procesos x {threads} hilos.")
+
+        if processes == 1:
+            done = run_process(threads, options["burst"])
+            self.stdout.write(self.style.SUCCESS(f"Workers detenidos ({done} trabajos ejecutados)."))
+            return
+
+        connections.close_all()  # Los procesos hijos no deben compartir las conexiones del padre
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(target=run_process, args=(threads, options["burst"]), name=f"jobs-worker-{i}")
+            for i in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()  # SIGTERM: cada proceso termina su trabajo en curso
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C ya llega a los hijos (mismo grupo de procesos)
+        for child in children:
+            child.join()
+        failed = [child.name for child in children if child.exitcode]
+        if failed:
+            raise CommandError(f"Procesos terminados con error: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS("Workers detenidos."))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-18 02:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    """Inicializa el contador de tareas activas de cada usuario existente."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Task = apps.get_model("tasks", "Task")
+    ActiveTaskCounter = apps.get_model("tasks", "ActiveTaskCounter")
+    totals = dict(
+        Task.objects.exclude(status="done")
+        .values_list("owner_id")
+        .annotate(total=models.Count("id"))
+    )
+    ActiveTaskCounter.objects.bulk_create(
+        (
+            ActiveTaskCounter(user_id=user_id, active_count=totals.get(user_id, 0))
+            for user_id in User.objects.values_list("pk", flat=True).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActiveTaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='active_task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('active_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
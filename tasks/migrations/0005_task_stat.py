@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 03:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_stats(apps, schema_editor):
+    """Llena el resumen con las tareas existentes: filas por usuario y totales globales (owner NULL)."""
+    Task = apps.get_model("tasks", "Task")
+    TaskStat = apps.get_model("tasks", "TaskStat")
+    rows = (
+        Task.objects.order_by()
+        .values_list("owner_id", TruncDate("created_at"), "status", "priority")
+        .annotate(total=models.Count("id"))
+    )
+    totals = {}
+    stats = []
+    for owner_id, day, status, priority, total in rows.iterator():
+        stats.append(TaskStat(owner_id=owner_id, day=day, status=status, priority=priority, count=total))
+        key = (day, status, priority)
+        totals[key] = totals.get(key, 0) + total
+    stats += [
+        TaskStat(owner_id=None, day=day, status=status, priority=priority, count=total)
+        for (day, status, priority), total in totals.items()
+    ]
+    TaskStat.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_comment_task_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('done', 'Done')], max_length=12)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner', 'day', 'status', 'priority'), name='task_stat_unique', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
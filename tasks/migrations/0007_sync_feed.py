@@ -0,0 +1,103 @@
+# Generated by Django 5.2 on 2026-10-18 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Versión de cada fila = transacción que la escribió (pg_current_xact_id, 64 bits y sin vuelta).
+# El feed de cambios (tasks.sync) lee desde el xmin de un snapshot anterior, así no se saltea
+# ninguna transacción que confirme después de una lectura.
+SYNC_TRIGGERS = """
+CREATE FUNCTION tasks_stamp_sync_version() RETURNS trigger AS $$
+BEGIN
+    NEW.sync_version := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tasks_task_sync_version BEFORE INSERT OR UPDATE ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_stamp_sync_version();
+CREATE TRIGGER tasks_comment_sync_version BEFORE INSERT OR UPDATE ON tasks_comment
+    FOR EACH ROW EXECUTE FUNCTION tasks_stamp_sync_version();
+
+CREATE FUNCTION tasks_task_tombstones() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tasks_tombstone (kind, object_id, task_id, sync_version, deleted_at)
+    SELECT 'task', id, id, pg_current_xact_id()::text::bigint, now() FROM deleted;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION tasks_comment_tombstones() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tasks_tombstone (kind, object_id, task_id, sync_version, deleted_at)
+    SELECT 'comment', id, task_id, pg_current_xact_id()::text::bigint, now() FROM deleted;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Por sentencia (con la tabla de filas borradas): un solo INSERT también en borrados masivos
+CREATE TRIGGER tasks_task_tombstones AFTER DELETE ON tasks_task
+    REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION tasks_task_tombstones();
+CREATE TRIGGER tasks_comment_tombstones AFTER DELETE ON tasks_comment
+    REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION tasks_comment_tombstones();
+"""
+
+DROP_SYNC_TRIGGERS = """
+DROP TRIGGER IF EXISTS tasks_comment_tombstones ON tasks_comment;
+DROP TRIGGER IF EXISTS tasks_task_tombstones ON tasks_task;
+DROP TRIGGER IF EXISTS tasks_comment_sync_version ON tasks_comment;
+DROP TRIGGER IF EXISTS tasks_task_sync_version ON tasks_task;
+DROP FUNCTION IF EXISTS tasks_comment_tombstones();
+DROP FUNCTION IF EXISTS tasks_task_tombstones();
+DROP FUNCTION IF EXISTS tasks_stamp_sync_version();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_priority_rank_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('comment', 'Comment')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('task_id', models.BigIntegerField()),
+                ('sync_version', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='sync_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='sync_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['sync_version', 'id'], name='comment_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['sync_version', 'id'], name='task_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['sync_version', 'id'], name='tombstone_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.RunSQL(SYNC_TRIGGERS, DROP_SYNC_TRIGGERS),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-18 04:47
+
+import django.db.models.functions.datetime
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Totales y último comentario de las filas existentes (y de las archivadas, con sus comentarios),
+# antes de crear los índices. Sin comentarios, la actividad es el último cambio de la tarea
+BACKFILL_SQL = """
+UPDATE {tasks} AS task SET comment_count = fresh.total, last_activity_at = fresh.last_activity
+FROM (
+    SELECT t.id, count(c.id) AS total, GREATEST(t.updated_at, max(c.created_at)) AS last_activity
+    FROM {tasks} AS t LEFT JOIN {comments} AS c ON c.task_id = t.id
+    GROUP BY t.id
+) AS fresh
+WHERE task.id = fresh.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_job_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='last_activity_at',
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+        migrations.RunSQL(
+            BACKFILL_SQL.format(tasks="tasks_task", comments="tasks_comment")
+            + BACKFILL_SQL.format(tasks="tasks_archivedtask", comments="tasks_archivedcomment"),
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['comment_count', 'id'], name='archived_comment_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['last_activity_at', 'id'], name='archived_last_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['comment_count', 'id'], name='task_comment_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['last_activity_at', 'id'], name='task_last_activity_idx'),
+        ),
+    ]
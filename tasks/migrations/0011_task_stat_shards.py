@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 05:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Las filas globales se vuelven a armar desde las de cada usuario (suman lo mismo), repartidas por
+# shard = owner_id % 16 (TaskStat.GLOBAL_SHARDS); al revertir se juntan en una sola fila (shard 0).
+REDISTRIBUTE_SQL = """
+DELETE FROM tasks_taskstat WHERE owner_id IS NULL;
+INSERT INTO tasks_taskstat (owner_id, shard, day, status, priority, count)
+SELECT NULL, {shard}, day, status, priority, sum(count)
+FROM tasks_taskstat WHERE owner_id IS NOT NULL
+GROUP BY 2, day, status, priority;
+-- Verifica ya las FK diferidas de estas filas: con eventos pendientes no se puede alterar la tabla
+SET CONSTRAINTS ALL IMMEDIATE;
+SET CONSTRAINTS ALL DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_activity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='taskstat',
+            name='task_stat_unique',
+        ),
+        migrations.AddField(
+            model_name='taskstat',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunSQL(
+            REDISTRIBUTE_SQL.format(shard="owner_id % 16"), REDISTRIBUTE_SQL.format(shard="0"),
+        ),
+        migrations.AddConstraint(
+            model_name='taskstat',
+            constraint=models.UniqueConstraint(fields=('owner', 'shard', 'day', 'status', 'priority'), name='task_stat_unique', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Total histórico de cada fila (usuario y shard global) desde las filas por día; al revertir se borran
+TOTALS_SQL = """
+INSERT INTO tasks_taskstat (owner_id, shard, day, status, priority, count)
+SELECT owner_id, shard, NULL, status, priority, sum(count)
+FROM tasks_taskstat WHERE day IS NOT NULL
+GROUP BY owner_id, shard, status, priority;
+-- Verifica ya las FK diferidas de estas filas: con eventos pendientes no se puede alterar la tabla
+SET CONSTRAINTS ALL IMMEDIATE;
+SET CONSTRAINTS ALL DEFERRED;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_stat_shards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskstat',
+            name='day',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunSQL(TOTALS_SQL, "DELETE FROM tasks_taskstat WHERE day IS NULL;"),
+        migrations.AddIndex(
+            model_name='taskstat',
+            index=models.Index(fields=['owner', 'day'], name='task_stat_owner_day_idx'),
+        ),
+    ]
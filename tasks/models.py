@@ -1,8 +1,24 @@
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Now, TruncDate
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+MAX_ACTIVE_TASKS = 5  # Máximo de tareas activas (no completadas) por usuario
+
+# Configuración de texto de PostgreSQL para la búsqueda: "simple" no aplica stemming ni stopwords,
+# así funciona igual con cualquier idioma y con búsquedas por prefijo
+SEARCH_CONFIG = "simple"
+
 # Create your models here.
 class Task(models.Model):
     """Modelo que representa una tarea del sistema con título, descripción, prioridad, estado y propietario."""
@@ -32,18 +48,118 @@ class Task(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Prioridad como entero (low=1, medium=2, high=3): ?ordering=priority ordena por importancia
+    # (el CharField daría high, low, medium) y con un índice, ver TaskOrderingFilter
+    priority_rank = models.GeneratedField(
+        expression=Case(
+            When(priority=Priority.LOW, then=Value(1)),
+            When(priority=Priority.MEDIUM, then=Value(2)),
+            When(priority=Priority.HIGH, then=Value(3)),
+            default=Value(0),
+        ),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+    )
+    # Documento de búsqueda (título con más peso que la descripción), calculado por PostgreSQL
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # Transacción (xid8 de PostgreSQL) de la última escritura; la asigna un trigger en cada INSERT o
+    # UPDATE, así cubre también QuerySet.update() y COPY. Ver tasks.sync (feed de cambios)
+    sync_version = models.BigIntegerField(default=0, editable=False)
+    # Denormalizados para listar y ordenar sin contar comentarios por fila: los ajustan con UPDATE
+    # atómicos los signals de Comment (ver signals.py) y las escrituras masivas con rebuild_activity().
+    # last_activity_at es el último cambio de la tarea o su comentario más reciente. db_default: las
+    # inserciones con SQL directo que no los envían también los tienen
+    comment_count = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    last_activity_at = models.DateTimeField(auto_now=True, db_default=Now())
+
+    # Columnas que save() no escribe: una instancia leída antes de un comentario nuevo pisaría el total
+    COUNTER_FIELDS = ("comment_count",)
 
     class Meta:
         ordering = ["-created_at"]  # Ordenar por fecha descendente (más recientes primero)
+        # Índices según los filtros (?status, ?priority) y órdenes (?ordering, con desempate por id en
+        # modo cursor) que permite TaskViewSet: cada orden tiene un índice que lo recorre en cualquier
+        # dirección, y los filtros más usados con el orden por defecto tienen uno compuesto
+        # (ver TaskIndexPlanTestCase)
         indexes = [
-            models.Index(fields=["owner", "status"]),  # Índice compuesto para consultas por propietario y estado
-            models.Index(fields=["priority"]),  # Índice para filtros por prioridad
-            models.Index(fields=["title"]),  # Índice para búsquedas por título
+            models.Index(fields=["owner", "status"]),  # Contador de activas y estadísticas por propietario
+            models.Index(fields=["created_at", "id"], name="task_created_idx"),  # Orden por defecto
+            models.Index(fields=["status", "created_at", "id"], name="task_status_created_idx"),
+            models.Index(fields=["priority", "created_at", "id"], name="task_priority_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+            models.Index(fields=["priority_rank", "id"], name="task_priority_rank_idx"),
+            models.Index(fields=["status", "id"], name="task_status_idx"),
+            models.Index(fields=["comment_count", "id"], name="task_comment_count_idx"),  # Más comentadas
+            models.Index(fields=["last_activity_at", "id"], name="task_last_activity_idx"),  # Actividad reciente
+            models.Index(fields=["sync_version", "id"], name="task_sync_idx"),  # Feed de cambios
+            GinIndex(fields=["search_vector"], name="task_search_vector_idx"),  # Búsqueda de texto completo
         ]
 
     def __str__(self):
         return f"{self.title} ({self.priority})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda los valores leídos de la base para detectar cambios al guardar (ver signals.py)."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Al modificar una tarea existente se escriben todas las columnas salvo COUNTER_FIELDS."""
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated
+                and field.attname not in deferred and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def rebuild_activity(cls, id_range=None):
+        """
+        Recalcula comment_count y last_activity_at desde Comment; retorna cuántas filas cambiaron. Sin
+        argumentos repara todas las tareas. Con id_range=(primera, última), tras una carga masiva, solo
+        las tareas del rango que recibieron comentarios: las demás ya se insertaron al día.
+        """
+        table, comments = cls._meta.db_table, Comment._meta.db_table
+        if id_range is None:
+            fresh = f"""
+                SELECT t.id, count(c.id) AS total, max(c.created_at) AS last_comment
+                FROM {table} AS t LEFT JOIN {comments} AS c ON c.task_id = t.id
+                GROUP BY t.id
+            """
+            params = []
+        else:
+            # Agrupa solo los comentarios del rango (índice de task_id), sin lista de ids
+            fresh = f"""
+                SELECT task_id AS id, count(*) AS total, max(created_at) AS last_comment
+                FROM {comments} WHERE task_id BETWEEN %s AND %s
+                GROUP BY task_id
+            """
+            params = list(id_range)
+        with connections[router.db_for_write(cls)].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS task
+                SET comment_count = fresh.total, last_activity_at = GREATEST(task.updated_at, fresh.last_comment)
+                FROM ({fresh}) AS fresh
+                WHERE task.id = fresh.id
+                  AND (task.comment_count, task.last_activity_at)
+                      IS DISTINCT FROM (fresh.total, GREATEST(task.updated_at, fresh.last_comment))
+                """,
+                params,
+            )
+            return cursor.rowcount
+
     @property
     def is_active(self) -> bool:
         """Retorna True si la tarea está completada (DONE), False en caso contrario."""
@@ -55,9 +171,388 @@ class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    sync_version = models.BigIntegerField(default=0, editable=False)  # Igual que Task.sync_version
 
     class Meta:
         ordering = ["created_at"]  # Ordenar por fecha ascendente (más antiguos primero)
+        indexes = [
+            models.Index(fields=["sync_version", "id"], name="comment_sync_idx"),  # Feed de cambios
+            # Listado paginado por keyset de los comentarios de una tarea (y los últimos N del detalle)
+            models.Index(fields=["task", "created_at", "id"], name="comment_task_created_idx"),
+            # Índice de expresión: sirve a los filtros que usan SearchVector("content", config=SEARCH_CONFIG)
+            GinIndex(SearchVector("content", config=SEARCH_CONFIG), name="comment_search_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author_id} on task {self.task_id}"
+
+
+class ArchivedTask(models.Model):
+    """
+    Tarea completada movida fuera de Task por archive_tasks (ver tasks.archive): mismo id y columnas,
+    solo lectura. Así la tabla caliente y sus índices quedan con las tareas en uso; la API lee el
+    archivo con ?archived=true.
+    """
+    id = models.BigIntegerField(primary_key=True)  # El id que tenía en Task
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=10, choices=Task.Priority.choices)
+    status = models.CharField(max_length=12, choices=Task.Status.choices)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_tasks")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    comment_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+    # Mismas columnas generadas que Task: ?ordering=priority y ?search= funcionan igual sobre el archivo
+    priority_rank = models.GeneratedField(
+        expression=Case(
+            When(priority=Task.Priority.LOW, then=Value(1)),
+            When(priority=Task.Priority.MEDIUM, then=Value(2)),
+            When(priority=Task.Priority.HIGH, then=Value(3)),
+            default=Value(0),
+        ),
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+    )
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+        # Solo los órdenes de ?ordering= (el filtro por estado no sirve: todas están completadas)
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="archived_created_idx"),
+            models.Index(fields=["updated_at", "id"], name="archived_updated_idx"),
+            models.Index(fields=["priority_rank", "id"], name="archived_priority_rank_idx"),
+            models.Index(fields=["comment_count", "id"], name="archived_comment_count_idx"),
+            models.Index(fields=["last_activity_at", "id"], name="archived_last_activity_idx"),
+            GinIndex(fields=["search_vector"], name="archived_search_vector_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.priority}, archivada)"
+
+
+class ArchivedComment(models.Model):
+    """Comentario de una tarea archivada (mismo id y columnas que en Comment)."""
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name="comments")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    content = models.TextField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["task", "created_at", "id"], name="archived_comment_task_idx"),
+            GinIndex(SearchVector("content", config=SEARCH_CONFIG), name="archived_comment_search_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author_id} on archived task {self.task_id}"
+
+
+class Tombstone(models.Model):
+    """
+    Marca de una tarea o comentario eliminado, para que el feed de cambios (tasks.sync) informe el
+    borrado. La crea un trigger de la base por cada DELETE (API, admin, cascadas y borrados masivos);
+    se compactan las de más de SYNC_TOMBSTONE_DAYS días (Tombstone.compact).
+    """
+
+    class Kind(models.TextChoices):
+        TASK = "task", "Task"
+        COMMENT = "comment", "Comment"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    task_id = models.BigIntegerField()  # La tarea del comentario (o la misma tarea); sin FK: ya no existe
+    sync_version = models.BigIntegerField()  # Transacción del borrado, como Task.sync_version
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sync_version", "id"], name="tombstone_sync_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),  # Compactación
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} eliminado {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def retention(cls):
+        return timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+
+    @classmethod
+    def compact(cls, now=None):
+        """Elimina las marcas más antiguas que la retención. Retorna cuántas se eliminaron."""
+        cutoff = (now or timezone.now()) - cls.retention()
+        deleted, _ = cls.objects.filter(deleted_at__lt=cutoff).delete()
+        return deleted
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano (exportaciones, operaciones masivas, recálculos) de la cola de tasks.jobs.
+    Los workers (run_workers) toman los pendientes con SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    PENDING = [Status.QUEUED, Status.RUNNING]  # Estados que puede tomar un worker (ver run_after)
+
+    kind = models.CharField(max_length=100)  # Nombre registrado en tasks.jobs.REGISTRY
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="jobs")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # En cola: desde cuándo se puede tomar (reintentos con espera). En ejecución: fin del plazo del
+    # worker; si vence sin terminar (el worker murió) otro worker lo vuelve a tomar
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True)  # host:pid:hilo del último worker
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Índice parcial de la consulta que toma trabajos: solo los pendientes (pocos)
+            models.Index(
+                fields=["run_after", "id"], name="job_pending_idx", condition=models.Q(status__in=["queued", "running"])
+            ),
+            models.Index(fields=["user", "-created_at", "-id"], name="job_user_idx"),  # /api/jobs/
+            models.Index(fields=["finished_at"], name="job_finished_idx"),  # Limpieza (prune_jobs)
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class ActiveTaskCounter(models.Model):
+    """
+    Contador denormalizado de tareas activas (no completadas) por usuario.
+    Se mantiene con signals al crear, cambiar de estado o eliminar tareas; el límite
+    MAX_ACTIVE_TASKS se verifica leyendo y bloqueando (SELECT ... FOR UPDATE) esta única fila.
+    """
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="active_task_counter"
+    )
+    active_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.active_count} activas"
+
+    @staticmethod
+    def count_active(user_ids):
+        """Cuenta las tareas activas reales (desde Task) de los usuarios indicados."""
+        rows = (
+            Task.objects.filter(owner_id__in=user_ids)
+            .exclude(status=Task.Status.DONE)
+            .values("owner_id")
+            .annotate(total=Count("id"))
+        )
+        counts = dict.fromkeys(user_ids, 0)
+        counts.update({row["owner_id"]: row["total"] for row in rows})
+        return counts
+
+    @classmethod
+    def lock_for(cls, user_id):
+        """
+        Retorna la fila del usuario bloqueada hasta el final de la transacción actual.
+        Si no existe se crea a partir de las tareas reales; dos escritores concurrentes del
+        mismo usuario quedan serializados en este bloqueo.
+        """
+        counter = cls.objects.select_for_update().filter(user_id=user_id).first()
+        if counter is None:
+            counts = cls.count_active([user_id])
+            # ignore_conflicts: si otra transacción la creó primero, se respeta su valor
+            cls.objects.bulk_create(
+                [cls(user_id=user_id, active_count=counts[user_id])], ignore_conflicts=True
+            )
+            counter = cls.objects.select_for_update().get(user_id=user_id)
+        return counter
+
+    @classmethod
+    def adjust(cls, user_id, delta):
+        """Suma `delta` al contador en la base (UPDATE atómico); sin fila no hace nada."""
+        if delta:
+            cls.objects.filter(user_id=user_id).update(active_count=F("active_count") + delta)
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recalcula los contadores desde Task (todos los usuarios con tareas si user_ids es None)."""
+        if user_ids is None:
+            user_ids = list(Task.objects.values_list("owner_id", flat=True).distinct())
+        counts = cls.count_active(list(user_ids))
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, active_count=total) for user_id, total in counts.items()],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["active_count"],
+        )
+        return len(counts)
+
+
+class TaskStat(models.Model):
+    """
+    Resumen de tareas por propietario, día de creación, estado y prioridad; las filas con owner NULL
+    son el total de todos los usuarios. Se mantiene con deltas (signals y escrituras masivas), así las
+    estadísticas leen a lo sumo unas pocas filas por día y combinación, sin importar cuántas tareas haya.
+
+    El total global de cada combinación se reparte en GLOBAL_SHARDS filas (shard = owner_id módulo
+    GLOBAL_SHARDS) que la lectura suma: los escritores de distintos usuarios no se bloquean todos en la
+    misma fila global. Las filas de un usuario usan siempre el shard 0.
+
+    Las filas con day NULL son el total histórico de cada combinación (también por shard), y se
+    actualizan en el mismo upsert que las del día: los totales no recorren todos los días.
+    """
+    GLOBAL_SHARDS = 16
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="task_stats")
+    shard = models.PositiveSmallIntegerField(default=0)
+    day = models.DateField(null=True)  # NULL: total histórico
+    status = models.CharField(max_length=12, choices=Task.Status.choices)
+    priority = models.CharField(max_length=10, choices=Task.Priority.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # NULLS NOT DISTINCT (PostgreSQL 15+): una sola fila global por shard, día, estado y prioridad
+            models.UniqueConstraint(
+                fields=["owner", "shard", "day", "status", "priority"], name="task_stat_unique", nulls_distinct=False
+            ),
+        ]
+        indexes = [
+            # Lectura de las estadísticas: totales (day NULL) y días desde `since`, sin pasar por todos los shards
+            models.Index(fields=["owner", "day"], name="task_stat_owner_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id or 'todos'} {self.day or 'total'} {self.status}/{self.priority}: {self.count}"
+
+    @staticmethod
+    def key(owner_id, created_at, status, priority):
+        """Fila del resumen a la que pertenece una tarea (día en la zona horaria del proyecto)."""
+        return owner_id, timezone.localdate(created_at), status, priority
+
+    @classmethod
+    def key_for(cls, task):
+        return cls.key(task.owner_id, task.created_at, task.status, task.priority)
+
+    @classmethod
+    def shard_for(cls, owner_id):
+        """Shard de las filas globales al que suman las tareas del usuario."""
+        return owner_id % cls.GLOBAL_SHARDS
+
+    @classmethod
+    def summary_rows(cls, deltas, owner_rows=True):
+        """
+        Deltas {(owner_id, día, estado, prioridad): n} agrupados por fila (owner_id, shard, día, estado,
+        prioridad): la global de su shard y, si owner_rows, la del usuario; cada una con su total (día None).
+        """
+        rows = Counter()
+        for (owner_id, day, status, priority), delta in deltas.items():
+            for row_day in (day, None):
+                rows[(None, cls.shard_for(owner_id), row_day, status, priority)] += delta
+                if owner_rows:
+                    rows[(owner_id, 0, row_day, status, priority)] += delta
+        return rows
+
+    @classmethod
+    def apply_deltas(cls, deltas, owner_rows=True):
+        """
+        Suma los deltas {(owner_id, día, estado, prioridad): n} a las filas del usuario (si owner_rows)
+        y a las globales de su shard, del día y del total histórico. Los incrementos se hacen con un único INSERT ... ON CONFLICT;
+        los decrementos solo actualizan filas existentes (en un borrado en cascada del usuario
+        sus filas ya pueden no estar).
+        """
+        totals = cls.summary_rows(deltas, owner_rows)
+        # Orden fijo de las filas (NULL primero): evita deadlocks entre escritores concurrentes
+        ordered = sorted(totals.items(), key=lambda item: [(value is not None, value or 0) for value in item[0]])
+        for (owner_id, shard, day, status, priority), delta in ordered:
+            if delta < 0:
+                cls.objects.filter(owner_id=owner_id, shard=shard, day=day, status=status, priority=priority).update(
+                    count=F("count") + delta
+                )
+        increments = [(*key, delta) for key, delta in ordered if delta > 0]
+        if increments:
+            table = cls._meta.db_table
+            values = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(increments))
+            with connections[router.db_for_write(cls)].cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (owner_id, shard, day, status, priority, count) VALUES {values} "
+                    f"ON CONFLICT (owner_id, shard, day, status, priority) "
+                    f"DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                    [value for row in increments for value in row],
+                )
+
+    @staticmethod
+    def count_tasks(queryset):
+        """Totales reales {(owner_id, día, estado, prioridad): n} de las tareas del queryset."""
+        rows = (
+            queryset.order_by()
+            .values_list("owner_id", TruncDate("created_at"), "status", "priority")
+            .annotate(total=Count("id"))
+        )
+        return {tuple(row[:4]): row[4] for row in rows}
+
+    @classmethod
+    def count_all(cls, owner_ids=None):
+        """Totales reales de Task y ArchivedTask (las archivadas siguen contando en el resumen)."""
+        counts = Counter()
+        for model in (Task, ArchivedTask):
+            queryset = model.objects.all() if owner_ids is None else model.objects.filter(owner_id__in=owner_ids)
+            counts.update(cls.count_tasks(queryset))
+        return counts
+
+    @classmethod
+    @transaction.atomic
+    def rebuild_owners(cls, owner_ids):
+        """
+        Recalcula las filas de los usuarios indicados desde Task y ArchivedTask y corrige las globales
+        con la diferencia. Cuesta lo que sus tareas, no la tabla completa.
+        """
+        owner_ids = list(owner_ids)
+        rows = cls.objects.filter(owner_id__in=owner_ids).select_for_update()
+        # Las diferencias se calculan por día; apply_deltas corrige también los totales globales
+        old = {(row.owner_id, row.day, row.status, row.priority): row.count for row in rows if row.day is not None}
+        new = cls.count_all(owner_ids)
+        cls.objects.filter(owner_id__in=owner_ids).delete()
+        cls.objects.bulk_create(
+            (
+                cls(owner_id=key[0], day=key[2], status=key[3], priority=key[4], count=total)
+                for key, total in cls.summary_rows(new).items() if key[0] is not None
+            ),
+            batch_size=1000,
+        )
+        difference = {key: new.get(key, 0) - old.get(key, 0) for key in old.keys() | new.keys()}
+        cls.apply_deltas(difference, owner_rows=False)
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls):
+        """Recalcula todo el resumen desde Task y ArchivedTask (una lectura agrupada por tabla). Retorna las filas creadas."""
+        totals = cls.summary_rows(cls.count_all())
+        cls.objects.all().delete()
+        rows = cls.objects.bulk_create(
+            (
+                cls(owner_id=key[0], shard=key[1], day=key[2], status=key[3], priority=key[4], count=total)
+                for key, total in totals.items()
+            ),
+            batch_size=1000,
+        )
+        return len(rows)
@@ -0,0 +1,331 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset):
+    """Retorna un conteo aproximado usando las estadísticas del planificador de PostgreSQL (sin COUNT(*))."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+
+    if not queryset.query.where:
+        # Sin filtros: reltuples de pg_class es suficiente (se actualiza con ANALYZE/autovacuum)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+        return queryset.count()  # Tabla nunca analizada: no hay estadísticas todavía
+
+    # Con filtros: filas estimadas por el plan de la consulta
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class TaskPaginator(Paginator):
+    """Paginator de Django con una variante async de page() (Django 5.2 no incluye una)."""
+
+    async def acount(self):
+        if "count" not in self.__dict__:
+            self.__dict__["count"] = await self.object_list.acount()
+        return self.count
+
+    async def apage(self, number):
+        await self.acount()
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        return self._get_page([obj async for obj in self.object_list[bottom:top]], number, self)
+
+
+class EstimatedPage(Page):
+    """Página cuyo "siguiente" se decide por la fila extra leída, no por el total estimado."""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class EstimatedCountPaginator(TaskPaginator):
+    """
+    Paginator de Django cuyo total se obtiene de estimate_count en lugar de COUNT(*).
+    Como el total es aproximado, las páginas no se recortan ni se validan contra él.
+    """
+
+    @cached_property
+    def count(self):
+        return estimate_count(self.object_list)
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+    async def acount(self):
+        if "count" not in self.__dict__:
+            self.__dict__["count"] = await sync_to_async(estimate_count)(self.object_list)
+        return self.count
+
+    async def apage(self, number):
+        number = self.validate_number(number)
+        await self.acount()  # get_paginated_response lo lee después, fuera del contexto async
+        bottom = (number - 1) * self.per_page
+        rows = [obj async for obj in self.object_list[bottom:bottom + self.per_page + 1]]
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return EstimatedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class TaskPagination(PageNumberPagination):
+    """
+    Paginación de tareas con dos modos:
+    - Por número de página (por defecto, compatible con el resto de la API).
+    - Keyset/cursor (?paginate=cursor): sin COUNT(*) ni OFFSET, estable para cualquier ordering
+      permitido y con desempate por id.
+    El total es opcional: ?count=estimate usa las estadísticas del planificador y
+    ?count=exact fuerza el COUNT(*) en modo cursor.
+    """
+    mode_query_param = "paginate"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Cursor inválido."
+    django_paginator_class = TaskPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.select_mode(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Igual que paginate_queryset pero con el ORM async (vistas de tasks.async_views)."""
+        self.select_mode(request)
+        if self.keyset:
+            return await self.apaginate_keyset(queryset, request)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = await paginator.apage(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        return list(self.page)
+
+    def select_mode(self, request):
+        self.request = request
+        self.keyset = (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset and request.query_params.get(self.count_query_param) == "estimate":
+            self.django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        payload = {}
+        if self.total is not None:
+            payload["count"] = self.total
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    # --- Modo keyset ---
+
+    def paginate_keyset(self, queryset, request):
+        """Aplica la condición de keyset sobre el ordering efectivo y retorna la página actual."""
+        queryset = self.prepare_keyset(queryset, request)
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == "estimate":
+            self.total = estimate_count(queryset)
+        elif count_mode == "exact":
+            self.total = queryset.count()
+        return self.finish_keyset(list(self.keyset_page(queryset, request)))
+
+    async def apaginate_keyset(self, queryset, request):
+        queryset = self.prepare_keyset(queryset, request)
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == "estimate":
+            self.total = await sync_to_async(estimate_count)(queryset)
+        elif count_mode == "exact":
+            self.total = await queryset.acount()
+        return self.finish_keyset([obj async for obj in self.keyset_page(queryset, request)])
+
+    def prepare_keyset(self, queryset, request):
+        """Fija el tamaño de página y el ordering efectivo; retorna el queryset ordenado."""
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.display_page_controls = False
+        self.total = None
+        self.ordering = self.get_ordering(queryset)
+        return queryset.order_by(*self.ordering)
+
+    def keyset_page(self, queryset, request):
+        """Queryset de la página pedida por el cursor, con una fila extra para saber si hay más."""
+        self.position, self.reverse = self.decode_cursor(request)
+        if self.reverse:
+            queryset = queryset.order_by(*[self.invert(field) for field in self.ordering])
+        if self.position is not None:
+            queryset = queryset.filter(self.build_keyset_filter(queryset.model, self.position, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def finish_keyset(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        # En modo inverso "has_more" indica que hay páginas anteriores
+        self.has_next = bool(results) and (self.reverse or has_more)
+        self.has_previous = bool(results) and (has_more if self.reverse else self.position is not None)
+        self.first_item = results[0] if results else None
+        self.last_item = results[-1] if results else None
+        return results
+
+    def get_ordering(self, queryset):
+        """Ordering aplicado por OrderingFilter (o el de Meta) con desempate final por id."""
+        ordering = [
+            field.replace("pk", "id") if field.lstrip("-") == "pk" else field
+            for field in (queryset.query.order_by or queryset.model._meta.ordering)
+        ]
+        if "id" not in [field.lstrip("-") for field in ordering]:
+            # Mismo sentido que el primer campo para poder recorrer un índice (campo, id) en una sola dirección
+            ordering.append("-id" if ordering and ordering[0].startswith("-") else "id")
+        return ordering
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    def build_keyset_filter(self, model, position, reverse):
+        """
+        Construye (a > va) OR (a = va AND b > vb) OR ... respetando la dirección de cada campo,
+        equivalente a una comparación de tuplas pero válido con direcciones mixtas.
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            try:
+                value = self.to_python(model, name, value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)  # Cursor manipulado: valor ajeno al tipo del campo
+            condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def to_python(model, name, value):
+        """Convierte un valor del cursor al tipo del campo; las anotaciones (p. ej. search_rank) deben ser números."""
+        try:
+            return model._meta.get_field(name).to_python(value)
+        except FieldDoesNotExist:
+            if isinstance(value, str):
+                raise ValueError(f"{name} debe ser numérico")
+            return value
+
+    def get_position(self, instance):
+        """Valores de las columnas de ordenamiento de una fila, serializables en JSON."""
+        position = []
+        for field in self.ordering:
+            name = field.lstrip("-")
+            try:
+                name = instance._meta.get_field(name).attname
+            except FieldDoesNotExist:
+                pass  # Anotación del queryset
+            value = getattr(instance, name)
+            position.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return position
+
+    def decode_cursor(self, request):
+        """Retorna (posición, reverse) del cursor recibido; (None, False) para la primera página."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse, ordering = data["p"], bool(data["r"]), data["o"]
+            # Una posición por campo del ordering y solo valores escalares (None no se puede comparar)
+            if not isinstance(position, list) or not all(isinstance(value, (str, int, float)) for value in position):
+                raise TypeError(position)
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or len(position) != len(self.ordering):
+            # El cursor fue generado con otro ordering: la posición no es comparable
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        data = {"p": self.get_position(instance), "r": int(reverse), "o": self.ordering}
+        encoded = urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode("ascii")
+        url = replace_query_param(self.base_url, self.mode_query_param, "cursor")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_item, reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_item, reverse=True)
+
+
+class CommentPagination(TaskPagination):
+    """
+    Comentarios de una tarea: siempre en modo keyset sobre (created_at, id), así recorrer miles de
+    comentarios cuesta lo mismo en cualquier página. ?count=exact|estimate agrega el total.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = True
+        return self.paginate_keyset(queryset, request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = True
+        return await self.apaginate_keyset(queryset, request)
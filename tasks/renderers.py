@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Tipos que orjson/msgpack no serializan solos (textos lazy, Decimal, fechas sin zona...): igual que DRF."""
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer con orjson: produce los mismos bytes que el de DRF (compacto, UTF-8, con U+2028/U+2029
+    escapados y fechas en el formato de DRF) para lo que devuelven los serializers: textos, enteros,
+    booleanos, null, listas y objetos, incluidos TextChoices. Los floats con exponente se escriben
+    más cortos (1e-5 en vez de 1e-05). Con indentación pedida (Accept: ...; indent=4) usa el de DRF.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context)
+            or not api_settings.COMPACT_JSON or not api_settings.UNICODE_JSON
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        rendered = orjson.dumps(data, default=encode_default, option=self.options)
+        if b"\xe2\x80\xa8" in rendered or b"\xe2\x80\xa9" in rendered:
+            # Igual que DRF: separadores de línea escapados (JSON válido dentro de <script>)
+            rendered = rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return rendered
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack (Accept: application/msgpack o ?format=msgpack): binario y más compacto que JSON.
+    Las fechas con zona horaria se escriben como el tipo timestamp de MessagePack.
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default, datetime=True)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    JSON delimitado por saltos de línea (un objeto por línea). La exportación genera el cuerpo
+    en streaming por su cuenta; este renderer se usa para la negociación (?format=ndjson o
+    Accept: application/x-ndjson) y para las respuestas de error.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return (json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + "\n").encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV para la exportación (?format=csv o Accept: text/csv); los errores se devuelven como una fila."""
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
@@ -1,8 +1,15 @@
+from django.urls import reverse
 from rest_framework import serializers
-from django.db.models import Q
-from .models import Task, Comment
 
-class CommentSerializer(serializers.ModelSerializer):
+from core.middleware import TimedRepresentationMixin
+
+from .models import MAX_ACTIVE_TASKS, ActiveTaskCounter, Job, Task, Comment
+
+
+EMBEDDED_COMMENTS = 5  # Comentarios incluidos en el detalle de una tarea
+
+
+class CommentSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializa comentarios mostrando el username del autor en lugar del ID."""
     author = serializers.ReadOnlyField(source="author.username")
 
@@ -11,45 +18,108 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ["id", "author", "content", "created_at"]
 
 
-class TaskListSerializer(serializers.ModelSerializer):
-    """Serializador ligero para listados que solo incluye campos esenciales (sin descripción ni comentarios)."""
+class SparseFieldsetMixin:
+    """
+    Campos a pedido: `fields` limita los campos serializados a esa lista; sin él se serializan los de
+    Meta.fields salvo Meta.expandable_fields. TaskViewSet lo arma desde ?fields= y ?expand=.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.default_fields() if fields is None else fields
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def default_fields(cls):
+        expandable = getattr(cls.Meta, "expandable_fields", [])
+        return [name for name in cls.Meta.fields if name not in expandable]
+
+    @classmethod
+    def select_fields(cls, fields=None, expand=None):
+        """Valida los campos pedidos (?fields=) y agregados (?expand=); retorna los campos en el orden de Meta.fields."""
+        expandable = getattr(cls.Meta, "expandable_fields", [])
+        errors = {}
+        unknown = sorted(set(fields or []) - set(cls.Meta.fields))
+        if unknown:
+            errors["fields"] = f"Campos desconocidos: {', '.join(unknown)}. Opciones: {', '.join(cls.Meta.fields)}."
+        unknown = sorted(set(expand or []) - set(expandable))
+        if unknown:
+            options = ", ".join(expandable) or "ninguna"
+            errors["expand"] = f"No se pueden expandir: {', '.join(unknown)}. Opciones: {options}."
+        if errors:
+            raise serializers.ValidationError(errors)
+        selected = set(fields or cls.default_fields()) | set(expand or [])
+        return [name for name in cls.Meta.fields if name in selected]
+
+
+class EmbeddedCommentsMixin(serializers.Serializer):
+    """
+    Últimos EMBEDDED_COMMENTS comentarios (más recientes primero); el total es Task.comment_count y
+    el resto se pide paginado a /comments/.
+    """
+    comments = serializers.SerializerMethodField()
+
+    def get_comments(self, obj):
+        # latest_comments viene del Prefetch de TaskViewSet.get_queryset; sin él se consulta aparte
+        comments = getattr(obj, "latest_comments", None)
+        if comments is None:
+            comments = obj.comments.select_related("author").order_by("-created_at", "-id")[:EMBEDDED_COMMENTS]
+        return CommentSerializer(comments, many=True, context=self.context).data
+
+
+class TaskListSerializer(TimedRepresentationMixin, SparseFieldsetMixin, EmbeddedCommentsMixin, serializers.ModelSerializer):
+    """
+    Serializador ligero para listados: sin descripción ni comentarios salvo que se pidan con ?expand=
+    (comment_count y last_activity_at son columnas de la tarea: no cuestan una consulta por fila).
+    """
     owner = serializers.ReadOnlyField(source="owner.username")
 
     class Meta:
         model = Task
-        fields = ["id", "title", "priority", "status", "owner", "created_at"]
+        fields = [
+            "id", "title", "description", "priority", "status",
+            "owner", "created_at", "updated_at", "comment_count", "last_activity_at", "comments"
+        ]
+        expandable_fields = ["description", "updated_at", "comments"]
 
 
-class TaskDetailSerializer(serializers.ModelSerializer):
-    """Serializador completo que incluye todos los campos de la tarea junto con sus comentarios."""
+class TaskDetailSerializer(TimedRepresentationMixin, SparseFieldsetMixin, EmbeddedCommentsMixin, serializers.ModelSerializer):
+    """Serializador completo de la tarea, con sus últimos comentarios embebidos."""
     owner = serializers.ReadOnlyField(source="owner.username")
-    comments = CommentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Task
         fields = [
             "id", "title", "description", "priority", "status",
-            "owner", "created_at", "updated_at", "comments"
+            "owner", "created_at", "updated_at", "comment_count", "last_activity_at", "comments"
         ]
 
     # Validación de negocio: máx. 5 activas por usuario
     def validate(self, attrs):
-        """Valida que un usuario no tenga más de 5 tareas activas (no completadas) simultáneamente."""
+        """
+        Valida que un usuario no tenga más de 5 tareas activas (no completadas) simultáneamente.
+        Lee y bloquea el contador del usuario (ActiveTaskCounter): la vista corre en una transacción,
+        así que escrituras concurrentes del mismo usuario esperan aquí hasta el commit de la anterior.
+        """
         request = self.context.get("request")
         user = request.user if request else None
         if not user or not user.is_authenticated:
             return attrs
 
-        # Si es create, el objeto aún no existe; si es update, excluir self.instance
-        qs = Task.objects.filter(owner=user).exclude(status=Task.Status.DONE)  # Tareas activas del usuario
-        if self.instance:
-            qs = qs.exclude(pk=self.instance.pk)  # Excluir la tarea actual si se está actualizando
-
         # Si la nueva data mantiene/crea una tarea activa:
         new_status = attrs.get("status", getattr(self.instance, "status", Task.Status.PENDING))
-        if new_status != Task.Status.DONE and qs.count() >= 5:
+        if new_status == Task.Status.DONE:
+            return attrs
+
+        active = ActiveTaskCounter.lock_for(user.id).active_count
+        # Si es update y la tarea ya cuenta como activa, excluirla del total
+        if self.instance and self.instance.owner_id == user.id and self.instance.status != Task.Status.DONE:
+            active -= 1
+        if active >= MAX_ACTIVE_TASKS:
             raise serializers.ValidationError(
-                {"detail": "Máximo 5 tareas activas por usuario."}
+                {"detail": f"Máximo {MAX_ACTIVE_TASKS} tareas activas por usuario."}
             )
         return attrs
 
@@ -57,4 +127,46 @@ class TaskDetailSerializer(serializers.ModelSerializer):
         """Asigna automáticamente el usuario autenticado como propietario al crear una nueva tarea."""
         request = self.context.get("request")
         validated_data["owner"] = request.user
-        return super().create(validated_data)
\ No newline at end of file
+        task = super().create(validated_data)
+        task.latest_comments = []  # Recién creada: sin consultar comentarios
+        return task
+
+
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    """Valida una tarea de un lote; el límite de activas se verifica para el lote completo en la vista."""
+
+    class Meta:
+        model = Task
+        fields = ["title", "description", "priority", "status"]
+
+
+class TaskBulkIdsSerializer(serializers.Serializer):
+    """Lista de ids de tareas para operaciones masivas (PATCH/DELETE /api/tasks/bulk/)."""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Estado de un trabajo en segundo plano; `download` enlaza el archivo generado, si lo hay."""
+    url = serializers.SerializerMethodField()
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "id", "url", "kind", "status", "attempts", "max_attempts", "created_at", "started_at",
+            "finished_at", "result", "error", "download",
+        ]
+
+    def absolute_url(self, name, obj):
+        # Sin el ?format= de la request actual (rest_framework.reverse lo conservaría: ?format=csv al encolar una exportación)
+        url = reverse(name, args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_url(self, obj):
+        return self.absolute_url("job-detail", obj)
+
+    def get_download(self, obj):
+        if obj.status != Job.Status.SUCCEEDED or not (obj.result or {}).get("file"):
+            return None
+        return self.absolute_url("job-download", obj)
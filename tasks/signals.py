@@ -0,0 +1,189 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from core.events import get_broker
+
+from . import cache
+from .authentication import invalidate_user
+from .models import ActiveTaskCounter, ArchivedTask, Comment, Task, TaskStat, User
+
+
+# Escrituras masivas que no pasan por save()/delete() (bulk_create(), QuerySet.update(), borrados
+# directos): quien las hace envía esta señal con action ("create", "update", "delete" o "archive", ver
+# tasks.archive), task_ids y owner_ids afectados para mantener los datos derivados. Con `stats`
+# (deltas de TaskStat, ver TaskStat.apply_deltas) el resumen se actualiza sin releer las tareas.
+tasks_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Un usuario modificado (desactivado, nueva contraseña) o eliminado deja de autenticarse desde el caché."""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def create_active_counter(sender, instance, created, **kwargs):
+    """Cada usuario nuevo nace con su contador en 0 (lock_for no necesita crearlo después)."""
+    if created and not kwargs.get("raw"):
+        ActiveTaskCounter.objects.bulk_create([ActiveTaskCounter(user=instance)], ignore_conflicts=True)
+
+
+# Campos de la versión guardada que usan los datos derivados (contador de activas y TaskStat)
+TRACKED_FIELDS = ("owner_id", "status", "priority", "created_at")
+
+
+def get_saved_values(instance):
+    """Retorna los TRACKED_FIELDS de la versión guardada de la tarea, o None si es nueva."""
+    if instance._state.adding:
+        return None
+    loaded = getattr(instance, "_loaded_values", {})
+    if all(field in loaded for field in TRACKED_FIELDS):
+        return {field: loaded[field] for field in TRACKED_FIELDS}
+    # Instancia construida a mano o con campos diferidos: se consulta la fila actual
+    return Task.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+def get_active_state(values):
+    """(owner_id, es_activa) de unos valores guardados, o None."""
+    if values is None:
+        return None
+    return values["owner_id"], values["status"] != Task.Status.DONE
+
+
+@receiver(pre_save, sender=Task)
+def remember_saved_values(sender, instance, **kwargs):
+    """Recuerda la versión previa de la tarea para calcular la variación de los datos derivados."""
+    instance._previous_values = get_saved_values(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_active_counter_on_save(sender, instance, **kwargs):
+    """Ajusta ActiveTaskCounter al crear una tarea, cambiar su estado o su propietario."""
+    previous = get_active_state(instance._previous_values)
+    current = (instance.owner_id, instance.status != Task.Status.DONE)
+    if previous != current:
+        if previous and previous[1]:
+            ActiveTaskCounter.adjust(previous[0], -1)
+        if current[1]:
+            ActiveTaskCounter.adjust(current[0], +1)
+
+
+@receiver(post_save, sender=Task)
+def update_task_stats_on_save(sender, instance, **kwargs):
+    """Mueve la tarea de fila en TaskStat al crearla o cambiar su estado, prioridad o propietario."""
+    previous = instance._previous_values
+    current = TaskStat.key_for(instance)
+    deltas = Counter({current: 1})
+    if previous is not None:
+        deltas[TaskStat.key(**previous)] -= 1
+    if any(deltas.values()):
+        TaskStat.apply_deltas(deltas)
+
+
+@receiver(post_save, sender=Task)
+def sync_saved_values(sender, instance, **kwargs):
+    """La instancia queda sincronizada con la base para el próximo save()."""
+    instance._loaded_values = {
+        **getattr(instance, "_loaded_values", {}), **{field: getattr(instance, field) for field in TRACKED_FIELDS},
+    }
+
+
+@receiver(post_delete, sender=Task)
+def update_active_counter_on_delete(sender, instance, **kwargs):
+    """Descuenta la tarea eliminada (también en borrados en cascada y queryset.delete())."""
+    if instance.status != Task.Status.DONE:
+        ActiveTaskCounter.adjust(instance.owner_id, -1)
+    TaskStat.apply_deltas({TaskStat.key_for(instance): -1})
+
+
+@receiver(post_delete, sender=ArchivedTask)
+def update_task_stats_on_archived_delete(sender, instance, **kwargs):
+    """Las tareas archivadas siguen en TaskStat: se descuentan al eliminarlas (cascada del usuario)."""
+    TaskStat.apply_deltas({TaskStat.key_for(instance): -1})
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    """Invalida el detalle de la tarea y los listados en caché."""
+    cache.invalidate_tasks([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_create(sender, instance, created, **kwargs):
+    """Suma el comentario nuevo a Task.comment_count y lo registra como actividad (UPDATE atómico)."""
+    if created and not kwargs.get("raw"):
+        Task.objects.filter(pk=instance.task_id).update(
+            comment_count=F("comment_count") + 1, last_activity_at=instance.created_at
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Descuenta el comentario eliminado y recalcula last_activity_at con los que quedan (en el mismo
+    UPDATE), salvo en la cascada del borrado de su tarea.
+    """
+    if isinstance(origin, Task) or getattr(origin, "model", None) is Task:
+        return
+    newest = Comment.objects.filter(task_id=OuterRef("pk")).values("task_id").annotate(newest=Max("created_at"))
+    Task.objects.filter(pk=instance.task_id).update(
+        comment_count=F("comment_count") - 1,
+        # GREATEST de PostgreSQL ignora NULL: sin comentarios queda el último cambio de la tarea
+        last_activity_at=Greatest("updated_at", Subquery(newest.values("newest"))),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_cache(sender, instance, **kwargs):
+    """Invalida el detalle de la tarea comentada (embebe sus comentarios) y los listados (comment_count)."""
+    cache.invalidate_tasks([instance.task_id])
+
+
+@receiver(tasks_bulk_changed)
+def sync_after_bulk_change(sender, action=None, task_ids=(), owner_ids=(), stats=None, **kwargs):
+    """Recalcula los contadores de los propietarios afectados, actualiza TaskStat e invalida el caché."""
+    if owner_ids:
+        ActiveTaskCounter.rebuild(owner_ids)
+    if stats is not None:
+        TaskStat.apply_deltas(stats)
+    elif owner_ids:
+        TaskStat.rebuild_owners(owner_ids)
+    cache.invalidate_tasks(task_ids)
+
+
+# --- Eventos en tiempo real (/api/async/events/) ---
+
+def publish_on_commit(events):
+    """Publica los eventos en el broker (core.events) cuando la transacción confirma; nunca antes."""
+    transaction.on_commit(lambda: get_broker().publish(events), robust=True)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def publish_change_event(sender, instance, created=False, **kwargs):
+    """Evento de alta, modificación o baja de una tarea o comentario (API, admin y cascadas)."""
+    if kwargs.get("raw"):
+        return
+    if kwargs["signal"] is post_delete:
+        op = "delete"
+    else:
+        op = "create" if created else "update"
+    kind = "task" if sender is Task else "comment"
+    task_id = instance.pk if sender is Task else instance.task_id
+    publish_on_commit([{"type": kind, "op": op, "id": instance.pk, "task": task_id}])
+
+
+@receiver(tasks_bulk_changed)
+def publish_bulk_events(sender, action=None, task_ids=(), **kwargs):
+    """Un evento por tarea de la escritura masiva, publicados juntos."""
+    publish_on_commit([{"type": "task", "op": action, "id": pk, "task": pk} for pk in task_ids])
@@ -0,0 +1,87 @@
+"""Estadísticas de tareas leídas del resumen TaskStat (filas por día y combinación y totales históricos, no por tarea)."""
+from datetime import timedelta
+
+from django.db.models import DateField, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Task, TaskStat
+
+
+BUCKETS = ("day", "week", "month")
+DEFAULT_BUCKET = "month"
+DEFAULT_DAYS = 365
+MAX_DAYS = 3660
+
+
+def parse_params(params):
+    """Retorna (bucket, days) validados de los query params."""
+    bucket = params.get("bucket", DEFAULT_BUCKET)
+    if bucket not in BUCKETS:
+        raise ValidationError({"bucket": f"Opciones válidas: {', '.join(BUCKETS)}."})
+    try:
+        days = int(params.get("days", DEFAULT_DAYS))
+    except ValueError:
+        raise ValidationError({"days": "Debe ser un número entero."})
+    if not 1 <= days <= MAX_DAYS:
+        raise ValidationError({"days": f"Debe estar entre 1 y {MAX_DAYS}."})
+    return bucket, days
+
+
+def period_start(day, bucket):
+    """Inicio del período que contiene `day` (igual que Trunc en la base)."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def empty_counts():
+    return {
+        "total": 0,
+        "status": dict.fromkeys(Task.Status.values, 0),
+        "priority": dict.fromkeys(Task.Priority.values, 0),
+    }
+
+
+def add(counts, status, priority, total):
+    counts["total"] += total
+    counts["status"][status] += total
+    counts["priority"][priority] += total
+
+
+def task_stats(user, params):
+    """
+    Totales históricos y por período de creación del usuario y de todos los usuarios, con una sola
+    consulta agrupada sobre TaskStat (suma los shards de las filas globales). Los totales salen de las
+    filas de total histórico (day NULL); de las filas por día solo se leen las de los períodos pedidos,
+    que incluyen el que contiene el día de hace `days` días.
+    """
+    bucket, days = parse_params(params)
+    since = period_start(timezone.localdate() - timedelta(days=days - 1), bucket)
+    # Cada rama usa el índice (owner, day)
+    rows = (
+        TaskStat.objects.filter(
+            Q(owner=user, day__isnull=True) | Q(owner=user, day__gte=since)
+            | Q(owner__isnull=True, day__isnull=True) | Q(owner__isnull=True, day__gte=since)
+        )
+        .exclude(count=0)
+        .values_list("owner_id", Trunc("day", bucket, output_field=DateField()), "status", "priority")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+    scopes = {"user": empty_counts(), "global": empty_counts()}
+    periods = {"user": {}, "global": {}}
+    for owner_id, period, status, priority, total in rows:
+        scope = "global" if owner_id is None else "user"
+        if period is None:
+            add(scopes[scope], status, priority, total)
+        else:
+            add(periods[scope].setdefault(period, empty_counts()), status, priority, total)
+    for scope, counts in scopes.items():
+        counts["buckets"] = [
+            {"period": period.isoformat(), **period_counts} for period, period_counts in sorted(periods[scope].items())
+        ]
+    return {"bucket": bucket, "since": since.isoformat(), **scopes}
@@ -0,0 +1,150 @@
+"""
+Feed de cambios para sincronizar clientes (GET /api/tasks/changes/): tareas y comentarios creados o
+modificados, y marcas de borrado (Tombstone), desde un cursor que entregó la respuesta anterior.
+
+Cada fila guarda en sync_version la transacción que la escribió (trigger de la base). Una pasada
+del feed lee las filas con sync_version >= el xmin del snapshot con que empezó la pasada anterior:
+toda transacción que no era visible entonces tiene un id mayor o igual, así que ningún cambio se
+pierde aunque confirme tarde. A cambio, algunas filas pueden llegar repetidas; para el cliente
+aplicar un cambio dos veces no tiene efecto.
+"""
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db import connections, router
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from .models import Comment, Task, Tombstone
+from .serializers import CommentSerializer, TaskListSerializer
+
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+TASK_FIELDS = [
+    "id", "title", "description", "priority", "status", "owner", "created_at", "updated_at",
+    "comment_count", "last_activity_at",
+]
+
+# Orden de los tipos dentro de una misma transacción: la tarea antes que sus comentarios y los
+# borrados al final
+TASK, COMMENT, TOMBSTONE = 0, 1, 2
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "El cursor es más antiguo que la retención de borrados: sincronice desde cero (sin cursor)."
+    default_code = "cursor_expired"
+
+
+def current_xmin(alias):
+    """xmin del snapshot actual: toda transacción aún no visible tiene un id mayor o igual."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        return cursor.fetchone()[0]
+
+
+def encode_cursor(data):
+    return urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode("ascii")
+
+
+def decode_cursor(encoded):
+    """
+    Cursor: {"s": desde qué versión, "t": cuándo se tomó "s" (epoch), "n"/"nt": versión y momento
+    con que empieza la pasada siguiente, "a": posición [versión, tipo, id] dentro de la pasada}.
+    """
+    if not encoded:
+        return {"s": 0, "t": None}
+    try:
+        data = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+        cursor = {"s": int(data["s"]), "t": None if data["t"] is None else float(data["t"])}
+        if "a" in data:
+            version, kind, pk = data["a"]
+            cursor["a"] = [int(version), int(kind), int(pk)]
+            cursor["n"], cursor["nt"] = int(data["n"]), float(data["nt"])
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise NotFound("Cursor inválido.")
+    return cursor
+
+
+def parse_limit(params):
+    try:
+        limit = int(params.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValidationError({"limit": "Debe ser un número entero."})
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValidationError({"limit": f"Debe estar entre 1 y {MAX_LIMIT}."})
+    return limit
+
+
+def after(kind, position):
+    """Filas de `kind` posteriores a `position` en el orden (versión, tipo, id)."""
+    version, position_kind, pk = position
+    if kind > position_kind:
+        return Q(sync_version__gte=version)
+    if kind < position_kind:
+        return Q(sync_version__gt=version)
+    return Q(sync_version__gt=version) | Q(sync_version=version, id__gt=pk)
+
+
+def read_changes(kind, queryset, since, position, limit):
+    """Hasta `limit` filas de un origen, ordenadas por (versión, id), como (versión, tipo, id, fila)."""
+    queryset = queryset.filter(sync_version__gte=since)
+    if position is not None:
+        queryset = queryset.filter(after(kind, position))
+    return [(row.sync_version, kind, row.pk, row) for row in queryset.order_by("sync_version", "id")[:limit]]
+
+
+def serialize(kind, row, context):
+    if kind == TASK:
+        data = TaskListSerializer(row, fields=TASK_FIELDS, context=context).data
+        return {"type": "task", "op": "upsert", "id": row.pk, "task": row.pk, "data": data}
+    if kind == COMMENT:
+        data = CommentSerializer(row, context=context).data
+        return {"type": "comment", "op": "upsert", "id": row.pk, "task": row.task_id, "data": data}
+    return {"type": row.kind, "op": "delete", "id": row.object_id, "task": row.task_id}
+
+
+def task_changes(params, context=None):
+    """
+    Una página del feed: {"changes": [...], "cursor": ..., "has_more": bool}. Sin cursor se recorren
+    todas las tareas y comentarios (sincronización inicial, sin borrados). El cliente pide páginas
+    con el cursor mientras has_more sea true y guarda el último para la próxima sincronización.
+    """
+    cursor = decode_cursor(params.get("cursor"))
+    limit = parse_limit(params)
+    now = timezone.now()
+    if cursor["t"] is not None and now.timestamp() - cursor["t"] > Tombstone.retention().total_seconds():
+        raise CursorExpired()
+
+    position = cursor.get("a")
+    if position is None:
+        # Primera página de la pasada: la siguiente empieza desde el snapshot de ahora
+        cursor["n"], cursor["nt"] = current_xmin(router.db_for_read(Task)), now.timestamp()
+    since = cursor["s"]
+
+    sources = [
+        (TASK, Task.objects.select_related("owner").defer("search_vector")),
+        (COMMENT, Comment.objects.select_related("author")),
+    ]
+    if cursor["t"] is not None:
+        sources.append((TOMBSTONE, Tombstone.objects.all()))
+    rows = list(heapq.merge(
+        *(read_changes(kind, queryset, since, position, limit + 1) for kind, queryset in sources),
+        key=lambda row: row[:3],
+    ))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        next_cursor = {**cursor, "a": list(rows[-1][:3])}
+    else:
+        next_cursor = {"s": cursor["n"], "t": cursor["nt"]}
+    return {
+        "changes": [serialize(kind, row, context) for _, kind, _, row in rows],
+        "cursor": encode_cursor(next_cursor),
+        "has_more": has_more,
+    }
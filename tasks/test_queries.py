@@ -0,0 +1,227 @@
+import json
+from datetime import timedelta
+from itertools import product
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from tasks.archive import archive_batch
+from tasks.models import Task, Comment
+from tasks.serializers import EMBEDDED_COMMENTS
+
+
+User = get_user_model()
+
+# Tamaños de datos con los que se repite cada endpoint: el número de consultas no debe crecer
+DATA_SIZES = [1, 5, 25]
+
+
+class QueryBudgetTestCase(APITestCase):
+    """
+    Presupuesto de consultas SQL por endpoint. Cada prueba mide el endpoint con distintos
+    volúmenes de tareas/comentarios y falla si el número de consultas depende del volumen
+    (N+1) o si supera el presupuesto fijado.
+    """
+
+    def setUp(self):
+        cache.clear()  # Las respuestas cacheadas no consultan la base: se mide siempre el camino completo
+        self.user = User.objects.create_user(username="budget", password="pass1234")
+        self.client = APIClient()
+        response = self.client.post(reverse("token_obtain_pair"), {
+            "username": "budget",
+            "password": "pass1234"
+        })
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.client.get("/api/tasks/")  # Resuelve el usuario una vez: luego la autenticación no consulta
+        cache.clear()
+        self.authors = [
+            User.objects.create_user(username=f"autor{i}", password="pass1234") for i in range(3)
+        ]
+
+    def make_task(self, comments=0, owner=None):
+        """Crea una tarea con `comments` comentarios de autores distintos."""
+        task = Task.objects.create(title="Tarea", description="Descripción", owner=owner or self.user)
+        Comment.objects.bulk_create(
+            Comment(task=task, author=self.authors[i % len(self.authors)], content=f"Comentario {i}")
+            for i in range(comments)
+        )
+        Task.rebuild_activity((task.pk, task.pk))  # bulk_create no envía signals
+        return task
+
+    def count_queries(self, request, *args, **kwargs):
+        """Ejecuta la petición y retorna (respuesta, número de consultas)."""
+        with CaptureQueriesContext(connection) as context:
+            response = request(*args, **kwargs)
+        self.assertLess(response.status_code, 400, response.content)
+        return response, len(context.captured_queries)
+
+    def assertQueryBudget(self, budget, measure):
+        """`measure(size)` debe consumir exactamente `budget` consultas para todos los DATA_SIZES."""
+        counts = {size: measure(size) for size in DATA_SIZES}
+        self.assertEqual(set(counts.values()), {budget}, f"Consultas por tamaño: {counts}")
+
+    def test_list_budget(self):
+        """Listado: COUNT + página, sin consultas por owner (el usuario del token está cacheado)."""
+        def measure(size):
+            Task.objects.all().delete()
+            for _ in range(size):
+                self.make_task(owner=self.authors[0])
+            _, queries = self.count_queries(self.client.get, "/api/tasks/")
+            return queries
+        self.assertQueryBudget(2, measure)
+
+    def test_cursor_list_budget(self):
+        """Listado en modo cursor: solo la página (sin COUNT ni consulta de autenticación)."""
+        def measure(size):
+            Task.objects.all().delete()
+            for _ in range(size):
+                self.make_task(owner=self.authors[1])
+            _, queries = self.count_queries(self.client.get, "/api/tasks/?paginate=cursor")
+            return queries
+        self.assertQueryBudget(1, measure)
+
+    def test_detail_budget(self):
+        """Detalle: tarea con owner y total + últimos comentarios con autor."""
+        def measure(size):
+            task = self.make_task(comments=size)
+            response, queries = self.count_queries(self.client.get, f"/api/tasks/{task.id}/")
+            self.assertEqual(len(response.data["comments"]), min(size, EMBEDDED_COMMENTS))
+            self.assertEqual(response.data["comment_count"], size)
+            return queries
+        self.assertQueryBudget(2, measure)
+
+    def test_update_budget(self):
+        """Actualización: transacción + bloqueo del contador de activas; comentarios sin consultar cada autor."""
+        def measure(size):
+            task = self.make_task(comments=size)
+            _, queries = self.count_queries(
+                self.client.patch, f"/api/tasks/{task.id}/", {"title": "Nuevo"}, format="json"
+            )
+            task.delete()
+            return queries
+        self.assertQueryBudget(8, measure)
+
+    def test_comments_list_budget(self):
+        """Comentarios (GET): tarea + página de comentarios con autor."""
+        def measure(size):
+            task = self.make_task(comments=size)
+            response, queries = self.count_queries(self.client.get, f"/api/tasks/{task.id}/comments/")
+            self.assertEqual(len(response.data["results"]), min(size, 10))
+            return queries
+        self.assertQueryBudget(2, measure)
+
+    def test_comments_create_budget(self):
+        """Comentarios (POST): tarea + savepoint, INSERT y UPDATE de comment_count; no depende de cuántos haya."""
+        def measure(size):
+            task = self.make_task(comments=size)
+            _, queries = self.count_queries(
+                self.client.post, f"/api/tasks/{task.id}/comments/", {"content": "Hola"}, format="json"
+            )
+            return queries
+        self.assertQueryBudget(5, measure)
+
+    def test_stats_budget(self):
+        """Estadísticas: una consulta agrupada sobre TaskStat, sin importar cuántas tareas haya."""
+        def measure(size):
+            for _ in range(size):
+                self.make_task()
+            _, queries = self.count_queries(self.client.get, "/api/tasks/stats/")
+            return queries
+        self.assertQueryBudget(1, measure)
+
+    def test_changes_budget(self):
+        """Feed de cambios: snapshot + tareas (con dueño) + comentarios (con autor) + borrados."""
+        cursor = self.client.get("/api/tasks/changes/").data["cursor"]
+
+        def measure(size):
+            for _ in range(size):
+                self.make_task(comments=2, owner=self.authors[size % len(self.authors)]).delete()
+                self.make_task(comments=2, owner=self.authors[size % len(self.authors)])
+            _, queries = self.count_queries(self.client.get, "/api/tasks/changes/", {"cursor": cursor})
+            return queries
+        self.assertQueryBudget(4, measure)
+
+    def test_archived_detail_budget(self):
+        """Detalle archivado (?archived=true): las mismas consultas que el de la tabla caliente."""
+        def measure(size):
+            task = self.make_task(comments=size)
+            Task.objects.filter(pk=task.pk).update(status=Task.Status.DONE)
+            archive_batch(cutoff=task.updated_at + timedelta(days=1))
+            response, queries = self.count_queries(self.client.get, f"/api/tasks/{task.id}/?archived=true")
+            self.assertEqual(response.data["comment_count"], size)
+            return queries
+        self.assertQueryBudget(2, measure)
+
+
+def plan_nodes(plan):
+    """Nodos de un plan de EXPLAIN (FORMAT JSON), recorridos en profundidad."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+@override_settings(TASKS_RESPONSE_CACHE={"TIMEOUT": 0})
+class TaskIndexPlanTestCase(APITestCase):
+    """
+    Con una tabla de tareas grande, ninguna combinación de filtros y orden que permite el listado
+    (en páginas o por cursor) debe resolverse con Seq Scan + Sort: cada una tiene un índice que
+    entrega las filas ya ordenadas (ver Task.Meta.indexes).
+    """
+    ROWS = 20000
+    FILTERS = ["", "status=pending", "priority=high", "status=done&priority=low", "comment_count__gte=45"]
+    ORDERINGS = [
+        "", "created_at", "-created_at", "updated_at", "-updated_at", "priority", "-priority", "status", "-status",
+        "comment_count", "-comment_count", "last_activity_at", "-last_activity_at",
+    ]
+    MODES = ["", "paginate=cursor"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="planes", password="pass1234")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO tasks_task (
+                    title, description, priority, status, owner_id, created_at, updated_at, comment_count, last_activity_at
+                )
+                SELECT 'Tarea ' || i, '', (ARRAY['low', 'medium', 'high'])[1 + i %% 3],
+                       (ARRAY['pending', 'in_progress', 'done'])[1 + (i / 3) %% 3], %s,
+                       now() - i * interval '1 minute', now() - (i * 7919 %% %s) * interval '1 minute',
+                       i * 31 %% 50, now() - (i * 4001 %% %s) * interval '1 minute'
+                FROM generate_series(1, %s) AS i
+                """,
+                [cls.user.pk, cls.ROWS, cls.ROWS, cls.ROWS],
+            )
+            cursor.execute("ANALYZE tasks_task")
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def page_query(self, url):
+        """SQL de la consulta de la página (la que tiene LIMIT) ejecutada por el listado."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        queries = [query["sql"] for query in context.captured_queries if "LIMIT" in query["sql"]]
+        self.assertEqual(len(queries), 1, url)
+        return queries[0]
+
+    def test_list_queries_use_indexes(self):
+        for filters, ordering, mode in product(self.FILTERS, self.ORDERINGS, self.MODES):
+            params = "&".join(part for part in [filters, f"ordering={ordering}" if ordering else "", mode] if part)
+            url = f"/api/tasks/?{params}"
+            with self.subTest(url=url):
+                sql = self.page_query(url)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                    plan = cursor.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                nodes = list(plan_nodes(plan[0]["Plan"]))
+                node_types = {node["Node Type"] for node in nodes}
+                seq_scans = [node for node in nodes if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "tasks_task"]
+                self.assertFalse(seq_scans and "Sort" in node_types, f"{url}: {node_types}")
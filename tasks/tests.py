@@ -1,10 +1,29 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from datetime import timedelta
+from itertools import product
+from unittest import mock
+
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
-from tasks.models import Task, Comment
-from django.test import TestCase
+from tasks.admin import COMMENTS_SHOWN
+from tasks import jobs
+from tasks.models import Task, Comment, ActiveTaskCounter, ArchivedComment, ArchivedTask, Job, TaskStat, Tombstone
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from asgiref.sync import sync_to_async
+
+from core.db_router import current_replica
+from core.events import InProcessBroker, Overflow, get_broker
 
 
 User = get_user_model()
@@ -41,6 +60,16 @@ class TaskAPITestCase(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data["results"]), 2)
 
+    def test_order_by_priority_rank(self):
+        """?ordering=priority ordena por importancia (low < medium < high), no alfabéticamente"""
+        for priority in ["medium", "high", "low"]:
+            Task.objects.create(title=priority, owner=self.user, priority=priority)
+        for query in ["ordering=priority", "ordering=priority&paginate=cursor"]:
+            response = self.client.get(f"/api/tasks/?{query}")
+            self.assertEqual([task["priority"] for task in response.data["results"]], ["low", "medium", "high"])
+        response = self.client.get("/api/tasks/?ordering=-priority")
+        self.assertEqual([task["priority"] for task in response.data["results"]], ["high", "medium", "low"])
+
     def test_limit_active_tasks(self):
         """Debe restringir a 5 tareas activas"""
         for i in range(5):
@@ -62,7 +91,41 @@ class TaskAPITestCase(APITestCase):
         # Listar comentarios
         response = self.client.get(f"/api/tasks/{task.id}/comments/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_comments_are_cursor_paginated(self):
+        """Los comentarios se recorren por cursor, en orden cronológico o inverso"""
+        task = Task.objects.create(title="Muchos comentarios", owner=self.user)
+        for i in range(25):
+            Comment.objects.create(task=task, author=self.user, content=f"Comentario {i}")
+
+        contents, url = [], f"/api/tasks/{task.id}/comments/"
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn("count", response.data)
+            contents += [comment["content"] for comment in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(contents, [f"Comentario {i}" for i in range(25)])
+
+        response = self.client.get(f"/api/tasks/{task.id}/comments/?ordering=-created_at&count=exact")
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(response.data["results"][0]["content"], "Comentario 24")
+
+    def test_detail_embeds_latest_comments(self):
+        """El detalle incluye solo los últimos comentarios (más recientes primero) y el total"""
+        from tasks.serializers import EMBEDDED_COMMENTS
+        task = Task.objects.create(title="Detalle acotado", owner=self.user)
+        for i in range(EMBEDDED_COMMENTS + 3):
+            Comment.objects.create(task=task, author=self.user, content=f"Comentario {i}")
+        response = self.client.get(f"/api/tasks/{task.id}/")
+        self.assertEqual(response.data["comment_count"], EMBEDDED_COMMENTS + 3)
+        self.assertEqual(
+            [comment["content"] for comment in response.data["comments"]],
+            [f"Comentario {i}" for i in reversed(range(3, EMBEDDED_COMMENTS + 3))],
+        )
+
+        response = self.client.post("/api/tasks/", {"title": "Nueva"}, format="json")
+        self.assertEqual((response.data["comment_count"], response.data["comments"]), (0, []))
 
     def test_only_owner_can_update(self):
         """Solo el dueño puede modificar la tarea"""
@@ -200,6 +263,8 @@ class TaskAdminTestCase(TestCase):
         response = self.client.post(url, post_data, follow=True)
         self.assertEqual(response.status_code, 200)
         self.assertTrue(Comment.objects.filter(content__icontains="Comentario del owner").exists())
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
 
     def test_other_user_can_add_comment_but_not_edit_task(self):
         """Otro usuario puede comentar pero no editar la tarea."""
@@ -229,6 +294,36 @@ class TaskAdminTestCase(TestCase):
         self.task.refresh_from_db()
         self.assertEqual(self.task.title, "Tarea de prueba")
 
+    def test_inline_comment_changes_invalidate_task_cache(self):
+        """Agregar o eliminar comentarios desde el inline invalida el detalle cacheado de la API"""
+        cache.clear()
+        comment = Comment.objects.create(task=self.task, author=self.owner, content="Viejo")
+        self.owner.user_permissions.add(Permission.objects.get(codename="delete_comment"))
+        api = APIClient()
+        api.force_authenticate(self.owner)
+        self.assertEqual(len(api.get(f"/api/tasks/{self.task.id}/").data["comments"]), 1)
+
+        self.client.login(username="owner", password="pass1234")
+        url = reverse("admin:tasks_task_change", args=[self.task.id])
+        self.client.post(url, {
+            "title": self.task.title,
+            "description": self.task.description,
+            "status": self.task.status,
+            "priority": self.task.priority,
+            "comments-TOTAL_FORMS": "1",
+            "comments-INITIAL_FORMS": "1",
+            "comments-MIN_NUM_FORMS": "0",
+            "comments-MAX_NUM_FORMS": "1000",
+            "comments-0-id": str(comment.id),
+            "comments-0-task": str(self.task.id),
+            "comments-0-content": "Viejo",
+            "comments-0-DELETE": "on",
+        }, follow=True)
+
+        self.assertFalse(Comment.objects.filter(pk=comment.pk).exists())
+        detail = api.get(f"/api/tasks/{self.task.id}/").data
+        self.assertEqual((detail["comments"], detail["comment_count"]), ([], 0))
+
     #Pruebas sobre acceso al listado
     def test_admin_task_list_access(self):
         """Todos los usuarios autenticados pueden acceder al listado del admin."""
@@ -238,3 +333,1718 @@ class TaskAdminTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Tarea de prueba")
 
+    def test_admin_owner_filter_by_username(self):
+        """El filtro de dueño es un campo de texto (no lista a los usuarios) y filtra por username"""
+        Task.objects.create(title="Tarea ajena", owner=self.other)
+        self.client.login(username="admin", password="adminpass")
+        url = reverse("admin:tasks_task_changelist")
+
+        response = self.client.get(url)
+        self.assertNotContains(response, "owner__id__exact")
+        response = self.client.get(url, {"owner": "other"})
+        self.assertContains(response, "Tarea ajena")
+        self.assertNotContains(response, "Tarea de prueba")
+
+    def test_admin_changelist_query_budget(self):
+        """El listado carga los dueños con JOIN y no cuenta toda la tabla además del resultado"""
+        for i in range(30):
+            owner = User.objects.create_user(username=f"dueño{i}")
+            Task.objects.create(title=f"Tarea {i}", owner=owner)
+        self.client.force_login(self.admin)
+        url = reverse("admin:tasks_task_changelist")
+
+        # sesión, usuario, estimado, conteo exacto (tabla chica) y página: sin consultas por dueño
+        with self.assertNumQueries(5):
+            self.client.get(url, {"status": "pending"})
+
+    def test_admin_comment_inline_is_capped(self):
+        """El inline muestra solo los comentarios más recientes, con sus autores en la misma consulta"""
+        comments = Comment.objects.bulk_create(
+            Comment(task=self.task, author=self.owner, content=f"Comentario {i}") for i in range(COMMENTS_SHOWN + 5)
+        )
+        self.client.force_login(self.admin)
+        url = reverse("admin:tasks_task_change", args=[self.task.id])
+
+        response = self.client.get(url)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(formset.initial_form_count(), COMMENTS_SHOWN)
+        self.assertEqual({form.instance.pk for form in formset.initial_forms}, {c.pk for c in comments[-COMMENTS_SHOWN:]})
+        with self.assertNumQueries(0):
+            [form.instance.author.username for form in formset.initial_forms]
+
+
+class TaskCursorPaginationTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="pager", password="pass1234")
+        self.client.force_authenticate(self.user)
+        statuses = [Task.Status.PENDING, Task.Status.IN_PROGRESS, Task.Status.DONE]
+        priorities = [Task.Priority.LOW, Task.Priority.MEDIUM, Task.Priority.HIGH]
+        for i in range(25):
+            Task.objects.create(
+                title=f"Tarea {i}", owner=self.user,
+                status=statuses[i % 3], priority=priorities[i % 2],
+            )
+
+    def collect(self, url):
+        """Recorre todas las páginas siguiendo el enlace "next" y retorna los ids en orden."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_cursor_walk_matches_ordering_for_every_field(self):
+        """El recorrido por cursor debe devolver todas las tareas, sin repetir, en el orden pedido"""
+        for ordering in ["created_at", "updated_at", "priority", "status"]:
+            for field in (ordering, f"-{ordering}"):
+                tie_breaker = "-id" if field.startswith("-") else "id"
+                expected = list(Task.objects.order_by(field, tie_breaker).values_list("id", flat=True))
+                ids = self.collect(f"/api/tasks/?paginate=cursor&ordering={field}")
+                self.assertEqual(ids, expected, field)
+
+    def test_ties_are_broken_by_id(self):
+        """Filas con el mismo valor de ordenamiento no se pierden ni se duplican entre páginas"""
+        Task.objects.update(created_at=Task.objects.first().created_at)
+        ids = self.collect("/api/tasks/?paginate=cursor")
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 25)
+
+    def test_previous_link_returns_previous_page(self):
+        """El enlace "previous" debe devolver exactamente la página anterior"""
+        first = self.client.get("/api/tasks/?paginate=cursor&ordering=status")
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in back.data["results"]],
+            [item["id"] for item in first.data["results"]],
+        )
+
+    def test_invalid_cursor(self):
+        """Un cursor corrupto o de otro ordering debe responder 404"""
+        response = self.client.get("/api/tasks/?cursor=basura")
+        self.assertEqual(response.status_code, 404)
+
+        first = self.client.get("/api/tasks/?paginate=cursor&ordering=status")
+        cursor = first.data["next"].split("cursor=")[-1]
+        response = self.client.get(f"/api/tasks/?cursor={cursor}&ordering=priority")
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        """Un cursor bien formado pero con una posición manipulada responde 404, no 500"""
+        import json
+        from base64 import urlsafe_b64encode
+        ordering = ["-created_at", "-id"]
+        for position in (1, ["basura", 1], [None, 1], [[1], 1], [1], ["2026-01-01T00:00:00Z", "x"]):
+            with self.subTest(position=position):
+                data = json.dumps({"p": position, "r": 0, "o": ordering}).encode()
+                response = self.client.get(f"/api/tasks/?cursor={urlsafe_b64encode(data).decode()}")
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.data["detail"], "Cursor inválido.")
+        data = json.dumps({"p": ["basura", 1], "r": 0, "o": ["-search_rank", "-id"]}).encode()
+        response = self.client.get(f"/api/tasks/?search=informe&cursor={urlsafe_b64encode(data).decode()}")
+        self.assertEqual(response.status_code, 404)
+
+    def test_optional_counts(self):
+        """El total solo se calcula cuando se pide, exacto o estimado"""
+        response = self.client.get("/api/tasks/?paginate=cursor&count=exact&status=done")
+        self.assertEqual(response.data["count"], Task.objects.filter(status=Task.Status.DONE).count())
+
+        response = self.client.get("/api/tasks/?paginate=cursor&count=estimate")
+        self.assertIsInstance(response.data["count"], int)
+
+        response = self.client.get("/api/tasks/?count=estimate")
+        self.assertIsInstance(response.data["count"], int)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_low_estimate_does_not_truncate_pages(self):
+        """Un total estimado por debajo del real no debe recortar ni ocultar páginas"""
+        with mock.patch("tasks.pagination.estimate_count", return_value=0):
+            response = self.client.get("/api/tasks/?count=estimate&page=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNotNone(response.data["next"])
+
+
+class ActiveTaskCounterTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="counter", password="pass1234")
+        self.client.force_authenticate(self.user)
+
+    def active_count(self):
+        return ActiveTaskCounter.objects.get(user=self.user).active_count
+
+    def test_counter_follows_create_status_change_and_delete(self):
+        """El contador se mantiene al crear, completar, reabrir y eliminar tareas"""
+        response = self.client.post("/api/tasks/", {"title": "A"}, format="json")
+        task_id = response.data["id"]
+        self.client.post("/api/tasks/", {"title": "B"}, format="json")
+        self.assertEqual(self.active_count(), 2)
+
+        self.client.patch(f"/api/tasks/{task_id}/", {"status": "done"}, format="json")
+        self.assertEqual(self.active_count(), 1)
+        self.client.patch(f"/api/tasks/{task_id}/", {"status": "in_progress"}, format="json")
+        self.assertEqual(self.active_count(), 2)
+
+        self.client.delete(f"/api/tasks/{task_id}/")
+        self.assertEqual(self.active_count(), 1)
+        Task.objects.filter(owner=self.user).delete()  # queryset.delete() también envía signals
+        self.assertEqual(self.active_count(), 0)
+
+    def test_completed_task_can_be_edited_at_limit(self):
+        """Con 5 activas se puede editar una activa o crear una completada, pero no reabrir otra"""
+        tasks = [Task.objects.create(title=f"T{i}", owner=self.user) for i in range(5)]
+        done = Task.objects.create(title="Hecha", owner=self.user, status=Task.Status.DONE)
+
+        response = self.client.patch(f"/api/tasks/{tasks[0].id}/", {"title": "Editada"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post("/api/tasks/", {"title": "Otra", "status": "done"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        response = self.client.patch(f"/api/tasks/{done.id}/", {"status": "pending"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_counters_command(self):
+        """rebuild_counters corrige contadores desincronizados (p. ej. tras un queryset.update())"""
+        for i in range(3):
+            Task.objects.create(title=f"T{i}", owner=self.user)
+        Task.objects.filter(owner=self.user).update(status=Task.Status.DONE)  # no envía signals
+        call_command("rebuild_counters", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.active_count(), 0)
+
+
+class ActiveTaskLimitConcurrencyTestCase(TransactionTestCase):
+
+    def test_parallel_creates_respect_limit(self):
+        """Con muchos POST simultáneos del mismo usuario solo 5 tareas deben quedar activas"""
+        if connection.vendor != "postgresql":
+            self.skipTest("Requiere bloqueos de fila (SELECT ... FOR UPDATE)")
+        user = User.objects.create_user(username="paralelo", password="pass1234")
+        writers = 12
+        barrier = threading.Barrier(writers)
+        statuses = []
+
+        def create_task(i):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                response = client.post("/api/tasks/", {"title": f"Paralela {i}"}, format="json")
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create_task, args=(i,)) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(201), 5)
+        self.assertEqual(statuses.count(400), writers - 5)
+        self.assertEqual(Task.objects.filter(owner=user).count(), 5)
+        self.assertEqual(ActiveTaskCounter.objects.get(user=user).active_count, 5)
+
+
+class TaskSearchTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buscador", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.meeting = Task.objects.create(title="Reunión de planificación", owner=self.user)
+        self.report = Task.objects.create(
+            title="Informe mensual", description="Preparar la reunión con el cliente", owner=self.user,
+        )
+        self.other = Task.objects.create(title="Comprar café", owner=self.user)
+        Comment.objects.create(task=self.other, author=self.user, content="Pedir presupuesto al proveedor")
+
+    def search(self, query):
+        response = self.client.get(f"/api/tasks/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_search_title_and_description_ranked(self):
+        """Coincide en título y descripción, con el título mejor rankeado"""
+        self.assertEqual(self.search("search=reunión"), [self.meeting.id, self.report.id])
+
+    def test_prefix_matching(self):
+        """Cada palabra se busca como prefijo"""
+        self.assertEqual(self.search("search=planif"), [self.meeting.id])
+        self.assertEqual(self.search("search=inf mens"), [self.report.id])
+
+    def test_search_comments_is_optional(self):
+        """El contenido de los comentarios solo se busca con ?search_comments=true"""
+        self.assertEqual(self.search("search=presupuesto"), [])
+        self.assertEqual(self.search("search=presupuesto&search_comments=true"), [self.other.id])
+
+    def test_explicit_ordering_overrides_rank(self):
+        """Con ?ordering= el orden por relevancia se reemplaza"""
+        self.assertEqual(
+            self.search("search=reunión&ordering=-created_at"), [self.report.id, self.meeting.id]
+        )
+
+    def test_search_with_cursor_pagination(self):
+        """El modo cursor funciona sobre el orden por relevancia"""
+        for i in range(12):
+            Task.objects.create(title=f"Reunión semanal {i}", owner=self.user)
+        ids, url = [], "/api/tasks/?search=reuni%C3%B3n&paginate=cursor"
+        for _ in range(3):
+            response = self.client.get(url)
+            ids.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+            if not url:
+                break
+        self.assertIsNone(url)
+        self.assertEqual(len(ids), 14)
+        self.assertEqual(len(set(ids)), 14)
+
+    def test_operators_in_terms_are_ignored(self):
+        """Los caracteres especiales de tsquery no provocan errores"""
+        self.assertEqual(self.search("search=caf%C3%A9%20%26%7C!%3A("), [self.other.id])
+
+    def test_trigram_fallback_for_typos(self):
+        """Sin coincidencias exactas se recurre a similitud de trigramas sobre el título"""
+        from tasks.filters import trigram_available
+        if not trigram_available():
+            self.skipTest("La extensión pg_trgm no está disponible")
+        self.assertEqual(self.search("search=infrome"), [self.report.id])
+
+
+class TaskResponseCacheTestCase(APITestCase):
+
+    def setUp(self):
+        from tasks import cache as response_cache
+        self.response_cache = response_cache
+        response_cache.flush_counts()  # Aciertos y fallos pendientes de otros tests
+        cache.clear()
+        self.user = User.objects.create_user(username="cacheado", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title="Cacheable", owner=self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_list_is_served_from_cache(self):
+        """La segunda petición idéntica no consulta la base de datos"""
+        self.assertEqual(self.get("/api/tasks/?status=pending")["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.get("/api/tasks/?status=pending")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["results"][0]["title"], "Cacheable")
+        # Otros parámetros son otra entrada
+        self.assertEqual(self.get("/api/tasks/?status=done")["X-Cache"], "MISS")
+
+    def test_writes_invalidate_list_and_detail(self):
+        """Crear, editar o eliminar tareas por la API invalida listado y detalle"""
+        self.get("/api/tasks/")
+        self.get(f"/api/tasks/{self.task.id}/")
+        self.client.patch(f"/api/tasks/{self.task.id}/", {"title": "Editada"}, format="json")
+
+        response = self.get(f"/api/tasks/{self.task.id}/")
+        self.assertEqual((response["X-Cache"], response.data["title"]), ("MISS", "Editada"))
+        response = self.get("/api/tasks/")
+        self.assertEqual((response["X-Cache"], response.data["results"][0]["title"]), ("MISS", "Editada"))
+
+        self.client.delete(f"/api/tasks/{self.task.id}/")
+        self.assertEqual(self.client.get(f"/api/tasks/{self.task.id}/").status_code, 404)
+        self.assertEqual(self.get("/api/tasks/").data["count"], 0)
+
+    def test_comment_invalidates_only_its_task(self):
+        """Un comentario nuevo invalida el detalle de su tarea, no el de otras"""
+        other = Task.objects.create(title="Otra", owner=self.user)
+        self.get(f"/api/tasks/{self.task.id}/")
+        self.get(f"/api/tasks/{other.id}/")
+        self.client.post(f"/api/tasks/{self.task.id}/comments/", {"content": "Nuevo"}, format="json")
+
+        response = self.get(f"/api/tasks/{self.task.id}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.data["comments"]), 1)
+        self.assertEqual(self.get(f"/api/tasks/{other.id}/")["X-Cache"], "HIT")
+
+    def test_bulk_change_signal_invalidates(self):
+        """Las escrituras masivas invalidan el caché al enviar tasks_bulk_changed"""
+        from tasks.signals import tasks_bulk_changed
+        self.get(f"/api/tasks/{self.task.id}/")
+        Task.objects.filter(pk=self.task.pk).update(status=Task.Status.DONE)
+        tasks_bulk_changed.send(Task, action="update", task_ids=[self.task.pk], owner_ids=[self.user.pk])
+
+        response = self.get(f"/api/tasks/{self.task.id}/")
+        self.assertEqual(response.data["status"], "done")
+        self.assertEqual(ActiveTaskCounter.objects.get(user=self.user).active_count, 0)
+
+    def test_cache_stats(self):
+        """Los contadores de aciertos/fallos solo están disponibles para staff"""
+        self.get("/api/tasks/")
+        self.get("/api/tasks/")
+        self.assertEqual(self.client.get("/api/tasks/cache-stats/").status_code, 403)
+
+        staff = User.objects.create_user(username="staff", password="pass1234", is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.get("/api/tasks/cache-stats/")
+        self.assertEqual((response.data["hits"], response.data["misses"]), (1, 1))
+
+    def test_counters_are_flushed_periodically(self):
+        """Aciertos y fallos se cuentan en memoria y se suman al caché cada COUNTS_FLUSH_SECONDS"""
+        keys = (self.response_cache.HITS_KEY, self.response_cache.MISSES_KEY)
+        self.get("/api/tasks/")
+        self.get("/api/tasks/")
+        self.assertEqual(cache.get_many(keys), {})  # Sin escrituras en el caché por request
+        with mock.patch("tasks.cache.time.monotonic", return_value=time.monotonic() + 60):
+            self.get("/api/tasks/")
+        self.assertEqual(cache.get_many(keys), dict(zip(keys, (2, 1))))
+
+    def test_works_with_dummy_cache(self):
+        """Con DummyCache (incr siempre falla) las lecturas, las escrituras y los contadores no dan error"""
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}):
+            self.assertEqual(self.get("/api/tasks/")["X-Cache"], "MISS")
+            response = self.client.patch(f"/api/tasks/{self.task.id}/", {"title": "Sin caché"}, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.response_cache.flush_counts()
+
+
+class SparseFieldsetTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="campos", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title="Con campos", description="Texto largo " * 50, owner=self.user)
+        for i in range(3):
+            Comment.objects.create(task=self.task, author=self.user, content=f"Comentario {i}")
+
+    def get(self, path):
+        """GET que retorna (datos, SQL ejecutado)"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data, [query["sql"] for query in context.captured_queries]
+
+    def test_list_fields_skip_large_columns_and_joins(self):
+        """?fields=id,title,status no lee descripción, documento de búsqueda ni el owner"""
+        data, queries = self.get("/api/tasks/?fields=id,title,status")
+        self.assertEqual(list(data["results"][0]), ["id", "title", "status"])
+        page_query = queries[-1]
+        self.assertNotIn('"description"', page_query)
+        self.assertNotIn("search_vector", page_query)
+        self.assertNotIn("auth_user", page_query)
+
+    def test_list_expand(self):
+        """?expand= agrega descripción y comentarios al listado (prefetch en una consulta)"""
+        data, queries = self.get("/api/tasks/?expand=description,comments")
+        task = data["results"][0]
+        self.assertEqual(task["description"], self.task.description)
+        self.assertEqual(task["comment_count"], 3)
+        self.assertEqual(len(task["comments"]), 3)
+        self.assertEqual(len(queries), 3)  # COUNT, página, comentarios
+
+    def test_detail_fields_skip_comments(self):
+        """Detalle sin comentarios: una sola consulta, sin COUNT ni prefetch"""
+        data, queries = self.get(f"/api/tasks/{self.task.id}/?fields=id,title,status")
+        self.assertEqual(data, {"id": self.task.id, "title": "Con campos", "status": "pending"})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("tasks_comment", queries[0])
+
+    def test_cursor_pagination_with_sparse_fields(self):
+        """El cursor usa las columnas de orden aunque no se serialicen"""
+        for i in range(12):
+            Task.objects.create(title=f"Extra {i}", owner=self.user, priority=Task.Priority.HIGH)
+        data, queries = self.get("/api/tasks/?fields=id&ordering=-priority&paginate=cursor")
+        next_page = self.client.get(data["next"])
+        ids = [task["id"] for task in data["results"] + next_page.data["results"]]
+        self.assertEqual(sorted(ids), sorted(Task.objects.values_list("id", flat=True)))
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/api/tasks/?fields=id,secreto")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secreto", str(response.data["fields"]))
+        response = self.client.get(f"/api/tasks/{self.task.id}/?expand=description")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("expand", response.data)
+
+
+class TaskStatTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="stats", password="pass1234")
+        self.other = User.objects.create_user(username="otro_stats", password="pass1234")
+        self.client.force_authenticate(self.user)
+
+    def assertStatsMatchTasks(self):
+        """El resumen coincide con un GROUP BY sobre Task y ArchivedTask (por usuario y global, por día y total)"""
+        expected = Counter()
+        for (owner_id, day, *rest), total in TaskStat.count_all().items():
+            for key in product((owner_id, None), (day, None)):
+                expected[(*key, *rest)] += total
+        actual = Counter()
+        for row in TaskStat.objects.exclude(count=0):  # Las filas globales se suman entre shards
+            actual[(row.owner_id, row.day, row.status, row.priority)] += row.count
+        self.assertEqual(dict(actual), dict(expected))
+        global_rows = TaskStat.objects.filter(owner__isnull=True).exclude(count=0)
+        owner_shards = {TaskStat.shard_for(owner_id) for owner_id, *_ in TaskStat.count_all()}
+        self.assertEqual(set(global_rows.values_list("shard", flat=True)), owner_shards)
+
+    def test_stats_follow_api_writes(self):
+        """Crear, cambiar estado/prioridad y eliminar actualizan el resumen"""
+        ids = [self.client.post("/api/tasks/", {"title": f"T{i}"}, format="json").data["id"] for i in range(3)]
+        Task.objects.create(title="Ajena", owner=self.other, priority=Task.Priority.HIGH)
+        self.assertStatsMatchTasks()
+        self.client.patch(f"/api/tasks/{ids[0]}/", {"status": "done", "priority": "low"}, format="json")
+        self.client.patch(f"/api/tasks/{ids[1]}/", {"title": "Sin cambios en el resumen"}, format="json")
+        self.client.delete(f"/api/tasks/{ids[2]}/")
+        self.assertStatsMatchTasks()
+        Task.objects.filter(owner=self.user).delete()  # queryset.delete() (acción del admin) envía signals
+        self.assertStatsMatchTasks()
+
+    def test_stats_follow_bulk_writes(self):
+        """Las operaciones masivas aplican sus deltas sin signals por fila"""
+        response = self.client.post("/api/tasks/bulk/", [{"title": f"T{i}"} for i in range(4)], format="json")
+        ids = [result["data"]["id"] for result in response.data["results"]]
+        self.client.patch("/api/tasks/bulk/", {"ids": ids[:3], "changes": {"status": "done"}}, format="json")
+        self.client.patch("/api/tasks/bulk/", {"ids": ids[1:], "changes": {"priority": "high"}}, format="json")
+        self.assertStatsMatchTasks()
+        self.client.delete("/api/tasks/bulk/", {"ids": ids[2:]}, format="json")
+        self.assertStatsMatchTasks()
+
+    def test_global_rows_are_sharded_by_owner(self):
+        """Cada usuario suma a la fila global de su shard; el endpoint las suma"""
+        users = [self.user, self.other, User.objects.create_user(username="tercero_stats", password="pass1234")]
+        for user in users:
+            Task.objects.create(title="Misma combinación", owner=user)
+        shards = {TaskStat.shard_for(user.pk) for user in users}
+        self.assertEqual(TaskStat.objects.filter(owner__isnull=True, day__isnull=False).count(), len(shards))
+        self.assertEqual(TaskStat.objects.filter(owner__isnull=True, day__isnull=True).count(), len(shards))
+        self.assertEqual(self.client.get("/api/tasks/stats/").data["global"]["total"], 3)
+        TaskStat.rebuild()
+        self.assertStatsMatchTasks()
+
+    def test_deleting_user_keeps_global_stats(self):
+        """Al borrar un usuario (cascada) sus filas desaparecen y las globales se descuentan"""
+        Task.objects.create(title="A", owner=self.other)
+        Task.objects.create(title="B", owner=self.user)
+        self.other.delete()
+        self.assertStatsMatchTasks()
+
+    def test_rebuild_counters_rebuilds_stats(self):
+        """rebuild_counters recalcula el resumen tras escrituras que no envían signals"""
+        for i in range(3):
+            Task.objects.create(title=f"T{i}", owner=self.user)
+        Task.objects.filter(owner=self.user).update(status=Task.Status.DONE)
+        call_command("rebuild_counters", stdout=open("/dev/null", "w"))
+        self.assertStatsMatchTasks()
+
+    def test_stats_endpoint(self):
+        """Totales del usuario y globales por estado, prioridad y período, con una consulta"""
+        Task.objects.create(title="A", owner=self.user, status=Task.Status.DONE)
+        Task.objects.create(title="B", owner=self.user, priority=Task.Priority.HIGH)
+        Task.objects.create(title="C", owner=self.other)
+        old = Task.objects.create(title="Vieja", owner=self.user)
+        Task.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=400))
+        TaskStat.rebuild()
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/stats/?bucket=day&days=30")
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data["user"]["total"], 3)
+        self.assertEqual(data["user"]["status"], {"pending": 2, "in_progress": 0, "done": 1})
+        self.assertEqual(data["user"]["priority"], {"low": 0, "medium": 2, "high": 1})
+        self.assertEqual(data["global"]["total"], 4)
+        # La tarea vieja cuenta en los totales pero no en los períodos pedidos
+        self.assertEqual(data["user"]["buckets"], [{
+            "period": timezone.localdate().isoformat(), "total": 2,
+            "status": {"pending": 1, "in_progress": 0, "done": 1}, "priority": {"low": 0, "medium": 1, "high": 1},
+        }])
+        # Los totales salen de las filas de total histórico, no de las filas por día
+        TaskStat.objects.filter(day__lt=timezone.localdate() - timedelta(days=30)).delete()
+        self.assertEqual(self.client.get("/api/tasks/stats/?bucket=day&days=30").data, data)
+        self.assertEqual(self.client.get("/api/tasks/stats/").data["bucket"], "month")
+        self.assertEqual(self.client.get("/api/tasks/stats/?bucket=year").status_code, 400)
+        self.assertEqual(self.client.get("/api/tasks/stats/?days=0").status_code, 400)
+
+
+class TaskBulkTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="masivo", password="pass1234")
+        self.other = User.objects.create_user(username="ajeno", password="pass1234")
+        self.client.force_authenticate(self.user)
+
+    def active_count(self):
+        return ActiveTaskCounter.objects.get(user=self.user).active_count
+
+    def test_bulk_create_with_per_item_results(self):
+        """Crea en lote, reporta errores por elemento y corta en el límite de activas"""
+        items = [{"title": f"T{i}"} for i in range(4)] + [
+            {"title": ""},  # inválida
+            {"title": "Hecha", "status": "done"},  # completada: no cuenta para el límite
+            {"title": "T5"},
+            {"title": "T6"},  # supera el límite
+        ]
+        # savepoint, bloqueo del contador, un INSERT, recálculo del contador (SELECT + upsert),
+        # upsert de TaskStat, release
+        with self.assertNumQueries(7):
+            response = self.client.post("/api/tasks/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 200)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [201, 201, 201, 201, 400, 201, 201, 400])
+        self.assertIn("Máximo 5 tareas activas", str(response.data["results"][7]["errors"]))
+        self.assertEqual(response.data["results"][0]["data"]["owner"], "masivo")
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 6)
+        self.assertEqual(self.active_count(), 5)
+
+    def test_bulk_update_marks_many_done(self):
+        """Marca varias tareas como completadas con un único UPDATE y respeta la propiedad"""
+        mine = [Task.objects.create(title=f"M{i}", owner=self.user) for i in range(3)]
+        foreign = Task.objects.create(title="Ajena", owner=self.other)
+        ids = [task.id for task in mine] + [foreign.id, 999999]
+        self.client.get("/api/tasks/")  # llena el caché
+
+        response = self.client.patch(
+            "/api/tasks/bulk/", {"ids": ids, "changes": {"status": "done"}}, format="json"
+        )
+        by_id = {result["id"]: result["status"] for result in response.data["results"]}
+        self.assertEqual(by_id, {mine[0].id: 200, mine[1].id: 200, mine[2].id: 200, foreign.id: 403, 999999: 404})
+        self.assertEqual(Task.objects.filter(owner=self.user, status="done").count(), 3)
+        self.assertEqual(Task.objects.get(pk=foreign.pk).status, "pending")
+        self.assertEqual(self.active_count(), 0)
+        statuses = {item["status"] for item in self.client.get("/api/tasks/").data["results"] if item["owner"] == "masivo"}
+        self.assertEqual(statuses, {"done"})
+
+    def test_bulk_reopen_respects_limit(self):
+        """Reabrir tareas completadas en lote no puede superar el límite de activas"""
+        for i in range(4):
+            Task.objects.create(title=f"A{i}", owner=self.user)
+        done = [Task.objects.create(title=f"D{i}", owner=self.user, status="done") for i in range(3)]
+        response = self.client.patch(
+            "/api/tasks/bulk/", {"ids": [task.id for task in done], "changes": {"status": "pending"}}, format="json"
+        )
+        self.assertEqual([result["status"] for result in response.data["results"]], [200, 400, 400])
+        self.assertEqual(self.active_count(), 5)
+
+    def test_bulk_update_validates_changes(self):
+        """Los cambios inválidos rechazan la petición completa"""
+        task = Task.objects.create(title="T", owner=self.user)
+        response = self.client.patch(
+            "/api/tasks/bulk/", {"ids": [task.id], "changes": {"status": "otro"}}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_delete(self):
+        """Elimina tareas propias con sus comentarios y rechaza las ajenas"""
+        mine = Task.objects.create(title="Mía", owner=self.user)
+        Comment.objects.create(task=mine, author=self.other, content="Hola")
+        foreign = Task.objects.create(title="Ajena", owner=self.other)
+        response = self.client.delete("/api/tasks/bulk/", {"ids": [mine.id, foreign.id]}, format="json")
+        self.assertEqual(
+            [(result["id"], result["status"]) for result in response.data["results"]],
+            [(mine.id, 204), (foreign.id, 403)],
+        )
+        self.assertFalse(Task.objects.filter(pk=mine.pk).exists())
+        self.assertFalse(Comment.objects.filter(task_id=mine.pk).exists())
+        self.assertEqual(self.active_count(), 0)
+        self.assertEqual(self.client.get(f"/api/tasks/{mine.id}/").status_code, 404)
+
+    def test_bulk_size_limit(self):
+        """Los lotes demasiado grandes se rechazan"""
+        response = self.client.delete("/api/tasks/bulk/", {"ids": list(range(1, 502))}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskActivityTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="activo", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.quiet = Task.objects.create(title="Sin comentarios", owner=self.user)
+        self.busy = Task.objects.create(title="Comentada", owner=self.user)
+
+    def comment(self, task, content="Hola"):
+        response = self.client.post(f"/api/tasks/{task.id}/comments/", {"content": content}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_comments_update_count_and_activity(self):
+        """Crear y eliminar comentarios ajusta comment_count; crearlos marca last_activity_at"""
+        before = self.client.get("/api/tasks/").data["results"]  # llena el caché del listado
+        self.assertEqual({task["comment_count"] for task in before}, {0})
+        for i in range(3):
+            created = self.comment(self.busy, f"Comentario {i}")
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.comment_count, 3)
+        self.assertEqual(self.busy.last_activity_at, Comment.objects.get(pk=created["id"]).created_at)
+
+        Comment.objects.filter(task=self.busy).first().delete()
+        results = {task["id"]: task for task in self.client.get("/api/tasks/").data["results"]}
+        self.assertEqual(results[self.busy.id]["comment_count"], 2)
+        self.assertEqual(results[self.quiet.id]["comment_count"], 0)
+
+    def test_deleting_comments_recomputes_activity(self):
+        """Eliminar el comentario más reciente retrocede last_activity_at al anterior, o al último cambio de la tarea"""
+        first, second = (Comment.objects.get(pk=self.comment(self.busy, text)["id"]) for text in ("Uno", "Dos"))
+        second.delete()
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.comment_count, self.busy.last_activity_at), (1, first.created_at))
+        first.delete()
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.comment_count, self.busy.last_activity_at), (0, self.busy.updated_at))
+
+    def test_order_and_filter_by_activity(self):
+        """?ordering=-comment_count y -last_activity_at (también por cursor) y ?comment_count__gte="""
+        self.comment(self.busy)
+        self.comment(self.busy)
+        titles = lambda url: [task["title"] for task in self.client.get(url).data["results"]]
+        self.assertEqual(titles("/api/tasks/?ordering=-comment_count"), ["Comentada", "Sin comentarios"])
+        self.assertEqual(titles("/api/tasks/?ordering=-last_activity_at&paginate=cursor"), ["Comentada", "Sin comentarios"])
+        self.assertEqual(titles("/api/tasks/?comment_count__gte=2"), ["Comentada"])
+
+        self.client.patch(f"/api/tasks/{self.quiet.id}/", {"title": "Editada"}, format="json")
+        self.assertEqual(titles("/api/tasks/?ordering=-last_activity_at"), ["Editada", "Comentada"])
+        since = Task.objects.get(pk=self.quiet.pk).last_activity_at.isoformat()
+        self.assertEqual(titles(f"/api/tasks/?last_activity_at__gte={since.replace('+', '%2B')}"), ["Editada"])
+
+    def test_save_does_not_overwrite_count(self):
+        """Guardar una instancia leída antes de un comentario nuevo no pisa el total"""
+        stale = Task.objects.get(pk=self.busy.pk)
+        self.comment(self.busy)
+        stale.title = "Renombrada"
+        stale.save()
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.title, self.busy.comment_count), ("Renombrada", 1))
+        self.assertGreaterEqual(self.busy.last_activity_at, self.busy.updated_at)
+
+    def test_task_delete_cascade_skips_count_updates(self):
+        """Los comentarios borrados en cascada con su tarea no actualizan la fila que se elimina"""
+        for i in range(5):
+            Comment.objects.create(task=self.busy, author=self.user, content=f"C{i}")
+        with CaptureQueriesContext(connection) as context:
+            self.busy.delete()
+        self.assertFalse([query for query in context.captured_queries if "comment_count" in query["sql"]])
+
+    def test_rebuild_activity_after_bulk_insert(self):
+        """rebuild_counters corrige los totales tras inserciones sin signals (bulk_create)"""
+        comments = Comment.objects.bulk_create(
+            Comment(task=self.busy, author=self.user, content=f"C{i}") for i in range(4)
+        )
+        call_command("rebuild_counters", stdout=open("/dev/null", "w"))
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.comment_count, 4)
+        self.assertEqual(self.busy.last_activity_at, max(comment.created_at for comment in comments))
+        self.assertEqual(Task.rebuild_activity(), 0)  # Ya al día: no reescribe filas
+
+
+class TaskExportTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="exportador", password="pass1234")
+        self.client.force_authenticate(self.user)
+        for i in range(7):
+            task = Task.objects.create(
+                title=f"Tarea, {i}", description="Línea 1\nLínea 2", owner=self.user,
+                status=Task.Status.DONE if i % 2 else Task.Status.PENDING,
+            )
+            Comment.objects.create(task=task, author=self.user, content=f"Comentario {i}")
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_uses_list_filters(self):
+        """NDJSON por defecto, con los mismos filtros y orden que el listado"""
+        import json
+        response = self.client.get("/api/tasks/export/?status=done&ordering=created_at")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Tarea, 1", "Tarea, 3", "Tarea, 5"])
+        self.assertEqual(rows[0]["owner"], "exportador")
+        self.assertNotIn("comments", rows[0])
+
+    def test_csv_export_with_comments(self):
+        """CSV con encabezado y comentarios en una columna JSON, leyendo en bloques"""
+        import csv
+        import io
+        import json
+        with mock.patch("tasks.export.EXPORT_CHUNK_SIZE", 3), CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/tasks/export/?format=csv&include_comments=true")
+            rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 7)
+        comment_queries = [q for q in queries.captured_queries if 'FROM "tasks_comment"' in q["sql"]]
+        self.assertEqual(len(comment_queries), 3)  # Una consulta por bloque de 3 tareas
+        self.assertEqual(rows[0]["description"], "Línea 1\nLínea 2")
+        self.assertEqual(json.loads(rows[0]["comments"])[0]["content"], "Comentario 6")
+
+    def test_export_is_not_paginated(self):
+        """La exportación incluye todas las filas, más allá del tamaño de página"""
+        for i in range(15):
+            Task.objects.create(title=f"Extra {i}", owner=self.user, status=Task.Status.DONE)
+        response = self.client.get("/api/tasks/export/", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(len(self.read(response).splitlines()), 22)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        """Con ASGI la respuesta es un generador async que lee la base de a bloques, no una lista en memoria"""
+        from asgiref.sync import sync_to_async
+        await sync_to_async(self.async_client.force_login)(self.user)
+        expected = await sync_to_async(lambda: self.read(self.client.get("/api/tasks/export/?format=csv")))()
+        response = await self.async_client.get("/api/tasks/export/?format=csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]).decode(), expected)
+
+
+class LoadTasksCommandTestCase(TestCase):
+
+    def load(self, **options):
+        options = {"users": 3, "tasks": 12, "comments": 10, "seed": 7, "batch_size": 5, **options}
+        call_command("load_tasks", stdout=open("/dev/null", "w"), **options)
+
+    def test_loads_requested_volumes_in_batches(self):
+        """Crea las cantidades pedidas, en lotes, y deja los contadores activos al día"""
+        self.load(status_ratio="pending=1,done=1", skew=1.5)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Task.objects.count(), 12)
+        self.assertEqual(Comment.objects.count(), 10)
+        self.assertFalse(Task.objects.filter(status=Task.Status.IN_PROGRESS).exists())
+        for user in User.objects.all():
+            active = Task.objects.filter(owner=user).exclude(status=Task.Status.DONE).count()
+            self.assertEqual(ActiveTaskCounter.objects.get(user=user).active_count, active)
+        for task in Task.objects.all():
+            self.assertEqual(task.comment_count, task.comments.count())
+            self.assertGreaterEqual(task.last_activity_at, task.updated_at)
+            if not task.comment_count:
+                self.assertEqual(task.last_activity_at, task.updated_at)
+        self.assertEqual(Task.rebuild_activity(), 0)  # La carga ya dejó todas las tareas al día
+
+    def test_seed_is_reproducible_with_any_insert_path(self):
+        """La misma semilla genera los mismos datos, fechas incluidas, con COPY o bulk_create"""
+        def loaded():
+            tasks = Task.objects.order_by("id").values_list(
+                "title", "status", "owner__username", "created_at", "updated_at", "last_activity_at"
+            )
+            comments = Comment.objects.order_by("id").values_list("content", "created_at")
+            return list(tasks), list(comments)
+
+        now = timezone.now()
+        with mock.patch("django.utils.timezone.now", return_value=now):  # Mismo instante de referencia
+            self.load()
+            first = loaded()
+            Task.objects.all().delete()
+            self.load(no_copy=True)  # Reutiliza los usuarios ya creados
+            second = loaded()
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(first, second)
+        self.assertEqual(len({created_at for *_, created_at, _, _ in second[0]}), 12)  # Fechas repartidas en --days
+
+    def test_copy_uses_reserved_ids(self):
+        """Los ids del COPY se reservan en la secuencia: una fila ajena con id mayor no se confunde con las nuevas"""
+        user = User.objects.create_user(username="ajeno", password="pass1234")
+        outsider = Task.objects.create(id=10**6, title="Ajena", owner=user)
+        self.load()
+        self.assertEqual(Task.objects.exclude(pk=outsider.pk).count(), 12)
+        self.assertEqual(Comment.objects.filter(task=outsider).count(), 0)
+        self.assertEqual(Comment.objects.count(), 10)
+
+    def test_invalid_ratio(self):
+        """Una proporción con opciones desconocidas se rechaza"""
+        from django.core.management.base import CommandError
+        with self.assertRaises(CommandError):
+            self.load(status_ratio="urgent=1")
+
+
+class BenchAPICommandTestCase(TestCase):
+
+    def test_bench_reports_percentiles_as_json(self):
+        """bench_api mide cada escenario y guarda latencias, rendimiento y consultas en JSON"""
+        import json
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "bench_api", no_test_db=True, users=2, tasks=10, comments=5, iterations=3, warmup=1,
+                scenario=["list", "detail", "create"], output=output.name, stdout=open("/dev/null", "w"),
+            )
+            report = json.load(open(output.name))
+        self.assertEqual(set(report["results"]), {"list", "detail", "create"})
+        listing = report["results"]["list"]
+        self.assertEqual(listing["requests"], 3)
+        self.assertEqual(listing["statuses"], {"200": 3})
+        self.assertLessEqual(listing["p50_ms"], listing["p99_ms"])
+        self.assertEqual(report["results"]["create"]["statuses"], {"201": 3})
+        self.assertFalse(Task.objects.filter(title="Benchmark").exists())
+
+
+class BootstrapCommandTestCase(TestCase):
+
+    def bootstrap(self, **options):
+        from io import StringIO
+        output = StringIO()
+        call_command("bootstrap", stdout=output, **options)
+        return output.getvalue()
+
+    def test_second_run_skips_up_to_date_work(self):
+        """Sin migraciones pendientes ni estáticos cambiados solo se verifica; el superusuario se crea una vez"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            first = self.bootstrap()
+            self.assertIn("Migraciones: al día", first)
+            self.assertIn("Superusuario: admin creado", first)
+            self.assertIn("Caché: sin DatabaseCache", first)
+            self.assertIn("Estáticos: recolectados", first)
+            self.assertTrue(User.objects.get(username="admin").is_superuser)
+
+            with mock.patch("tasks.management.commands.bootstrap.call_command") as command:
+                second = self.bootstrap()
+            command.assert_not_called()
+            self.assertIn("Superusuario: admin ya existe", second)
+            self.assertIn("Estáticos: sin cambios", second)
+
+    def test_creates_database_cache_table(self):
+        """Con DatabaseCache (el caché compartido de Compose) crea su tabla"""
+        import tempfile
+        caches = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "bootstrap_cache"}}
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root, CACHES=caches):
+            self.assertIn("Caché: tablas bootstrap_cache listas", self.bootstrap())
+        self.assertIn("bootstrap_cache", connection.introspection.table_names())
+
+    def test_pending_migrations_compares_files_with_applied(self):
+        """Una migración en disco sin registrar en django_migrations queda pendiente"""
+        from django.db.migrations.recorder import MigrationRecorder
+        from tasks.management.commands.bootstrap import pending_migrations
+        self.assertEqual(pending_migrations(connection), [])
+        MigrationRecorder(connection).record_unapplied("tasks", "0010_task_activity")
+        self.assertEqual(pending_migrations(connection), [("tasks", "0010_task_activity")])
+
+
+class ProfileStartupCommandTestCase(SimpleTestCase):
+
+    def test_profile_reports_phases_apps_and_imports(self):
+        """profile_startup mide un arranque nuevo: fases hasta la primera request, apps e importaciones"""
+        import json
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command("profile_startup", output=output.name, top=5, stdout=open("/dev/null", "w"))
+            report = json.load(open(output.name))
+        self.assertEqual(
+            list(report["phases_ms"]), ["settings", "apps", "middleware", "urls", "first_request", "total"]
+        )
+        self.assertEqual(report["first_request_status"], 401)  # /api/ sin token
+        self.assertIn("ready", report["apps_ms"]["tasks"])
+        self.assertIn("django", report["packages_ms"])
+        self.assertEqual(len(report["slowest_modules_ms"]), 5)
+
+
+class RendererTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="render", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(
+            title="Ñandú\u2028con separador", description="Descripción — «larga»", owner=self.user,
+            priority=Task.Priority.HIGH,
+        )
+        Comment.objects.create(task=self.task, author=self.user, content="Comentario")
+
+    def test_orjson_matches_drf_json_bytes(self):
+        """Mismo cuerpo que JSONRenderer de DRF en listado, detalle y errores"""
+        from rest_framework.renderers import JSONRenderer
+        for path in ["/api/tasks/", f"/api/tasks/{self.task.id}/", "/api/tasks/stats/", "/api/tasks/?fields=nada"]:
+            response = self.client.get(path)
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertEqual(response.content, JSONRenderer().render(response.data), path)
+        self.assertIn(b"\\u2028", self.client.get(f"/api/tasks/{self.task.id}/").content)
+
+    def test_orjson_handles_datetimes_choices_and_lazy_text(self):
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from tasks.renderers import ORJSONRenderer
+        data = {"when": timezone.now(), "status": Task.Status.DONE, "detail": gettext_lazy("Not found."), 1: None}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_msgpack_negotiation_and_parser(self):
+        """Accept: application/msgpack responde en MessagePack y el cuerpo puede enviarse igual"""
+        import msgpack
+        response = self.client.get(f"/api/tasks/{self.task.id}/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(f"/api/tasks/{self.task.id}/").json())
+        self.assertEqual(self.client.get("/api/tasks/?format=msgpack")["Content-Type"], "application/msgpack")
+
+        body = msgpack.packb({"title": "Desde msgpack", "status": "done"})
+        response = self.client.post("/api/tasks/", body, content_type="application/msgpack")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Task.objects.filter(title="Desde msgpack").exists())
+        response = self.client.post("/api/tasks/", b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_json_body(self):
+        response = self.client.post("/api/tasks/", b"{no es json", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+    def test_bench_renderers_command(self):
+        """bench_renderers compara los renderers y confirma que el JSON es idéntico"""
+        import json
+        import tempfile
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command("bench_renderers", items=5, iterations=3, output=output.name, stdout=open("/dev/null", "w"))
+            report = json.load(open(output.name))
+        self.assertTrue(report["identical_json"])
+        self.assertEqual(set(report["results"]), {"drf_json", "orjson", "msgpack"})
+
+
+class RequestTimingMiddlewareTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="medido", password="pass1234")
+        Task.objects.create(title="Medida", owner=self.user)
+        token = self.client.post(reverse("token_obtain_pair"), {"username": "medido", "password": "pass1234"})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.data['access']}")
+
+    def timings(self, response):
+        entries = [entry.split(";") for entry in response["Server-Timing"].split(", ")]
+        return {entry[0]: entry[1:] for entry in entries}
+
+    def test_server_timing_header(self):
+        """La respuesta incluye consultas, auth, serialización, vista, render y total"""
+        with override_settings(REQUEST_TIMING={"SAMPLE_RATE": 1}), CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/tasks/")
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {"db", "auth", "serialize", "view", "render", "total"})
+        self.assertIn(f'desc="{len(queries)} queries"', timings["db"])
+
+    def test_slow_queries_and_requests_are_logged_with_view(self):
+        """Las consultas y requests sobre el umbral se registran con la acción del ViewSet"""
+        config = {"SAMPLE_RATE": 1, "SLOW_QUERY_MS": 0, "SLOW_REQUEST_MS": 0}
+        with override_settings(REQUEST_TIMING=config), self.assertLogs("core.sql", "WARNING") as sql_logs, \
+                self.assertLogs("core.requests", "WARNING") as request_logs:
+            self.client.get("/api/tasks/")
+        sql = sql_logs.records
+        self.assertEqual(sql[0].view, "TaskViewSet.list")
+        self.assertIn("SELECT", sql[0].sql)
+        slow = request_logs.records
+        self.assertEqual(slow[0].view, "TaskViewSet.list")
+        self.assertEqual(slow[0].status, 200)
+
+    def test_unsampled_requests_are_not_instrumented(self):
+        """Con SAMPLE_RATE=0 no se agrega el header ni se miden las consultas, pero las requests lentas se registran igual"""
+        with override_settings(REQUEST_TIMING={"SAMPLE_RATE": 0}), self.assertNoLogs("core.requests", "INFO"):
+            response = self.client.get("/api/tasks/")
+        self.assertNotIn("Server-Timing", response)
+
+        config = {"SAMPLE_RATE": 0, "SLOW_QUERY_MS": 0, "SLOW_REQUEST_MS": 0}
+        with override_settings(REQUEST_TIMING=config), self.assertNoLogs("core.sql", "WARNING"), \
+                self.assertLogs("core.requests", "WARNING") as request_logs:
+            self.client.get("/api/tasks/")
+        slow = request_logs.records[0]
+        self.assertEqual((slow.view, slow.status, slow.sampled), ("TaskViewSet.list", 200, False))
+        self.assertGreater(slow.total_ms, 0)
+        self.assertFalse(hasattr(slow, "queries"))
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+
+    def setUp(self):
+        from tasks.authentication import user_cache
+        self.user_cache = user_cache
+        user_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username="cacheado", password="pass1234")
+        self.authenticate(self.client, "cacheado")
+
+    def authenticate(self, client, username):
+        token = client.post(reverse("token_obtain_pair"), {"username": username, "password": "pass1234"})
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.data['access']}")
+
+    def user_queries(self, path="/api/tasks/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries.captured_queries if 'FROM "auth_user" WHERE' in q["sql"]]
+
+    def test_user_is_resolved_once(self):
+        """Solo la primera request lee el usuario; las siguientes no consultan auth_user"""
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries("/api/tasks/?status=done")), 0)
+
+    def test_deactivated_user_is_rejected(self):
+        """Desactivar (o modificar) al usuario invalida su entrada en el caché"""
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/tasks/").status_code, 401)
+
+    def test_cache_is_bounded_and_expires(self):
+        """El caché respeta MAX_SIZE (LRU) y descarta las entradas vencidas"""
+        other = APIClient()
+        User.objects.create_user(username="otro", password="pass1234")
+        self.authenticate(other, "otro")
+        with override_settings(JWT_USER_CACHE={"MAX_SIZE": 1, "TTL": 60}):
+            self.client.get("/api/tasks/")
+            other.get("/api/tasks/")
+            self.assertEqual(len(self.user_cache), 1)
+            self.assertEqual(len(self.user_queries()), 1)  # Fue desalojado por "otro"
+
+        with mock.patch("tasks.authentication.time.monotonic", return_value=10 ** 9):
+            self.assertEqual(len(self.user_queries()), 1)
+
+
+class AsyncTaskEndpointsTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="async", password="pass1234")
+        other = User.objects.create_user(username="otro_async", password="pass1234")
+        for i in range(12):
+            Task.objects.create(
+                title=f"Tarea async {i}", owner=self.user if i % 2 else other,
+                status=Task.Status.DONE if i % 3 else Task.Status.PENDING,
+            )
+        self.task = Task.objects.first()
+        for i in range(13):
+            Comment.objects.create(task=self.task, author=other, content=f"Comentario {i}")
+        token = self.client.post(reverse("token_obtain_pair"), {"username": "async", "password": "pass1234"})
+        self.auth = {"headers": {"Authorization": f"Bearer {token.data['access']}"}}
+
+    async def assertSameResponse(self, path):
+        """El endpoint async responde lo mismo que el ViewSet sync"""
+        import json
+        from asgiref.sync import sync_to_async
+        expected = await sync_to_async(self.client.get)(f"/api/{path}", **self.auth)
+        response = await self.async_client.get(f"/api/async/{path}", **self.auth)
+        self.assertEqual(response.status_code, expected.status_code)
+        # Los enlaces de paginación apuntan al mismo endpoint async
+        self.assertEqual(json.loads(response.content.decode().replace("/api/async/", "/api/")), expected.json())
+        return response.json()
+
+    async def test_list_matches_sync_viewset(self):
+        """Listado con filtros, orden, página y cursor"""
+        await self.assertSameResponse("tasks/")
+        await self.assertSameResponse("tasks/?status=done&ordering=created_at&page=2")
+        await self.assertSameResponse("tasks/?count=estimate")
+        first = await self.assertSameResponse("tasks/?paginate=cursor&ordering=-priority")
+        cursor = first["next"].split("cursor=")[1]
+        await self.assertSameResponse(f"tasks/?paginate=cursor&ordering=-priority&cursor={cursor}")
+        await self.assertSameResponse("tasks/?page=99")
+        await self.assertSameResponse("tasks/?search=async")
+        await self.assertSameResponse("tasks/?fields=id,title&expand=comments")
+
+    async def test_detail_and_comments_match_sync_viewset(self):
+        """Detalle con comentarios embebidos y comentarios paginados"""
+        await self.assertSameResponse(f"tasks/{self.task.id}/")
+        await self.assertSameResponse(f"tasks/{self.task.id}/?fields=title,comment_count")
+        page = await self.assertSameResponse(f"tasks/{self.task.id}/comments/?count=exact")
+        self.assertEqual(page["count"], 13)
+        await self.assertSameResponse("tasks/999999/")
+
+    async def test_requires_authentication(self):
+        """Sin token: 401 con el mismo cuerpo y header que DRF"""
+        response = await self.async_client.get("/api/async/tasks/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+        response = await self.async_client.get("/api/async/tasks/", headers={"Authorization": "Bearer basura"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], TASKS_RESPONSE_CACHE={"TIMEOUT": 0})
+class ReadReplicaRoutingTestCase(TransactionTestCase):
+    # La réplica es un mirror de la base de pruebas con su propia conexión: solo ve datos con commit
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="replica", password="pass1234")
+        self.other = User.objects.create_user(username="otro_replica", password="pass1234")
+        self.task = Task.objects.create(title="Tarea replicada", owner=self.user)
+        Comment.objects.create(task=self.task, author=self.other, content="Comentario replicado")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        connections["replica"].close()
+
+    def get(self, client, path):
+        """GET que retorna (respuesta, consultas en default, consultas en la réplica)"""
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            response = client.get(path)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return response, len(primary), len(replica)
+
+    def test_reads_go_to_replica(self):
+        """Listado, detalle, comentarios y exportación leen solo de la réplica"""
+        for path in ["/api/tasks/", f"/api/tasks/{self.task.id}/", f"/api/tasks/{self.task.id}/comments/",
+                     "/api/tasks/export/?include_comments=true"]:
+            response, primary, replica = self.get(self.client, path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(primary, 0, path)
+            self.assertGreater(replica, 0, path)
+        self.assertIsNone(current_replica())
+
+    def test_writes_go_to_primary_and_pin_the_writer(self):
+        """Después de escribir, el autor lee del primario; los demás usuarios siguen en la réplica"""
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.post("/api/tasks/", {"title": "Nueva"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica), 0)
+
+        response, primary, replica = self.get(self.client, "/api/tasks/")
+        self.assertEqual(response.data["count"], 2)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        other_client = APIClient()
+        other_client.force_authenticate(self.other)
+        response, primary, replica = self.get(other_client, "/api/tasks/")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_pin_expires(self):
+        """Sin escrituras recientes (o con REPLICA_PIN_SECONDS=0) se vuelve a leer de la réplica"""
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            self.client.post(f"/api/tasks/{self.task.id}/comments/", {"content": "Otro"}, format="json")
+        response, primary, replica = self.get(self.client, f"/api/tasks/{self.task.id}/")
+        self.assertEqual(response.data["comment_count"], 2)
+        self.assertEqual(primary, 0)
+
+    def test_without_replicas_everything_reads_primary(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            response, primary, replica = self.get(self.client, "/api/tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+
+class ChangesFeedTestCase(TransactionTestCase):
+    # Cada escritura confirma en su propia transacción, como en producción (la versión es la transacción)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="sync", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, cursor=None, limit=None):
+        """Recorre todas las páginas del feed; retorna (cambios, cursor final)"""
+        changes = []
+        while True:
+            params = {key: value for key, value in {"cursor": cursor, "limit": limit}.items() if value}
+            response = self.client.get("/api/tasks/changes/", params)
+            self.assertEqual(response.status_code, 200, response.data)
+            changes += response.data["changes"]
+            cursor = response.data["cursor"]
+            if not response.data["has_more"]:
+                return changes, cursor
+
+    @staticmethod
+    def summary(changes):
+        return {(change["type"], change["op"], change["id"]) for change in changes}
+
+    def test_initial_sync_then_deltas(self):
+        """Sin cursor se recibe todo; luego solo lo creado, modificado o eliminado (también en masa)"""
+        tasks = [Task.objects.create(title=f"Tarea {i}", owner=self.user, status="done") for i in range(4)]
+        comment = Comment.objects.create(task=tasks[0], author=self.user, content="Hola")
+        Tombstone.objects.create(kind="task", object_id=999, task_id=999, sync_version=0, deleted_at=timezone.now())
+
+        changes, cursor = self.sync(limit=2)
+        self.assertEqual(
+            self.summary(changes),
+            {("task", "upsert", task.id) for task in tasks} | {("comment", "upsert", comment.id)},
+        )
+        # El comentario reescribe su tarea (comment_count): llega con el total al día
+        first = next(change for change in changes if change["type"] == "task" and change["id"] == tasks[0].id)
+        self.assertEqual((first["data"]["title"], first["data"]["comment_count"]), ("Tarea 0", 1))
+        self.assertEqual(self.sync(cursor)[0], [])
+
+        self.client.patch(f"/api/tasks/{tasks[1].id}/", {"title": "Cambiada"}, format="json")
+        new = self.client.post(f"/api/tasks/{tasks[2].id}/comments/", {"content": "Nuevo"}, format="json").data
+        self.client.delete(f"/api/tasks/{tasks[0].id}/")
+        self.client.delete("/api/tasks/bulk/", {"ids": [tasks[3].id]}, format="json")
+
+        changes, cursor = self.sync(cursor)
+        self.assertEqual(self.summary(changes), {
+            ("task", "upsert", tasks[1].id), ("comment", "upsert", new["id"]), ("task", "upsert", tasks[2].id),
+            ("task", "delete", tasks[0].id), ("comment", "delete", comment.id), ("task", "delete", tasks[3].id),
+        })
+        deleted_comment = next(change for change in changes if change["type"] == "comment" and change["op"] == "delete")
+        self.assertEqual(deleted_comment["task"], tasks[0].id)
+        self.assertEqual(self.sync(cursor)[0], [])
+
+    def test_queryset_update_is_tracked(self):
+        """QuerySet.update() no pasa por save(): la versión la asigna la base igual"""
+        task = Task.objects.create(title="Tarea", owner=self.user)
+        _, cursor = self.sync()
+        Task.objects.filter(pk=task.pk).update(status="done")
+        changes, _ = self.sync(cursor)
+        self.assertEqual([(change["id"], change["data"]["status"]) for change in changes], [(task.id, "done")])
+
+    def test_expired_and_invalid_cursor(self):
+        _, cursor = self.sync()
+        with override_settings(SYNC_TOMBSTONE_DAYS=0):
+            response = self.client.get("/api/tasks/changes/", {"cursor": cursor})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.client.get("/api/tasks/changes/", {"cursor": "roto"}).status_code, 404)
+        self.assertEqual(self.client.get("/api/tasks/changes/", {"limit": 0}).status_code, 400)
+
+    def test_compact_tombstones(self):
+        task = Task.objects.create(title="Tarea", owner=self.user)
+        task.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=31))
+        recent = Task.objects.create(title="Reciente", owner=self.user)
+        recent_id = recent.id
+        recent.delete()
+
+        call_command("compact_tombstones", stdout=open("/dev/null", "w"))
+        self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [recent_id])
+
+
+@override_settings(EVENTS={"BROKER": "core.events.InProcessBroker", "HEARTBEAT_SECONDS": 1})
+class EventBrokerTestCase(SimpleTestCase):
+
+    async def test_delivers_across_threads_and_filters(self):
+        """publish() desde otro hilo (vista sync) llega a las suscripciones que aceptan el evento"""
+        broker = get_broker()
+        everything = broker.subscribe()
+        only_task_2 = broker.subscribe(lambda event: event["task"] == 2)
+        events = [{"type": "task", "op": "update", "id": 1, "task": 1}, {"type": "comment", "op": "create", "id": 5, "task": 2}]
+        await sync_to_async(broker.publish, thread_sensitive=False)(events)
+
+        self.assertEqual(
+            await everything.get(timeout=1),
+            [b'event: task\ndata: {"op":"update","id":1,"task":1}\n\n', b'event: comment\ndata: {"op":"create","id":5,"task":2}\n\n'],
+        )
+        self.assertEqual(len(await only_task_2.get(timeout=1)), 1)
+        self.assertEqual(await only_task_2.get(timeout=0.01), [])
+        everything.close()
+        only_task_2.close()
+        self.assertEqual(broker.subscriptions, set())
+
+    async def test_slow_subscriber_overflows(self):
+        """Una cola llena (en eventos o en bytes) descarta lo pendiente y avisa con Overflow"""
+        broker = get_broker()
+        by_count = broker.subscribe(max_events=2)
+        by_bytes = broker.subscribe(max_bytes=100)
+        broker.publish([{"type": "task", "op": "update", "id": i, "task": i} for i in range(3)])
+        await asyncio.sleep(0)
+        for subscription in (by_count, by_bytes):
+            self.assertEqual(subscription.messages, deque())
+            with self.assertRaises(Overflow):
+                await subscription.get(timeout=1)
+            subscription.close()
+
+    async def test_subscriber_limit(self):
+        broker = get_broker()
+        with override_settings(EVENTS={"MAX_SUBSCRIBERS": 1}):
+            first = broker.subscribe()
+            self.assertIsNone(broker.subscribe())
+        first.close()
+
+
+@override_settings(EVENTS={"BROKER": "core.events.InProcessBroker", "HEARTBEAT_SECONDS": 1})
+class ChangeEventsTestCase(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="eventos", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.published = []
+        patcher = mock.patch.object(InProcessBroker, "publish", side_effect=self.published.extend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def summary(self):
+        return [(event["type"], event["op"], event["id"]) for event in self.published]
+
+    def test_api_admin_and_bulk_writes_publish_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.client.post("/api/tasks/", {"title": "Nueva"}, format="json").data
+            comment = self.client.post(f"/api/tasks/{task['id']}/comments/", {"content": "Hola"}, format="json").data
+            self.client.patch("/api/tasks/bulk/", {"ids": [task["id"]], "changes": {"status": "done"}}, format="json")
+            Task.objects.get(pk=task["id"]).delete()  # Admin y cascadas usan delete()
+        self.assertEqual(self.summary(), [
+            ("task", "create", task["id"]), ("comment", "create", comment["id"]), ("task", "update", task["id"]),
+            ("comment", "delete", comment["id"]), ("task", "delete", task["id"]),
+        ])
+        self.assertEqual(self.published[1]["task"], task["id"])
+
+    def test_rolled_back_writes_publish_nothing(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Task.objects.create(title="Sin confirmar", owner=self.user)
+        self.assertTrue(callbacks)
+        self.assertEqual(self.published, [])
+
+
+@override_settings(EVENTS={"BROKER": "core.events.InProcessBroker", "HEARTBEAT_SECONDS": 1})
+class EventStreamTestCase(APITestCase):
+
+    def setUp(self):
+        User.objects.create_user(username="stream", password="pass1234")
+        token = self.client.post(reverse("token_obtain_pair"), {"username": "stream", "password": "pass1234"})
+        self.auth = {"headers": {"Authorization": f"Bearer {token.data['access']}"}}
+
+    async def test_stream_pushes_events_and_heartbeats(self):
+        response = await self.async_client.get("/api/async/events/?tasks=7", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        content = aiter(response.streaming_content)
+        self.assertEqual(await anext(content), b"retry: 3000\n\n")
+
+        get_broker().publish([
+            {"type": "task", "op": "update", "id": 3, "task": 3},
+            {"type": "comment", "op": "create", "id": 9, "task": 7},
+        ])
+        self.assertEqual(await anext(content), b'event: comment\ndata: {"op":"create","id":9,"task":7}\n\n')
+        self.assertEqual(await anext(content), b": ping\n\n")
+
+        # El servidor ASGI cancela la tarea que envía el stream cuando el cliente se desconecta
+        reading = asyncio.ensure_future(anext(content))
+        await asyncio.sleep(0.01)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+        self.assertEqual(get_broker().subscriptions, set())
+
+    def test_stream_requires_asgi(self):
+        """Con WSGI el stream no terminaría nunca: 501"""
+        response = self.client.get("/api/async/events/", **self.auth)
+        self.assertEqual(response.status_code, 501)
+        self.assertIn("ASGI", response.json()["detail"])
+        self.assertEqual(get_broker().subscriptions, set())
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get("/api/async/events/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get("/api/async/events/?tasks=a", **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(EVENTS={"BROKER": "core.events.PostgresBroker", "CHANNEL": "tasks_events_test", "HEARTBEAT_SECONDS": 1})
+class PostgresBrokerTestCase(TransactionTestCase):
+
+    async def test_notify_reaches_listener(self):
+        """Los eventos publicados con NOTIFY (en lotes de menos de 8000 bytes) llegan por LISTEN"""
+        broker = get_broker()
+        subscription = broker.subscribe()
+        try:
+            await asyncio.wait_for(broker.listening.wait(), 5)
+            events = [{"type": "task", "op": "update", "id": i, "task": i} for i in range(300)]
+            await sync_to_async(broker.publish)(events)
+            messages = []
+            while len(messages) < len(events):
+                messages += await subscription.get(timeout=5) or self.fail("No llegaron todos los eventos")
+            self.assertEqual(messages[-1], b'event: task\ndata: {"op":"update","id":299,"task":299}\n\n')
+        finally:
+            subscription.close()
+            broker.listener.cancel()
+
+
+class TaskArchiveTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="archivo", password="pass1234")
+        self.client.force_authenticate(self.user)
+        old = timezone.now() - timedelta(days=200)
+        self.old_done = [
+            Task.objects.create(title=f"Vieja completada {i}", owner=self.user, status=Task.Status.DONE)
+            for i in range(3)
+        ]
+        self.recent_done = Task.objects.create(title="Reciente completada", owner=self.user, status=Task.Status.DONE)
+        self.old_pending = Task.objects.create(title="Vieja pendiente", owner=self.user)
+        for i in range(2):
+            Comment.objects.create(task=self.old_done[0], author=self.user, content=f"Comentario archivado {i}")
+        Comment.objects.create(task=self.old_pending, author=self.user, content="Sigue en la tabla caliente")
+        Task.objects.exclude(pk=self.recent_done.pk).update(updated_at=old, last_activity_at=old)
+
+    def archive(self, *args):
+        call_command("archive_tasks", *args, stdout=open("/dev/null", "w"))
+
+    def test_archive_moves_old_done_tasks_with_comments(self):
+        """Solo las completadas sin cambios desde ARCHIVE_AFTER_DAYS pasan al archivo, con sus comentarios e ids"""
+        stats = {(row.owner_id, row.day, row.status, row.priority): row.count for row in TaskStat.objects.all()}
+        self.archive("--batch-size", "2")
+        ids = [task.pk for task in self.old_done]
+        self.assertCountEqual(ArchivedTask.objects.values_list("id", flat=True), ids)
+        self.assertCountEqual(Task.objects.values_list("id", flat=True), [self.recent_done.pk, self.old_pending.pk])
+        self.assertEqual(ArchivedComment.objects.filter(task_id=ids[0]).count(), 2)
+        self.assertEqual(list(Comment.objects.values_list("content", flat=True)), ["Sigue en la tabla caliente"])
+        archived = ArchivedTask.objects.get(pk=ids[0])
+        self.assertEqual((archived.title, archived.owner, archived.status), ("Vieja completada 0", self.user, "done"))
+        # Las archivadas siguen en las estadísticas y el contador de activas no cambia
+        self.assertEqual(
+            {(row.owner_id, row.day, row.status, row.priority): row.count for row in TaskStat.objects.all()}, stats
+        )
+        TaskStat.rebuild()
+        self.assertEqual(
+            {(row.owner_id, row.day, row.status, row.priority): row.count for row in TaskStat.objects.all()}, stats
+        )
+        self.assertEqual(ActiveTaskCounter.objects.get(user=self.user).active_count, 1)
+
+    def test_recent_comment_keeps_task_hot(self):
+        """La antigüedad se mide por last_activity_at: un comentario reciente la deja en la tabla caliente"""
+        Comment.objects.create(task=self.old_done[1], author=self.user, content="Todavía se discute")
+        self.archive()
+        self.assertCountEqual(
+            ArchivedTask.objects.values_list("id", flat=True), [self.old_done[0].pk, self.old_done[2].pk]
+        )
+        self.assertTrue(Task.objects.filter(pk=self.old_done[1].pk).exists())
+
+    def test_archive_is_resumable(self):
+        """Cada lote confirma por separado: una corrida cortada continúa en la siguiente"""
+        self.archive("--batch-size", "2", "--max-batches", "1")
+        self.assertEqual(ArchivedTask.objects.count(), 2)
+        self.archive("--batch-size", "2")
+        self.assertEqual(ArchivedTask.objects.count(), 3)
+        self.archive()  # Nada pendiente
+        self.assertEqual(ArchivedTask.objects.count(), 3)
+        self.archive("--days", "0")  # Con otra antigüedad entra también la reciente
+        self.assertTrue(ArchivedTask.objects.filter(pk=self.recent_done.pk).exists())
+
+    def test_dry_run_does_not_archive(self):
+        import io
+        out = io.StringIO()
+        call_command("archive_tasks", "--dry-run", stdout=out)
+        self.assertIn("3 tareas", out.getvalue())
+        self.assertFalse(ArchivedTask.objects.exists())
+
+    def test_archived_tasks_are_read_with_filter(self):
+        """?archived=true lee el archivo en listado, detalle, comentarios, búsqueda y exportación; sin él no aparecen"""
+        self.archive()
+        task = self.old_done[0]
+        response = self.client.get("/api/tasks/?archived=true&ordering=created_at")
+        self.assertEqual([row["id"] for row in response.data["results"]], [t.pk for t in self.old_done])
+        self.assertEqual(response.data["results"][0]["comment_count"], 2)
+        self.assertEqual(len(self.client.get("/api/tasks/").data["results"]), 2)
+
+        self.assertEqual(self.client.get(f"/api/tasks/{task.pk}/").status_code, 404)
+        response = self.client.get(f"/api/tasks/{task.pk}/?archived=true")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["owner"], "archivo")
+        self.assertEqual([c["content"] for c in response.data["comments"]], ["Comentario archivado 1", "Comentario archivado 0"])
+        response = self.client.get(f"/api/tasks/{task.pk}/comments/?archived=true")
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get("/api/tasks/?archived=true&search=archivado&search_comments=true")
+        self.assertEqual([row["id"] for row in response.data["results"]], [task.pk])
+        response = self.client.get("/api/tasks/export/?archived=true&include_comments=true", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 3)
+
+    def test_archived_tasks_are_read_only(self):
+        """Las escrituras no ven el archivo, aunque se pida ?archived=true"""
+        self.archive()
+        task = self.old_done[0]
+        response = self.client.patch(f"/api/tasks/{task.pk}/?archived=true", {"title": "Cambio"}, format="json")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(f"/api/tasks/{task.pk}/comments/?archived=true", {"content": "Nuevo"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_archive_invalidates_cache_and_publishes_events(self):
+        """Las tareas archivadas salen del listado en caché y se anuncian con op archive"""
+        self.assertEqual(len(self.client.get("/api/tasks/").data["results"]), 5)
+        with mock.patch.object(InProcessBroker, "publish") as publish, self.captureOnCommitCallbacks(execute=True):
+            self.archive()
+        events = [event for call in publish.call_args_list for event in call.args[0] if event["type"] == "task"]
+        self.assertCountEqual(events, [{"type": "task", "op": "archive", "id": t.pk, "task": t.pk} for t in self.old_done])
+        self.assertEqual(len(self.client.get("/api/tasks/").data["results"]), 2)
+
+    def test_deleting_user_discounts_archived_stats(self):
+        """Al borrar un usuario sus tareas archivadas también se descuentan de las filas globales"""
+        self.archive()
+        self.user.delete()
+        self.assertFalse(TaskStat.objects.exclude(count=0).exists())
+
+
+class JobQueueTestCase(APITestCase):
+
+    def setUp(self):
+        import tempfile
+        self.user = User.objects.create_user(username="trabajos", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.result_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.result_dir.cleanup)
+        settings = override_settings(JOBS={"RESULT_DIR": self.result_dir.name, "RETRY_BACKOFF": 10})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def run_workers(self):
+        call_command("run_workers", "--burst", stdout=open("/dev/null", "w"))
+
+    def register(self, name, func, **options):
+        jobs.register(name, **options)(func)
+        self.addCleanup(jobs.REGISTRY.pop, name)
+
+    def test_async_export(self):
+        """?async=true encola la exportación (202); el archivo es el mismo que el de la exportación directa"""
+        for i in range(3):
+            Task.objects.create(title=f"Exportada {i}", owner=self.user, status=Task.Status.DONE if i else Task.Status.PENDING)
+        response = self.client.get("/api/tasks/export/?format=csv&status=done&async=true")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual((response.data["status"], response.data["kind"]), ("queued", "tasks.export"))
+        self.assertIsNone(response.data["download"])
+        self.assertEqual(self.client.get(f"/api/jobs/{response.data['id']}/download/").status_code, 404)
+
+        self.run_workers()
+        job = self.client.get(response["Location"]).data
+        self.assertEqual(job["status"], "succeeded")
+        download = self.client.get(job["download"])
+        self.assertEqual(download["Content-Type"], "text/csv; charset=utf-8")
+        expected = self.client.get("/api/tasks/export/?format=csv&status=done")
+        self.assertEqual(b"".join(download.streaming_content), b"".join(expected.streaming_content))
+
+    def test_async_bulk(self):
+        """Las operaciones masivas con ?async=true dejan su respuesta en el resultado; los errores de validación no se reintentan"""
+        response = self.client.post("/api/tasks/bulk/?async=true", [{"title": f"T{i}"} for i in range(3)], format="json")
+        self.assertEqual(response.status_code, 202)
+        invalid = self.client.delete("/api/tasks/bulk/?async=true", {"ids": []}, format="json")
+        with self.assertLogs("tasks.jobs", "WARNING"):
+            self.run_workers()
+        self.assertEqual(Task.objects.filter(owner=self.user).count(), 3)
+        job = Job.objects.get(pk=response.data["id"])
+        self.assertEqual((job.status, job.result["succeeded"]), (Job.Status.SUCCEEDED, 3))
+        job = Job.objects.get(pk=invalid.data["id"])
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 1))
+        self.assertIn("ids", job.error)
+
+    def test_async_bulk_msgpack_body(self):
+        """Un cuerpo MessagePack se guarda como JSON: las fechas como ISO 8601 y los binarios se rechazan (400)"""
+        import msgpack
+        seen = timezone.now()
+        body = msgpack.packb([{"title": "Con fecha", "seen_at": seen}], datetime=True)
+        response = self.client.post("/api/tasks/bulk/?async=true", body, content_type="application/msgpack")
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get(pk=response.data["id"])
+        self.assertEqual(job.payload["data"], [{"title": "Con fecha", "seen_at": seen.isoformat()}])
+        self.run_workers()
+        self.assertTrue(Task.objects.filter(title="Con fecha").exists())
+
+        body = msgpack.packb([{"title": "Binario", "attachment": b"\x00\x01"}])
+        response = self.client.post("/api/tasks/bulk/?async=true", body, content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_retries_with_backoff(self):
+        """Un error reintenta más tarde (espera exponencial) hasta max_attempts; Fail no reintenta"""
+        calls = []
+
+        def flaky(job):
+            calls.append(job.attempts)
+            if len(calls) < 3:
+                raise RuntimeError("falla temporal")
+            return {"ok": True}
+
+        self.register("tests.flaky", flaky)
+        job = jobs.enqueue("tests.flaky")
+        with self.assertLogs("tasks.jobs", "WARNING") as logs:
+            self.run_workers()
+        self.assertIn("job_retry", logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.Status.QUEUED, 1, "RuntimeError: falla temporal"))
+        self.assertGreaterEqual(job.run_after - timezone.now(), timedelta(seconds=9))
+        for attempts in (2, 3):
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            with self.assertLogs("tasks.jobs", "INFO"):
+                self.run_workers()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, calls), (Job.Status.SUCCEEDED, {"ok": True}, [1, 2, 3]))
+
+        self.register("tests.broken", lambda job: (_ for _ in ()).throw(jobs.Fail("datos inválidos")))
+        job = jobs.enqueue("tests.broken")
+        with self.assertLogs("tasks.jobs", "WARNING"):
+            self.run_workers()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), (Job.Status.FAILED, 1, "datos inválidos"))
+
+    def test_expired_lease_is_reclaimed(self):
+        """Si el worker muere, el trabajo se retoma al vencer su plazo y el intento viejo ya no puede terminarlo"""
+        self.register("tests.noop", lambda job: None, max_attempts=2)
+        job = jobs.enqueue("tests.noop")
+        first = jobs.claim("muerto")
+        self.assertEqual(first.pk, job.pk)
+        self.assertIsNone(jobs.claim("otro"))  # En ejecución y dentro del plazo
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        second = jobs.claim("otro")
+        self.assertEqual((second.pk, second.attempts), (job.pk, 2))
+        with self.assertLogs("tasks.jobs", "WARNING"):
+            jobs.finish(first, status=Job.Status.FAILED)  # El intento vencido no pisa al nuevo
+        jobs.execute(second)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.Status.SUCCEEDED, "otro"))
+
+        job = jobs.enqueue("tests.noop")
+        jobs.claim("muerto"), Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        jobs.claim("muerto"), Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertIsNone(jobs.claim("otro"))  # Sin intentos restantes: se marca fallido
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+
+    def test_jobs_endpoint_lists_own_jobs(self):
+        other = User.objects.create_user(username="otro_trabajos", password="pass1234")
+        mine = jobs.enqueue("tasks.rebuild_counters", user=self.user)
+        theirs = jobs.enqueue("tasks.rebuild_counters", user=other)
+        response = self.client.get("/api/jobs/")
+        self.assertEqual([job["id"] for job in response.data["results"]], [mine.pk])
+        self.assertEqual(self.client.get(f"/api/jobs/{theirs.pk}/").status_code, 404)
+
+    def test_rebuild_counters_enqueue_and_prune(self):
+        """rebuild_counters --enqueue deja el recálculo a los workers; los terminados viejos se eliminan"""
+        call_command("rebuild_counters", "--enqueue", stdout=open("/dev/null", "w"))
+        self.run_workers()
+        job = Job.objects.get(kind="tasks.rebuild_counters")
+        self.assertEqual(job.status, Job.Status.SUCCEEDED)
+        self.assertEqual(jobs.prune_jobs(), 0)
+        self.assertEqual(jobs.prune_jobs(now=timezone.now() + timedelta(days=8)), 1)
+
+    def test_workers_require_shared_backends(self):
+        """run_workers no arranca con caché o broker locales al proceso: web no vería lo que hacen los trabajos"""
+        from django.core.management.base import SystemCheckError
+        with self.assertRaisesMessage(SystemCheckError, "tasks.E001") as context:
+            call_command("run_workers", "--burst", skip_checks=False, stdout=open("/dev/null", "w"))
+        self.assertIn("tasks.E002", str(context.exception))
+        with override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+            EVENTS={"BROKER": "core.events.PostgresBroker"},
+        ):
+            call_command("run_workers", "--burst", skip_checks=False, stdout=open("/dev/null", "w"))
+
+
+class JobWorkersTestCase(TransactionTestCase):
+    # Los workers en hilos y procesos usan sus propias conexiones: necesitan datos confirmados
+
+    def setUp(self):
+        jobs.register("tests.record")(lambda job: {"worker": jobs.worker_name()})
+        self.addCleanup(jobs.REGISTRY.pop, "tests.record")
+
+    def test_concurrent_workers_run_each_job_once(self):
+        """Con varios hilos y procesos (SKIP LOCKED) cada trabajo se ejecuta exactamente una vez"""
+        for options in (["--threads", "4"], ["--processes", "2", "--threads", "2"]):
+            with self.subTest(options=options):
+                Job.objects.all().delete()
+                for _ in range(40):
+                    jobs.enqueue("tests.record")
+                call_command("run_workers", "--burst", *options, stdout=open("/dev/null", "w"))
+                self.assertEqual(Job.objects.filter(status=Job.Status.SUCCEEDED, attempts=1).count(), 40)
+                self.assertGreater(len({job.result["worker"] for job in Job.objects.all()}), 1)
+
+    def test_heartbeat_renews_lease_of_long_jobs(self):
+        """Un trabajo que dura más que su plazo lo renueva con el latido: ningún otro worker lo retoma"""
+
+        def slow(job):
+            time.sleep(2)
+            return {"stolen": jobs.claim("otro") is not None}
+
+        jobs.register("tests.slow", timeout=1)(slow)
+        self.addCleanup(jobs.REGISTRY.pop, "tests.slow")
+        job = jobs.enqueue("tests.slow")
+        jobs.execute(jobs.claim("lento"))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), (Job.Status.SUCCEEDED, 1, "lento"))
+        self.assertEqual(job.result, {"stolen": False})
@@ -1,9 +1,21 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet
+from .views import JobViewSet, TaskViewSet
+from . import async_views
 
 
 # Router que genera automáticamente las URLs para operaciones CRUD de tareas
 router = DefaultRouter()
 router.register(r"tasks", TaskViewSet, basename="task")  # Registra el ViewSet en /tasks/
+router.register(r"jobs", JobViewSet, basename="job")  # Estado de los trabajos en segundo plano
 
-urlpatterns = router.urls  # URLs generadas: /tasks/, /tasks/{id}/, /tasks/{id}/comments/
\ No newline at end of file
+urlpatterns = router.urls  # URLs generadas: /tasks/, /tasks/{id}/, /tasks/{id}/comments/
+
+# Lecturas async (ASGI) con las mismas respuestas que TaskViewSet
+urlpatterns += [
+    path("async/tasks/", async_views.task_list, name="async-task-list"),
+    path("async/tasks/<int:pk>/", async_views.task_detail, name="async-task-detail"),
+    path("async/tasks/<int:pk>/comments/", async_views.task_comments, name="async-task-comments"),
+    # Server-Sent Events de cambios en tareas y comentarios (ASGI)
+    path("async/events/", async_views.event_stream, name="async-events"),
+]
\ No newline at end of file
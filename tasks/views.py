@@ -1,32 +1,131 @@
+from collections import Counter
+
+import orjson
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import Task, Comment
+from core.db_router import ReplicaRoutingMixin, aiterate_with_routing, iterate_with_routing
+from core.middleware import measure
+
+from .models import MAX_ACTIVE_TASKS, ActiveTaskCounter, ArchivedTask, Job, Task, TaskStat, Comment
 from .serializers import (
-    TaskListSerializer, TaskDetailSerializer, CommentSerializer
+    TaskListSerializer, TaskDetailSerializer, CommentSerializer,
+    TaskBulkItemSerializer, TaskBulkIdsSerializer, JobSerializer, EMBEDDED_COMMENTS,
 )
 from .permissions import IsOwnerOrReadOnly # Solo Owner puede editar
+from .pagination import CommentPagination, TaskPagination
+from .filters import TaskOrderingFilter, TaskSearchFilter
+from .renderers import CSVRenderer, NDJSONRenderer, ORJSONRenderer
+from .export import iter_task_rows, stream_csv, stream_ndjson
+from .stats import task_stats
+from .sync import task_changes
+from .signals import tasks_bulk_changed
+from . import cache, jobs
 
 
 # Create your views here.
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ReplicaRoutingMixin, viewsets.ModelViewSet):
     """ViewSet que proporciona operaciones CRUD completas para tareas mediante API REST."""
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ["status", "priority"]
-    search_fields = ["title"]
-    ordering_fields = ["created_at", "updated_at", "priority", "status"]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, TaskOrderingFilter]
+    # ?comment_count__gte=10 (más comentadas), ?last_activity_at__gte=... (actividad reciente)
+    filterset_fields = {
+        "status": ["exact"], "priority": ["exact"],
+        "comment_count": ["exact", "gte", "lte"], "last_activity_at": ["gte", "lte"],
+    }
+    search_fields = ["title"]  # Solo para motores sin texto completo (ver TaskSearchFilter)
+    ordering_fields = [
+        "created_at", "updated_at", "priority", "status", "comment_count", "last_activity_at",
+    ]  # priority: por rango (TaskOrderingFilter)
+    pagination_class = TaskPagination  # Página por número o keyset (?paginate=cursor)
+    bulk_max_items = 500  # Máximo de elementos por petición a /api/tasks/bulk/
+    replica_actions = ("list", "retrieve", "comments", "export", "stats", "changes")  # GET servidos desde réplicas (ver core.db_router)
+    archive_actions = ("list", "retrieve", "comments", "export")  # Lecturas que aceptan ?archived=true
+
+    def perform_authentication(self, request):
+        """Autentica (JWT) al inicio de la vista, midiendo su costo para el header Server-Timing."""
+        with measure("auth"):
+            super().perform_authentication(request)
+
+    sparse_actions = ("list", "retrieve")  # Acciones con ?fields= / ?expand= (solo lectura)
+    # Columnas que necesita cada campo serializado; comments se agrega aparte
+    field_columns = {
+        "id": ["id"], "title": ["title"], "description": ["description"], "priority": ["priority"],
+        "status": ["status"], "owner": ["owner__username"], "created_at": ["created_at"],
+        "updated_at": ["updated_at"], "comment_count": ["comment_count"], "last_activity_at": ["last_activity_at"],
+    }
+    # Siempre se leen: id y las columnas de ?ordering= (la paginación por cursor lee su valor)
+    base_columns = ["id", "created_at", "updated_at", "priority_rank", "status", "comment_count", "last_activity_at"]
 
     def get_queryset(self):
-        """Retorna todas las tareas; los permisos de edición se controlan en IsOwnerOrReadOnly."""
+        """Retorna todas las tareas (o las archivadas, ver reads_archive); los permisos de edición se controlan en IsOwnerOrReadOnly."""
         # # Solo las tareas del usuario autenticado
         # return Task.objects.filter(owner=self.request.user).select_related("owner")
         # Permitir ver todas las tareas, pero filtrar permisos en IsOwnerOrReadOnly
-        return Task.objects.all()
+        if self.action in self.sparse_actions:
+            return self.get_sparse_queryset(self.get_serializer_fields())
+        # owner.username en ambos serializadores; el documento de búsqueda no se serializa
+        queryset = self.get_task_model().objects.select_related("owner").defer("search_vector")
+        if self.action in ["update", "partial_update"]:
+            # TaskDetailSerializer embebe los últimos comentarios con el username de su autor
+            queryset = queryset.prefetch_related(self.get_comments_prefetch())
+        return queryset
+
+    def get_sparse_queryset(self, fields):
+        """Lee solo las columnas, joins y comentarios que necesitan los campos a serializar."""
+        columns = list(self.base_columns)
+        for field in fields:
+            columns += self.field_columns.get(field, [])
+        model = self.get_task_model()
+        queryset = model.objects.only(*dict.fromkeys(columns))
+        if "owner" in fields:
+            queryset = queryset.select_related("owner")
+        if "comments" in fields:
+            queryset = queryset.prefetch_related(self.get_comments_prefetch(model.comments.field.model))
+        return queryset
+
+    def reads_archive(self):
+        """True en las lecturas con ?archived=true: se sirven desde ArchivedTask en lugar de Task."""
+        return (
+            self.action in self.archive_actions
+            and self.request.method in SAFE_METHODS
+            and self.request.query_params.get("archived", "").lower() in ("1", "true")
+        )
+
+    def get_task_model(self):
+        """Task, o ArchivedTask para las lecturas del archivo (solo lectura, ver tasks/archive.py)."""
+        return ArchivedTask if self.reads_archive() else Task
+
+    def get_serializer_fields(self):
+        """Campos a serializar en list/retrieve según ?fields= y ?expand= (listas separadas por comas)."""
+        if getattr(self, "_serializer_fields", None) is None:
+            params = self.request.query_params
+            fields, expand = (
+                [name.strip() for name in params[key].split(",") if name.strip()] if key in params else None
+                for key in ("fields", "expand")
+            )
+            self._serializer_fields = self.get_serializer_class().select_fields(fields, expand)
+        return self._serializer_fields
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            kwargs.setdefault("fields", self.get_serializer_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    @staticmethod
+    def get_comments_prefetch(comment_model=Comment):
+        """Prefetch de los últimos EMBEDDED_COMMENTS comentarios (con autor) en una sola consulta adicional."""
+        latest = comment_model.objects.select_related("author").order_by("-created_at", "-id")[:EMBEDDED_COMMENTS]
+        return Prefetch("comments", queryset=latest, to_attr="latest_comments")
 
     def get_serializer_class(self):
         """Usa TaskListSerializer para el listado (campos reducidos) y TaskDetailSerializer para el resto (con comentarios)."""
@@ -34,23 +133,309 @@ class TaskViewSet(viewsets.ModelViewSet):
             return TaskListSerializer
         return TaskDetailSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Listado servido desde caché por combinación de query params (ver tasks/cache.py)."""
+        return cache.cached_response(
+            cache.list_cache_key(request), lambda: super(TaskViewSet, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Detalle servido desde caché; se invalida al modificar la tarea o sus comentarios."""
+        key = cache.detail_cache_key(request, kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return cache.cached_response(
+            key, lambda: super(TaskViewSet, self).retrieve(request, *args, **kwargs)
+        )
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        """Crea la tarea en una transacción: el bloqueo del contador de activas dura hasta el commit."""
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        """Actualiza (PUT/PATCH) en una transacción, igual que create."""
+        return super().update(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        """Guarda y serializa una copia recargada con sus comentarios precargados."""
+        instance = serializer.save()
+        # UpdateModelMixin vacía el prefetch de la instancia original al volver de este método
+        serializer.instance = self.get_queryset().get(pk=instance.pk)
+
     @action(detail=True, methods=["get", "post"], url_path="comments")
     def comments(self, request, pk=None):
         """Endpoint personalizado para listar (GET) o crear (POST) comentarios de una tarea específica."""
         task = self.get_object()  # respeta permisos y filtro de owner
 
         if request.method == "GET":
-            # Retornar todos los comentarios de la tarea
-            serializer = CommentSerializer(task.comments.all(), many=True)
-            return Response(serializer.data)
+            # Paginado por keyset (created_at, id); ?ordering=-created_at para los más recientes primero
+            comments = task.comments.select_related("author")
+            if request.query_params.get("ordering") == "-created_at":
+                comments = comments.order_by("-created_at", "-id")
+            paginator = CommentPagination()
+            page = paginator.paginate_queryset(comments, request, view=self)
+            serializer = CommentSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
 
         # POST: crear comentario
         serializer = CommentSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        # Crear comentario con el usuario autenticado como autor
-        Comment.objects.create(
-            task=task,
-            author=request.user,
-            content=serializer.validated_data["content"],
+        # Crear comentario con el usuario autenticado como autor; en la misma transacción que el
+        # UPDATE de comment_count y last_activity_at de la tarea (signals)
+        with transaction.atomic():
+            serializer.save(task=task, author=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Exporta en streaming todas las tareas que cumplen los filtros del listado (status, priority,
+        search, ordering, archived), sin paginar. Formato por ?format=ndjson|csv o Accept;
+        ?include_comments=true agrega los comentarios de cada tarea. Con ?async=true se genera en
+        segundo plano (202 con el trabajo) y se descarga de /api/jobs/<id>/download/.
+        """
+        renderer = request.accepted_renderer
+        if self.wants_async(request):
+            # La respuesta es el trabajo (JSON), no el archivo: se descarga de /api/jobs/<id>/download/
+            request.accepted_renderer, request.accepted_media_type = ORJSONRenderer(), ORJSONRenderer.media_type
+            return self.enqueue_job("tasks.export", {"query": dict(request.query_params.lists()), "format": renderer.format})
+        # El contenido se genera después de la vista: mantiene la misma réplica mientras se recorre.
+        # Con ASGI va como generador async, para que Django no lo junte entero en memoria.
+        content = self.export_content(renderer.format)
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate_with_routing(content)
+        else:
+            content = iterate_with_routing(content)
+        response = StreamingHttpResponse(content, content_type=f"{renderer.media_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="tasks.{renderer.format}"'
+        return response
+
+    def export_content(self, export_format):
+        """Generador del archivo exportado (ndjson o csv) con los filtros de la request."""
+        queryset = self.filter_queryset(self.get_queryset())
+        include_comments = self.request.query_params.get("include_comments", "").lower() in ("1", "true")
+        rows = iter_task_rows(queryset, include_comments=include_comments)
+        if export_format == "csv":
+            return stream_csv(rows, include_comments=include_comments)
+        return stream_ndjson(rows)
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """
+        Cantidad de tareas del usuario y de todos los usuarios por estado, prioridad y período de
+        creación (?bucket=day|week|month, ?days=N períodos recientes). Se lee de TaskStat.
+        """
+        return Response(task_stats(request.user, request.query_params))
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Feed de cambios para sincronizar: tareas y comentarios creados, modificados o eliminados
+        desde ?cursor= (el de la respuesta anterior; sin él, todo). Ver tasks/sync.py.
+        """
+        return Response(task_changes(request.query_params, self.get_serializer_context()))
+
+    # --- Trabajos en segundo plano (tasks/jobs.py) ---
+
+    @staticmethod
+    def wants_async(request):
+        return request.query_params.get("async", "").lower() in ("1", "true")
+
+    @staticmethod
+    def job_data(data):
+        """
+        Cuerpo de la request como JSON para el payload del trabajo: las fechas de MessagePack pasan a
+        ISO 8601 (como las enviaría un cliente JSON) y los valores binarios se rechazan con 400.
+        """
+        try:
+            return orjson.loads(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+        except orjson.JSONEncodeError:
+            raise ValidationError({"detail": "El cuerpo de una operación en segundo plano no admite valores binarios."})
+
+    def enqueue_job(self, kind, payload):
+        """Encola el trabajo para el usuario y responde 202 con su estado (GET /api/jobs/<id>/)."""
+        job = jobs.enqueue(kind, payload, user=self.request.user)
+        data = JobSerializer(job, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": data["url"]})
+
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Contadores de aciertos/fallos del caché de respuestas (solo staff)."""
+        return Response(cache.cache_stats())
+
+    # --- Operaciones masivas ---
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Operaciones masivas en una sola transacción y con SQL por conjuntos:
+        - POST: lista de tareas a crear.
+        - PATCH: {"ids": [...], "changes": {...}} aplica los mismos cambios a todas.
+        - DELETE: {"ids": [...]}.
+        Responde con un resultado por elemento (status HTTP equivalente y errores si los hay).
+        Con ?async=true se encola (202) y la misma respuesta queda en el resultado del trabajo.
+        """
+        if self.wants_async(request):
+            return self.enqueue_job("tasks.bulk", {"method": request.method, "data": self.job_data(request.data)})
+        return Response(self.run_bulk(request))
+
+    def run_bulk(self, request):
+        with transaction.atomic():
+            if request.method == "POST":
+                results = self.bulk_create_tasks(request)
+            elif request.method == "PATCH":
+                results = self.bulk_update_tasks(request)
+            else:
+                results = self.bulk_delete_tasks(request)
+        failed = sum(1 for result in results if result["status"] >= 400)
+        return {"succeeded": len(results) - failed, "failed": failed, "results": results}
+
+    def check_bulk_size(self, size):
+        if size > self.bulk_max_items:
+            raise ValidationError({"detail": f"Máximo {self.bulk_max_items} elementos por petición."})
+
+    def limit_error(self):
+        return {"detail": f"Máximo {MAX_ACTIVE_TASKS} tareas activas por usuario."}
+
+    def bulk_create_tasks(self, request):
+        """Valida cada tarea, aplica el límite de activas en orden y las inserta con un único INSERT."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"detail": "Se espera una lista de tareas."})
+        self.check_bulk_size(len(items))
+
+        # Mismo bloqueo que la creación individual: serializa con otras escrituras del usuario
+        active = ActiveTaskCounter.lock_for(request.user.id).active_count
+        results, tasks = [], []
+        for index, item in enumerate(items):
+            serializer = TaskBulkItemSerializer(data=item)
+            if not serializer.is_valid():
+                results.append({"index": index, "status": 400, "errors": serializer.errors})
+                continue
+            if serializer.validated_data.get("status", Task.Status.PENDING) != Task.Status.DONE:
+                if active >= MAX_ACTIVE_TASKS:
+                    results.append({"index": index, "status": 400, "errors": self.limit_error()})
+                    continue
+                active += 1
+            tasks.append(Task(owner=request.user, **serializer.validated_data))
+            results.append({"index": index, "status": 201})
+
+        Task.objects.bulk_create(tasks)
+        created = iter(TaskListSerializer(tasks, many=True).data)
+        for result in results:
+            if result["status"] == 201:
+                result["data"] = next(created)
+        if tasks:
+            tasks_bulk_changed.send(
+                sender=Task, action="create", task_ids=[task.pk for task in tasks], owner_ids=[request.user.id],
+                stats=Counter(TaskStat.key_for(task) for task in tasks),
+            )
+        return results
+
+    def get_bulk_targets(self, request):
+        """
+        Lee y bloquea las tareas pedidas con una sola consulta. Retorna (ids, resultados, tareas permitidas)
+        donde los resultados ya incluyen los ids inexistentes (404) o ajenos (403, IsOwnerOrReadOnly).
+        """
+        serializer = TaskBulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))  # Sin duplicados, en orden
+        self.check_bulk_size(len(ids))
+
+        found = {
+            task.pk: task
+            for task in Task.objects.filter(pk__in=ids).only("id", "owner_id", "status", "priority", "created_at")
+            .order_by("pk").select_for_update()  # Orden fijo de bloqueo: evita deadlocks entre lotes
+        }
+        permissions = self.get_permissions()
+        results, allowed = {}, []
+        for pk in ids:
+            task = found.get(pk)
+            if task is None:
+                results[pk] = {"id": pk, "status": 404, "errors": {"detail": "No encontrado."}}
+            elif not all(p.has_object_permission(request, self, task) for p in permissions):
+                results[pk] = {"id": pk, "status": 403, "errors": {"detail": "No tiene permiso para modificar esta tarea."}}
+            else:
+                allowed.append(task)
+        return ids, results, allowed
+
+    def bulk_update_tasks(self, request):
+        """Aplica `changes` a todas las tareas permitidas con un único UPDATE."""
+        ids, results, tasks = self.get_bulk_targets(request)
+        serializer = TaskBulkItemSerializer(data=request.data.get("changes"), partial=True)
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data
+        if not changes:
+            raise ValidationError({"changes": "Indique al menos un campo a modificar."})
+
+        new_status = changes.get("status")
+        if new_status is not None and new_status != Task.Status.DONE:
+            # Solo las tareas completadas que se reabren suman activas
+            available = MAX_ACTIVE_TASKS - ActiveTaskCounter.lock_for(request.user.id).active_count
+            reopened = [task for task in tasks if task.status == Task.Status.DONE]
+            for task in reopened[max(available, 0):]:
+                results[task.pk] = {"id": task.pk, "status": 400, "errors": self.limit_error()}
+
+        updated = [task.pk for task in tasks if task.pk not in results]
+        if updated:
+            now = timezone.now()
+            Task.objects.filter(pk__in=updated).update(**changes, updated_at=now, last_activity_at=now)
+            # Cada tarea pasa de su fila de TaskStat a la de su nuevo estado/prioridad
+            stats = Counter()
+            for task in tasks:
+                if task.pk not in results:
+                    stats[TaskStat.key_for(task)] -= 1
+                    stats[TaskStat.key(
+                        task.owner_id, task.created_at, changes.get("status", task.status),
+                        changes.get("priority", task.priority),
+                    )] += 1
+            tasks_bulk_changed.send(
+                sender=Task, action="update", task_ids=updated, owner_ids=[request.user.id], stats=stats
+            )
+        for pk in updated:
+            results[pk] = {"id": pk, "status": 200}
+        return [results[pk] for pk in ids]
+
+    def bulk_delete_tasks(self, request):
+        """Elimina las tareas permitidas y sus comentarios con un DELETE por tabla."""
+        ids, results, tasks = self.get_bulk_targets(request)
+        deleted = [task.pk for task in tasks]
+        if deleted:
+            stats = Counter()
+            stats.subtract(TaskStat.key_for(task) for task in tasks)
+            # _raw_delete evita que el Collector cargue y emita signals fila por fila;
+            # los datos derivados se actualizan con tasks_bulk_changed
+            Comment.objects.filter(task_id__in=deleted)._raw_delete(Comment.objects.db)
+            Task.objects.filter(pk__in=deleted)._raw_delete(Task.objects.db)
+            tasks_bulk_changed.send(
+                sender=Task, action="delete", task_ids=deleted, owner_ids=[request.user.id],
+                stats=stats,
+            )
+        for pk in deleted:
+            results[pk] = {"id": pk, "status": 204}
+        return [results[pk] for pk in ids]
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Estado de los trabajos en segundo plano del usuario (exportaciones y operaciones masivas con ?async=true)."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """Archivo generado por el trabajo (exportaciones), una vez terminado."""
+        job = self.get_object()
+        name = (job.result or {}).get("file") if job.status == Job.Status.SUCCEEDED else None
+        if not name:
+            raise NotFound("El trabajo no generó un archivo o todavía no terminó.")
+        path = jobs.result_path(name)
+        if not path.exists():
+            raise NotFound("El archivo ya no está disponible.")
+        renderer = CSVRenderer if job.result["format"] == "csv" else NDJSONRenderer
+        return FileResponse(
+            path.open("rb"), as_attachment=True, filename=f"tasks.{renderer.format}",
+            content_type=f"{renderer.media_type}; charset=utf-8",
         )
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file